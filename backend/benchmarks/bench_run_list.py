@@ -0,0 +1,125 @@
+# benchmarks/bench_run_list.py
+"""Benchmark GET /runs serialization and compression for a 5-year history.
+
+Compares the old response_model path (Pydantic validation + default JSON
+encoder) against the plain-dict path with the stdlib encoder and orjson,
+and reports payload bytes with gzip and brotli.
+
+Usage (from backend/):
+    python benchmarks/bench_run_list.py [--runs 1825] [--repeat 20]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from src.runs.app import RunResponse, run_to_dict, run_to_response  # noqa: E402
+from src.runs.models.run import Run  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def build_history(run_count):
+    """One run a day going back from today, with realistic notes"""
+    rng = random.Random(42)
+    start = date.today() - timedelta(days=run_count)
+    runs = []
+    for day in range(run_count):
+        distance = Decimal(str(round(rng.uniform(3, 21), 2)))
+        seconds = int(float(distance) * rng.uniform(270, 420))
+        run = Run(
+            user_id="bench-user",
+            date=start + timedelta(days=day),
+            distance_km=distance,
+            duration=f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}",
+            notes=rng.choice(["", "Easy run", "Intervals 6x800m", "Long run with hills"]),
+        )
+        runs.append(run)
+    return runs
+
+
+def time_it(func, repeat):
+    """Best-of-N wall time in milliseconds"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5 * 365)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    runs = build_history(args.runs)
+    adapter = TypeAdapter(List[RunResponse])
+
+    def response_model_path():
+        # What FastAPI does for response_model=List[RunResponse]
+        models = [run_to_response(run) for run in runs]
+        validated = adapter.validate_python(models)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    def dict_stdlib_path():
+        content = [run_to_dict(run) for run in runs]
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    paths = [("response_model + json", response_model_path), ("dicts + json", dict_stdlib_path)]
+    if orjson is not None:
+        paths.append(("dicts + orjson", lambda: orjson.dumps([run_to_dict(run) for run in runs])))
+
+    print(f"Serialization of {len(runs)} runs (best of {args.repeat})")
+    print(f"{'path':<26}{'ms':>10}")
+    body = None
+    for name, func in paths:
+        elapsed, body = time_it(func, args.repeat)
+        print(f"{name:<26}{elapsed:>10.2f}")
+
+    # Encoder cost alone, with the dicts already built
+    content = [run_to_dict(run) for run in runs]
+    encoders = [("encode only: json", lambda: json.dumps(content).encode())]
+    if orjson is not None:
+        encoders.append(("encode only: orjson", lambda: orjson.dumps(content)))
+    for name, func in encoders:
+        elapsed, _ = time_it(func, args.repeat)
+        print(f"{name:<26}{elapsed:>10.2f}")
+
+    print()
+    print(f"Payload size ({len(runs)} runs)")
+    print(f"{'encoding':<26}{'bytes':>10}{'ms':>10}")
+    print(f"{'identity':<26}{len(body):>10}{0:>10.2f}")
+
+    elapsed, compressed = time_it(lambda: gzip.compress(body, 6), args.repeat)
+    print(f"{'gzip (level 6)':<26}{len(compressed):>10}{elapsed:>10.2f}")
+
+    if brotli is not None:
+        elapsed, compressed = time_it(lambda: brotli.compress(body, quality=4), args.repeat)
+        print(f"{'br (quality 4)':<26}{len(compressed):>10}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
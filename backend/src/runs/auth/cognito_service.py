@@ -3,9 +3,23 @@
 
 import os
 import re
+import threading
 import boto3
 from botocore.exceptions import ClientError
 
+# One Cognito client per region and container, shared by every
+# CognitoService (creating a boto3 client costs tens of milliseconds)
+_clients_lock = threading.Lock()
+_clients = {}
+
+
+def get_cognito_client(region):
+    """Get the shared Cognito client for a region, creating it on first use"""
+    with _clients_lock:
+        if region not in _clients:
+            _clients[region] = boto3.client("cognito-idp", region_name=region)
+        return _clients[region]
+
 
 class CognitoService:
     """Service for handling Cognito user operations"""
@@ -16,8 +30,8 @@ class CognitoService:
         self.client_id = os.environ.get("COGNITO_CLIENT_ID")
         self.region = os.environ.get("AWS_REGION", "us-east-1")
 
-        # Initialize boto3 Cognito client
-        self.cognito_client = boto3.client("cognito-idp", region_name=self.region)
+        # Shared boto3 Cognito client (pre-created during Lambda init)
+        self.cognito_client = get_cognito_client(self.region)
 
     def _validate_email(self, email):
         """Validate email format using regex"""
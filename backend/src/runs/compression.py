@@ -0,0 +1,187 @@
+# src/runs/compression.py
+"""Response compression middleware - negotiates brotli or gzip via Accept-Encoding"""
+
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional - fall back to gzip only
+    brotli = None
+
+# Only text-like payloads are worth compressing
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/",
+)
+
+
+def _parse_accept_encoding(header_value):
+    """Parse Accept-Encoding into {coding: q-value}"""
+    codings = {}
+    for part in header_value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+
+        coding, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+
+    return codings
+
+
+def choose_encoding(header_value):
+    """Pick the best supported content coding for an Accept-Encoding header"""
+    if not header_value:
+        return None
+
+    codings = _parse_accept_encoding(header_value)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    best = None
+    best_q = 0.0
+    for coding in supported:  # Order breaks ties in favour of brotli
+        q = codings.get(coding, codings.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+
+    return best
+
+
+class _Compressor:
+    """Incremental compressor for one response body"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=4)
+        else:
+            # wbits=31 produces a gzip container
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self):
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses above a size threshold.
+
+    Single-body responses smaller than `minimum_size` are sent unchanged;
+    streaming responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, minimum_size=None):
+        self.app = app
+        if minimum_size is None:
+            minimum_size = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    """Wraps `send` for a single response and compresses the body if worthwhile"""
+
+    def __init__(self, send, encoding, minimum_size):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _should_compress(self, headers):
+        content_type = ""
+        for name, value in headers:
+            if name == b"content-encoding":
+                return False  # Already encoded
+            if name == b"content-type":
+                content_type = value.decode("latin-1")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _headers_for_compressed(self, body_length=None):
+        headers = [
+            (name, value)
+            for name, value in self.start_message.get("headers", [])
+            if name not in (b"content-length", b"vary")
+        ]
+        headers.append((b"content-encoding", self.encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if body_length is not None:
+            headers.append((b"content-length", str(body_length).encode()))
+        return headers
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            if not self._should_compress(message.get("headers", [])):
+                self.passthrough = True
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and not more_body:
+            # Whole body in one message - compress only above the threshold
+            if len(body) < self.minimum_size:
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            compressor = _Compressor(self.encoding)
+            compressed = compressor.compress(body) + compressor.flush()
+            await self.send(
+                {**self.start_message, "headers": self._headers_for_compressed(len(compressed))}
+            )
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if self.compressor is None:
+            # First chunk of a streaming response - length is unknown
+            self.compressor = _Compressor(self.encoding)
+            await self.send({**self.start_message, "headers": self._headers_for_compressed()})
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.flush()
+
+        await self.send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
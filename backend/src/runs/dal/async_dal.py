@@ -0,0 +1,74 @@
+"""Async DAL - awaitable calls into the blocking boto3 DAL functions
+
+The DAL modules stay synchronous (that is all Lambda needs). Async endpoints
+await them through `call_async`, which runs the call on a dedicated thread
+pool sized for I/O, so one uvicorn worker can keep many DynamoDB calls in
+flight instead of being capped by Starlette's default threadpool.
+
+DAL_EXECUTOR=inline runs the sync DAL directly on the event loop instead -
+the fallback for single-request runtimes such as Lambda.
+
+Calls run in a copy of the caller's context, so request-scoped state
+(dal/unit_of_work.py) is visible on the pool threads.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from instrumentation import timed
+except ImportError:
+    from ..instrumentation import timed
+
+_executor = None
+
+
+def _get_executor():
+    """Create the DAL thread pool on first use"""
+    global _executor
+    if _executor is None:
+        max_workers = int(os.environ.get("DAL_MAX_WORKERS", "128"))
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dal")
+    return _executor
+
+
+def _inline_mode():
+    return os.environ.get("DAL_EXECUTOR", "thread") == "inline"
+
+
+def _timed_call(func, *args, **kwargs):
+    """Run a DAL function as a "dal.<name>" phase of the current request"""
+    with timed(f"dal.{func.__name__}"):
+        return func(*args, **kwargs)
+
+
+async def call_async(func, *args, **kwargs):
+    """Await a blocking DAL function without blocking the event loop"""
+    if _inline_mode():
+        return _timed_call(func, *args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(context.run, _timed_call, func, *args, **kwargs)
+    )
+
+
+async def gather_async(*calls):
+    """Run several DAL calls concurrently and return their results in order
+
+    Each call is a tuple of (func, *args). The thread pool is always used here,
+    even in inline mode, since overlapping the calls is the point.
+    """
+    loop = asyncio.get_running_loop()
+    futures = [
+        loop.run_in_executor(
+            _get_executor(),
+            functools.partial(contextvars.copy_context().run, _timed_call, func, *args),
+        )
+        for func, *args in calls
+    ]
+    return await asyncio.gather(*futures)
@@ -0,0 +1,22 @@
+"""Shared boto3 clients for the AWS services next to DynamoDB (S3, SQS)
+
+One client per service and container, created on first use. Like the
+DynamoDB resource (see dynamodb.py), creation is serialized because boto3's
+default session is not thread-safe. Point S3 at MinIO with
+AWS_ENDPOINT_URL_S3.
+"""
+
+import threading
+
+import boto3
+
+_clients_lock = threading.Lock()
+_clients = {}
+
+
+def get_client(service):
+    """Get the shared client for an AWS service, e.g. "s3" or "sqs" """
+    with _clients_lock:
+        if service not in _clients:
+            _clients[service] = boto3.client(service)
+        return _clients[service]
@@ -0,0 +1,114 @@
+"""Per-container read-through cache for DAL reads
+
+Lambda containers are reused between invocations, so a module-level cache
+survives across requests handled by the same container. Entries expire
+after a short TTL, which bounds staleness against writes made by other
+containers; writes in this container invalidate their key immediately.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """Thread-safe TTL + LRU cache bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries, max_bytes, ttl_seconds, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._generations = {}  # key -> invalidation counter
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if self._clock() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self, key):
+        """Invalidation counter for key - capture it before loading from DynamoDB"""
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def set(self, key, value, size, generation=None, ttl_seconds=None):
+        """Store a value loaded from DynamoDB.
+
+        If `generation` is given and the key was invalidated since it was
+        captured, the (possibly stale) value is dropped instead of cached.
+        `ttl_seconds` overrides the cache-wide TTL for this entry.
+        """
+        if not self.enabled or size > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation is not None and self._generations.get(key, 0) != generation:
+                return
+
+            if key in self._entries:
+                self._remove(key)
+
+            ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+            self._entries[key] = (value, size, self._clock() + ttl)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Drop key after a write in this container"""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit-rate metrics for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
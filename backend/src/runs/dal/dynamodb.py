@@ -0,0 +1,176 @@
+"""Shared DynamoDB access for the DAL modules
+
+All tables come from one boto3 resource per container, configured with
+adaptive retries: throttled calls are retried with jittered exponential
+backoff, and the client-side rate limiter slows this container down while
+DynamoDB keeps throttling it (e.g. during a bulk import).
+
+Retries never run past the invocation: lambda_handler sets a deadline from
+the Lambda remaining time, and an attempt that would start with less than
+DYNAMODB_MIN_BUDGET_MS left fails fast with DeadlineExceededError instead.
+
+Every call asks DynamoDB for the capacity it consumed
+(DYNAMODB_RETURN_CONSUMED_CAPACITY: TOTAL, INDEXES or NONE). It is added to
+the current request's timings (see instrumentation.py), which accumulate it
+per request and per endpoint.
+"""
+
+import boto3
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from botocore.config import Config
+
+try:
+    from instrumentation import capacity_units, current_timings
+except ImportError:
+    from ..instrumentation import capacity_units, current_timings
+
+# Error codes DynamoDB returns when it throttles a request
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+# boto3's default session is not thread-safe, and DAL functions are called
+# from executor threads (see async_dal), so resource creation is serialized
+_resource_lock = threading.Lock()
+_resource = None
+
+# Monotonic time by which the current invocation must have finished
+_deadline = ContextVar("dal_deadline", default=None)
+
+_stats_lock = threading.Lock()
+_stats = {
+    "calls": 0,
+    "retries": 0,
+    "throttles": 0,
+    "deadline_exceeded": 0,
+    "read_capacity": 0.0,
+    "write_capacity": 0.0,
+}
+
+
+class DeadlineExceededError(Exception):
+    """Raised when too little invocation time is left to attempt a call"""
+
+
+def _client_config():
+    """Retry and timeout configuration for the DynamoDB client"""
+    return Config(
+        retries={
+            "mode": os.environ.get("DYNAMODB_RETRY_MODE", "adaptive"),
+            "max_attempts": int(os.environ.get("DYNAMODB_MAX_ATTEMPTS", "8")),
+        },
+        connect_timeout=float(os.environ.get("DYNAMODB_CONNECT_TIMEOUT_SECONDS", "1")),
+        read_timeout=float(os.environ.get("DYNAMODB_READ_TIMEOUT_SECONDS", "5")),
+    )
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _check_budget(**kwargs):
+    """before-send hook: runs for the first attempt and for every retry"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return
+
+    min_budget = float(os.environ.get("DYNAMODB_MIN_BUDGET_MS", "100")) / 1000
+    if deadline - time.monotonic() < min_budget:
+        _count("deadline_exceeded")
+        raise DeadlineExceededError("Not enough invocation time left for a DynamoDB call")
+
+
+def _record_response(response=None, **kwargs):
+    """needs-retry hook: sees every attempt's outcome, counts throttles"""
+    if response is None:
+        return None
+
+    _, parsed = response
+    if parsed.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES:
+        _count("throttles")
+    return None  # never decides the retry itself
+
+
+def _request_capacity(params, model, **kwargs):
+    """provide-client-params hook: ask for consumed capacity on every operation"""
+    mode = os.environ.get("DYNAMODB_RETURN_CONSUMED_CAPACITY", "TOTAL").upper()
+    if mode == "NONE":
+        return
+    if "ReturnConsumedCapacity" in model.input_shape.members:
+        params.setdefault("ReturnConsumedCapacity", mode)
+
+
+def _record_call(parsed=None, model=None, **kwargs):
+    """after-call hook: counts calls and retries, and records consumed capacity"""
+    _count("calls")
+    retries = (parsed or {}).get("ResponseMetadata", {}).get("RetryAttempts", 0)
+    if retries:
+        _count("retries", retries)
+
+    consumed = (parsed or {}).get("ConsumedCapacity")
+    if not consumed:
+        return
+
+    read_units, write_units = capacity_units(model.name, consumed)
+    _count("read_capacity", read_units)
+    _count("write_capacity", write_units)
+
+    timings = current_timings()
+    if timings is not None:
+        timings.add_capacity(read_units, write_units)
+
+
+def _get_resource():
+    """Create the shared DynamoDB resource on first use"""
+    global _resource
+    with _resource_lock:
+        if _resource is None:
+            resource = boto3.resource("dynamodb", config=_client_config())
+            events = resource.meta.client.meta.events
+            # First: boto3's own handler replaces the params with a copy
+            events.register_first("provide-client-params.dynamodb", _request_capacity)
+            events.register("before-send.dynamodb", _check_budget)
+            events.register("needs-retry.dynamodb", _record_response)
+            events.register("after-call.dynamodb", _record_call)
+            events.register("after-call-error.dynamodb", _record_call)
+            _resource = resource
+        return _resource
+
+
+def get_table(table_env_var, default_table_name):
+    """Get a DynamoDB Table whose name comes from an environment variable"""
+    table_name = os.environ.get(table_env_var, default_table_name)
+    return _get_resource().Table(table_name)
+
+
+def set_deadline(remaining_ms):
+    """Bound DynamoDB retries by the invocation's remaining time
+
+    Returns a token for reset_deadline.
+    """
+    return _deadline.set(time.monotonic() + remaining_ms / 1000)
+
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+
+def is_throttling_error(error):
+    """Whether an exception means DynamoDB is throttling us (after retries)"""
+    if isinstance(error, DeadlineExceededError):
+        return True
+    response = getattr(error, "response", None) or {}
+    return response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def dynamodb_stats():
+    """Call, retry, throttle and consumed capacity counters of this container"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,127 @@
+"""Export Job Data Access Layer - status and progress of asynchronous exports
+
+One item per job, keyed by user_id and export_id. Besides the status the
+item holds the worker's checkpoint (`cursor`) and the files written so
+far, so a worker that runs out of time can hand the job to the next
+invocation without redoing finished pages.
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+try:
+    from dal.dynamodb import get_table
+except ImportError:
+    from .dynamodb import get_table
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def _get_table():
+    """Get the DynamoDB table for export jobs"""
+    return get_table("EXPORTS_TABLE", "test-exports")
+
+
+def job_ttl_days():
+    """How long job items are kept (the files themselves expire via S3 lifecycle)"""
+    return int(os.environ.get("EXPORT_JOB_TTL_DAYS", "7"))
+
+
+def _now():
+    return datetime.utcnow().isoformat(timespec="microseconds")
+
+
+def create_export_job(user_id, export_format):
+    """Create a queued export job and return its item"""
+    table = _get_table()
+    now = _now()
+
+    item = {
+        "user_id": user_id,
+        "export_id": str(uuid.uuid4()),
+        "status": QUEUED,
+        "format": export_format,
+        "files": [],
+        "attempts": 0,
+        "created_at": now,
+        "updated_at": now,
+        "expires_at": int((datetime.utcnow() + timedelta(days=job_ttl_days())).timestamp()),
+    }
+
+    table.put_item(Item=item)
+    return item
+
+
+def get_export_job(user_id, export_id):
+    """Get an export job, or None if the user has no such job"""
+    table = _get_table()
+
+    response = table.get_item(Key={"user_id": user_id, "export_id": export_id})
+    return response.get("Item")
+
+
+def start_export_attempt(user_id, export_id):
+    """Mark a job running and count the attempt; returns the updated item
+
+    Returns None when the job is missing or already finished, so redelivered
+    queue messages are no-ops.
+    """
+    table = _get_table()
+
+    try:
+        response = table.update_item(
+            Key={"user_id": user_id, "export_id": export_id},
+            UpdateExpression="SET #status = :running, updated_at = :now ADD attempts :one",
+            ConditionExpression="#status IN (:queued, :running)",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={
+                ":running": RUNNING,
+                ":queued": QUEUED,
+                ":now": _now(),
+                ":one": 1,
+            },
+            ReturnValues="ALL_NEW",
+        )
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return None
+
+    return response["Attributes"]
+
+
+def save_export_checkpoint(user_id, export_id, cursor, files):
+    """Record the worker's progress after a file has been written"""
+    table = _get_table()
+
+    table.update_item(
+        Key={"user_id": user_id, "export_id": export_id},
+        UpdateExpression="SET #cursor = :cursor, files = :files, updated_at = :now",
+        ExpressionAttributeNames={"#cursor": "cursor"},
+        ExpressionAttributeValues={":cursor": cursor, ":files": files, ":now": _now()},
+    )
+
+
+def finish_export_job(user_id, export_id, status, files=None, error=None):
+    """Mark a job completed (with its final file list) or failed"""
+    table = _get_table()
+
+    update = "SET #status = :status, updated_at = :now"
+    names = {"#status": "status", "#cursor": "cursor"}
+    values = {":status": status, ":now": _now()}
+    if files is not None:
+        update += ", files = :files"
+        values[":files"] = files
+    if error:
+        update += ", #error = :error"
+        names["#error"] = "error"
+        values[":error"] = error
+
+    table.update_item(
+        Key={"user_id": user_id, "export_id": export_id},
+        UpdateExpression=update + " REMOVE #cursor",
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
+    )
@@ -0,0 +1,20 @@
+"""Helpers for building DynamoDB expressions"""
+
+
+def build_projection(fields):
+    """Build a ProjectionExpression for a set of attribute names.
+
+    Every attribute goes through an ExpressionAttributeNames placeholder, so
+    reserved words such as `date` are safe to project.
+
+    Returns:
+        Tuple of (projection expression, expression attribute names)
+    """
+    names = {}
+    placeholders = []
+    for index, field in enumerate(sorted(fields)):
+        placeholder = f"#p{index}"
+        names[placeholder] = field
+        placeholders.append(placeholder)
+
+    return ", ".join(placeholders), names
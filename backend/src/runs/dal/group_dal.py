@@ -0,0 +1,162 @@
+"""Group Data Access Layer - opt-in groups of users sharing leaderboards
+
+One partition per group: a metadata item (member_id "#group") holding the
+name, owner and member count, plus one item per member. Member items also
+carry `user_id`, which makes them - and only them - part of the sparse
+user-groups-index, so a user's groups are one query on the run write path.
+"""
+
+import os
+import uuid
+from datetime import datetime
+
+try:
+    from dal.dynamodb import get_table
+    from dal.unit_of_work import memoized, invalidates
+    from dal.transaction import Transaction, TransactionCancelledError
+except ImportError:
+    from .dynamodb import get_table
+    from .unit_of_work import memoized, invalidates
+    from .transaction import Transaction, TransactionCancelledError
+
+# Sort key of a group's metadata item (user ids never start with "#")
+GROUP_ITEM = "#group"
+
+
+def _get_table():
+    """Get the DynamoDB table for groups and their members"""
+    return get_table("GROUPS_TABLE", "test-groups")
+
+
+def groups_enabled():
+    """Whether groups are deployed (GROUPS_TABLE set) - run writes skip leaderboards otherwise"""
+    return bool(os.environ.get("GROUPS_TABLE"))
+
+
+def _member_item(group, user_id, display_name):
+    return {
+        "group_id": group["group_id"],
+        "member_id": user_id,
+        "user_id": user_id,
+        "group_name": group["name"],
+        "display_name": display_name,
+        "joined_at": datetime.utcnow().isoformat(),
+    }
+
+
+@invalidates("groups")
+def create_group(name, owner_id, owner_display_name):
+    """Create a group with its owner as the first member; returns the group item"""
+    table = _get_table()
+
+    group = {
+        "group_id": str(uuid.uuid4()),
+        "member_id": GROUP_ITEM,
+        "name": name,
+        "owner_id": owner_id,
+        "member_count": 1,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+    transaction = Transaction()
+    transaction.put(table, group)
+    transaction.put(table, _member_item(group, owner_id, owner_display_name))
+    transaction.commit()
+
+    return group
+
+
+@memoized("groups")
+def get_group(group_id):
+    """Get a group's metadata item, or None"""
+    table = _get_table()
+
+    response = table.get_item(Key={"group_id": group_id, "member_id": GROUP_ITEM})
+    return response.get("Item")
+
+
+@memoized("groups")
+def get_member(group_id, user_id):
+    """Get a user's membership item in a group, or None"""
+    table = _get_table()
+
+    response = table.get_item(Key={"group_id": group_id, "member_id": user_id})
+    return response.get("Item")
+
+
+@memoized("groups")
+def get_groups_for_user(user_id):
+    """Membership items of all groups the user belongs to (via the sparse user index)"""
+    table = _get_table()
+
+    items = []
+    query_kwargs = {
+        "IndexName": "user-groups-index",
+        "KeyConditionExpression": "user_id = :user_id",
+        "ExpressionAttributeValues": {":user_id": user_id},
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+@invalidates("groups")
+def add_member(group, user_id, display_name):
+    """Add a user to a group; returns False if they already are a member
+
+    The member put and the member count update commit together, so the
+    count can't drift from the member items.
+    """
+    table = _get_table()
+
+    transaction = Transaction()
+    transaction.put(
+        table,
+        _member_item(group, user_id, display_name),
+        condition="attribute_not_exists(member_id)",
+    )
+    transaction.update(
+        table,
+        {"group_id": group["group_id"], "member_id": GROUP_ITEM},
+        "ADD member_count :one",
+        condition="attribute_exists(group_id)",
+        values={":one": 1},
+    )
+
+    try:
+        transaction.commit()
+    except TransactionCancelledError as e:
+        if e.reasons[0] == "ConditionalCheckFailed":
+            return False
+        raise
+    return True
+
+
+@invalidates("groups")
+def remove_member(group_id, user_id):
+    """Remove a user from a group; returns False if they weren't a member"""
+    table = _get_table()
+
+    transaction = Transaction()
+    transaction.delete(
+        table,
+        {"group_id": group_id, "member_id": user_id},
+        condition="attribute_exists(member_id)",
+    )
+    transaction.update(
+        table,
+        {"group_id": group_id, "member_id": GROUP_ITEM},
+        "ADD member_count :minus_one",
+        values={":minus_one": -1},
+    )
+
+    try:
+        transaction.commit()
+    except TransactionCancelledError as e:
+        if e.reasons[0] == "ConditionalCheckFailed":
+            return False
+        raise
+    return True
@@ -0,0 +1,240 @@
+"""Leaderboard Data Access Layer - precomputed weekly/monthly distance rankings per group
+
+Each board (a group and a period such as "week#2024-W18" or "month#2024-05")
+is one partition with one entry per member who ran in that period. Entries
+are maintained from the run write path, so reading a board never touches
+runs: the board-distance-index sorts a board's entries by distance, and a
+page of the ranking is a single Query however large the group is.
+
+Run creates, updates and deletes adjust entries with atomic ADDs (a couple
+of UpdateItems per group the runner belongs to). Bulk imports, which may
+overwrite runs already counted, and joining a group recompute the
+affected entries from the runs table instead, which is idempotent.
+With AGGREGATES_FROM_STREAM the Runs table stream consumer applies the
+same deltas instead (see stream_processor.py). A recomputed entry is
+stamped with `rebuilt_at`, taken before its runs were read; the consumer
+skips deltas of changes written before then, which the entry already
+counts.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+try:
+    from dal.dynamodb import get_table
+    from dal.group_dal import get_groups_for_user, groups_enabled
+    from dal.run_dal import get_runs_by_user_in_range
+except ImportError:
+    from .dynamodb import get_table
+    from .group_dal import get_groups_for_user, groups_enabled
+    from .run_dal import get_runs_by_user_in_range
+
+PERIODS = ("week", "month")
+
+
+def _get_table():
+    """Get the DynamoDB table for leaderboard entries"""
+    return get_table("LEADERBOARDS_TABLE", "test-leaderboards")
+
+
+def period_key(period, day):
+    """Key of the week (ISO) or month containing a day, e.g. "week#2024-W18" """
+    if period == "week":
+        year, week, _ = day.isocalendar()
+        return f"week#{year}-W{week:02d}"
+    if period == "month":
+        return f"month#{day:%Y-%m}"
+    raise ValueError(f"Invalid period '{period}'. Must be one of: {list(PERIODS)}")
+
+
+def period_range(period, day):
+    """First and last day of the week or month containing a day"""
+    if period == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+
+def board_id(group_id, key):
+    return f"{group_id}#{key}"
+
+
+_ENTRY_UPDATE = (
+    "ADD distance_km :distance, run_count :runs "
+    "SET display_name = :name, group_id = :group_id, period_key = :key"
+)
+
+
+def _entry_values(group_id, key, member, distance_km, runs):
+    return {
+        ":distance": distance_km,
+        ":runs": runs,
+        ":name": member.get("display_name", ""),
+        ":group_id": group_id,
+        ":key": key,
+    }
+
+
+def remove_empty_entry(group_id, key, user_id):
+    """Drop a member from a board once their last run in the period went"""
+    try:
+        _get_table().delete_item(
+            Key={"board": board_id(group_id, key), "user_id": user_id},
+            ConditionExpression="run_count <= :zero",
+            ExpressionAttributeValues={":zero": 0},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+def _adjust_entry(group_id, key, member, distance_km, runs):
+    """Atomically add a distance and run count to a member's entry"""
+    table = _get_table()
+
+    response = table.update_item(
+        Key={"board": board_id(group_id, key), "user_id": member["user_id"]},
+        UpdateExpression=_ENTRY_UPDATE,
+        ExpressionAttributeValues=_entry_values(group_id, key, member, distance_km, runs),
+        ReturnValues="UPDATED_NEW",
+    )
+
+    if response["Attributes"]["run_count"] <= 0:
+        remove_empty_entry(group_id, key, member["user_id"])
+
+
+def add_entry_update(transaction, group_id, key, member, distance_km, runs, changed_at=None):
+    """Add a member's entry delta to a transaction (see stream_processor.py)
+
+    With `changed_at` (the change's updated_at) the update is conditioned on
+    the entry not having been rebuilt since, so it fails with
+    ConditionalCheckFailed for an entry that already counts the change.
+    """
+    values = _entry_values(group_id, key, member, distance_km, runs)
+    condition = None
+    if changed_at is not None:
+        condition = "attribute_not_exists(rebuilt_at) OR rebuilt_at < :changed_at"
+        values[":changed_at"] = changed_at
+
+    transaction.update(
+        _get_table(),
+        {"board": board_id(group_id, key), "user_id": member["user_id"]},
+        _ENTRY_UPDATE,
+        condition=condition,
+        values=values,
+    )
+
+
+def _apply_run(run, sign):
+    if not groups_enabled():
+        return
+
+    memberships = get_groups_for_user(run.user_id)
+    for member in memberships:
+        for period in PERIODS:
+            _adjust_entry(
+                member["group_id"],
+                period_key(period, run.date),
+                member,
+                sign * Decimal(str(run.distance_km)),
+                sign,
+            )
+
+
+def add_run_to_leaderboards(run):
+    """Count a new run on the current boards of every group its runner is in"""
+    _apply_run(run, 1)
+
+
+def update_leaderboards_for_run_update(old_run, new_run):
+    """Move a run's contribution after it was edited (date or distance changed)"""
+    if old_run.date == new_run.date and old_run.distance_km == new_run.distance_km:
+        return
+    _apply_run(old_run, -1)
+    _apply_run(new_run, 1)
+
+
+def update_leaderboards_for_run_delete(run):
+    """Remove a deleted run's contribution"""
+    _apply_run(run, -1)
+
+
+def refresh_leaderboard_entries(user_id, days, memberships=None):
+    """Recompute a user's entries for the periods containing the given days
+
+    Totals are read back from the runs table and written with puts, so
+    this can be repeated safely (e.g. re-importing the same files). The
+    read is consistent and goes to the base table, whatever the range-read
+    settings: the date indexes can still miss runs written just before,
+    and a total written from them would stay short.
+    """
+    if not groups_enabled():
+        return
+
+    if memberships is None:
+        memberships = get_groups_for_user(user_id)
+    if not memberships:
+        return
+
+    table = _get_table()
+
+    periods = {(period, period_key(period, day)): day for period in PERIODS for day in days}
+    for (period, key), day in periods.items():
+        start, end = period_range(period, day)
+        # Same format as run updated_at, so the stream consumer can compare
+        rebuilt_at = datetime.utcnow().isoformat(timespec="microseconds")
+        runs = get_runs_by_user_in_range(user_id, start, end, consistent=True)
+        distance_km = sum((Decimal(str(run.distance_km)) for run in runs), Decimal("0"))
+
+        for member in memberships:
+            entry_key = {"board": board_id(member["group_id"], key), "user_id": user_id}
+            if not runs:
+                table.delete_item(Key=entry_key)
+                continue
+            table.put_item(
+                Item={
+                    **entry_key,
+                    "distance_km": distance_km,
+                    "run_count": len(runs),
+                    "display_name": member.get("display_name", ""),
+                    "group_id": member["group_id"],
+                    "period_key": key,
+                    "rebuilt_at": rebuilt_at,
+                }
+            )
+
+
+def delete_leaderboard_entries(group_id, user_id, day=None):
+    """Remove a user's entries from a group's current boards (after leaving it)
+
+    Boards of past periods keep the entries as they were.
+    """
+    table = _get_table()
+    day = day or date.today()
+
+    for period in PERIODS:
+        table.delete_item(
+            Key={"board": board_id(group_id, period_key(period, day)), "user_id": user_id}
+        )
+
+
+def get_leaderboard_page(group_id, key, limit=50, start_key=None):
+    """One page of a board, longest distance first: (entries, next_key)"""
+    table = _get_table()
+
+    query_kwargs = {
+        "IndexName": "board-distance-index",
+        "KeyConditionExpression": "board = :board",
+        "ExpressionAttributeValues": {":board": board_id(group_id, key)},
+        "ScanIndexForward": False,
+        "Limit": limit,
+    }
+    if start_key:
+        query_kwargs["ExclusiveStartKey"] = start_key
+
+    response = table.query(**query_kwargs)
+    return response.get("Items", []), response.get("LastEvaluatedKey")
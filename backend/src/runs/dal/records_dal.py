@@ -0,0 +1,115 @@
+"""Records Data Access Layer - maintains each user's personal bests by distance bucket"""
+
+from botocore.exceptions import ClientError
+
+try:
+    from dal.run_dal import get_fastest_run_in_bucket
+    from dal.dynamodb import get_table
+    from dal.unit_of_work import memoized, invalidates
+except ImportError:
+    from .run_dal import get_fastest_run_in_bucket
+    from .dynamodb import get_table
+    from .unit_of_work import memoized, invalidates
+
+
+def _get_table():
+    """Get the DynamoDB table for personal records"""
+    return get_table("RECORDS_TABLE", "test-records")
+
+
+def _record_item(run):
+    """Build the record item for a run holding a personal best"""
+    return {
+        "user_id": run.user_id,
+        "bucket": run.distance_bucket,
+        "run_id": run.run_id,
+        "date": run.date.isoformat(),
+        "distance_km": run.distance_km,
+        "duration_seconds": run.duration_seconds,
+        "pace_seconds": run.pace_per_km_seconds,
+    }
+
+
+@memoized("records")
+def get_records_by_user(user_id):
+    """Get all personal records for a user (one item per distance bucket)"""
+    table = _get_table()
+
+    response = table.query(
+        KeyConditionExpression="user_id = :user_id",
+        ExpressionAttributeValues={":user_id": user_id},
+    )
+
+    return response.get("Items", [])
+
+
+@invalidates("records")
+def record_run(run):
+    """Store the run as the bucket record if it beats the current one.
+
+    Uses a conditional put so the common case (no new record) costs a
+    single write and no read.
+    """
+    if run.distance_bucket is None:
+        return
+
+    table = _get_table()
+
+    try:
+        table.put_item(
+            Item=_record_item(run),
+            ConditionExpression="attribute_not_exists(pace_seconds) OR pace_seconds > :pace",
+            ExpressionAttributeValues={":pace": run.pace_per_km_seconds},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+@invalidates("records")
+def refresh_record(user_id, bucket, changed_run_id, new_run=None):
+    """Recompute a bucket record after its holder was updated (new_run) or deleted
+
+    The pace index may not reflect the change yet, so the changed run is left
+    out of the index lookup and its new values are compared directly.
+    """
+    table = _get_table()
+
+    best_run = get_fastest_run_in_bucket(user_id, bucket, exclude_run_id=changed_run_id)
+    if new_run is not None and new_run.distance_bucket == bucket:
+        if best_run is None or new_run.pace_per_km_seconds < best_run.pace_per_km_seconds:
+            best_run = new_run
+
+    if best_run:
+        table.put_item(Item=_record_item(best_run))
+    else:
+        table.delete_item(Key={"user_id": user_id, "bucket": bucket})
+
+
+def _holds_record(run, bucket):
+    """Check whether a run currently holds the record for a bucket"""
+    table = _get_table()
+
+    response = table.get_item(Key={"user_id": run.user_id, "bucket": bucket})
+    item = response.get("Item")
+
+    return item is not None and item["run_id"] == run.run_id
+
+
+def update_records_for_run_update(old_run, new_run):
+    """Keep records in sync after a run has been updated in the runs table"""
+    old_bucket = old_run.distance_bucket
+
+    if old_bucket and _holds_record(old_run, old_bucket):
+        # The record holder changed - its new pace may no longer be the best
+        refresh_record(old_run.user_id, old_bucket, old_run.run_id, new_run)
+
+    record_run(new_run)
+
+
+def update_records_for_run_delete(run):
+    """Keep records in sync after a run has been deleted from the runs table"""
+    bucket = run.distance_bucket
+
+    if bucket and _holds_record(run, bucket):
+        refresh_record(run.user_id, bucket, run.run_id)
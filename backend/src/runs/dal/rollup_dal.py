@@ -0,0 +1,98 @@
+"""Rollup Data Access Layer - per-user weekly, monthly and yearly run totals
+
+One item per user and period ("week#2024-W18", "month#2024-05", "year#2024")
+holding distance, duration and run count. Rollups are maintained by the
+Runs table stream consumer (see stream_processor.py): each change adds its
+delta in the same transaction as an event marker item, so a redelivered
+stream record is applied exactly once. Markers share the user's partition
+(period_key "event#...") and expire via TTL.
+"""
+
+from datetime import datetime, timedelta
+
+from botocore.exceptions import ClientError
+
+try:
+    from dal.dynamodb import get_table
+    from dal.unit_of_work import memoized
+except ImportError:
+    from .dynamodb import get_table
+    from .unit_of_work import memoized
+
+PERIODS = ("week", "month", "year")
+
+# Stream records are retained for 24 hours; markers outlive any redelivery
+MARKER_TTL_DAYS = 2
+
+
+def _get_table():
+    """Get the DynamoDB table for rollups and stream event markers"""
+    return get_table("ROLLUPS_TABLE", "test-rollups")
+
+
+def period_key(period, day):
+    """Key of the week (ISO), month or year containing a day"""
+    if period == "week":
+        year, week, _ = day.isocalendar()
+        return f"week#{year}-W{week:02d}"
+    if period == "month":
+        return f"month#{day:%Y-%m}"
+    if period == "year":
+        return f"year#{day:%Y}"
+    raise ValueError(f"Invalid period '{period}'. Must be one of: {list(PERIODS)}")
+
+
+def add_rollup_update(transaction, user_id, key, distance_km, duration_seconds, runs):
+    """Add a rollup delta to a transaction"""
+    transaction.update(
+        _get_table(),
+        {"user_id": user_id, "period_key": key},
+        "ADD distance_km :distance, duration_seconds :seconds, run_count :runs",
+        values={":distance": distance_km, ":seconds": duration_seconds, ":runs": runs},
+    )
+
+
+def add_event_marker(transaction, user_id, marker_id):
+    """Make a transaction fail (ConditionalCheckFailed) if it was applied before"""
+    expires_at = datetime.utcnow() + timedelta(days=MARKER_TTL_DAYS)
+
+    transaction.put(
+        _get_table(),
+        {
+            "user_id": user_id,
+            "period_key": f"event#{marker_id}",
+            "expires_at": int(expires_at.timestamp()),
+        },
+        condition="attribute_not_exists(period_key)",
+    )
+
+
+def remove_empty_rollup(user_id, key):
+    """Delete a rollup whose last run went (no-op while it still counts runs)"""
+    try:
+        _get_table().delete_item(
+            Key={"user_id": user_id, "period_key": key},
+            ConditionExpression="run_count <= :zero",
+            ExpressionAttributeValues={":zero": 0},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+@memoized("rollups")
+def get_rollups(user_id, period, limit=12):
+    """The user's most recent rollups of a period type, newest first"""
+    if period not in PERIODS:
+        raise ValueError(f"Invalid period '{period}'. Must be one of: {list(PERIODS)}")
+
+    table = _get_table()
+
+    response = table.query(
+        KeyConditionExpression="user_id = :user_id AND begins_with(period_key, :prefix)",
+        ExpressionAttributeValues={":user_id": user_id, ":prefix": f"{period}#"},
+        ScanIndexForward=False,
+        Limit=limit,
+    )
+
+    return response.get("Items", [])
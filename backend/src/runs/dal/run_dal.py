@@ -1,27 +1,89 @@
-"""Run Data Access Layer - handles saving/loading runs from DynamoDB"""
+"""Run Data Access Layer - handles saving/loading runs from DynamoDB
 
-import boto3
+Date-range reads are range queries on an index sorted by date, so they read
+only the runs in the range rather than the user's whole partition:
+
+- `run_date` is the sort key of the user-date-index (partition user_id).
+- `user_year` ("<user_id>#<YYYY>") is the partition key of the
+  user-year-index (sorted by date). With RUNS_YEAR_BUCKETS=true range reads
+  query only the year buckets the range needs, in parallel - a heavy user's
+  history is spread over one index partition per year.
+
+Tombstones carry neither attribute, so both indexes hold only live runs.
+Items written before the attributes existed are backfilled by
+tools/migrate_year_buckets.py, which has to run right after deploying.
+"""
+
+import contextvars
 import os
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 
 try:
     from models.run import Run
+    from dal.expressions import build_projection
+    from dal.dynamodb import get_table
+    from dal.unit_of_work import memoized, invalidates
+    from dal.transaction import Transaction
+    from dal.version_dal import add_version_bump, get_version_states
 except ImportError:
     from ..models.run import Run
+    from .expressions import build_projection
+    from .dynamodb import get_table
+    from .unit_of_work import memoized, invalidates
+    from .transaction import Transaction
+    from .version_dal import add_version_bump, get_version_states
 
 
 def _get_table():
     """Get the DynamoDB table for runs"""
-    dynamodb = boto3.resource("dynamodb")
-    table_name = os.environ.get("RUNS_TABLE", "test-runs")
-    return dynamodb.Table(table_name)
+    return get_table("RUNS_TABLE", "test-runs")
 
 
-def save_run(run):
-    """Save a run to DynamoDB"""
-    table = _get_table()
+def tombstone_ttl_days():
+    """How long tombstones of deleted runs are kept for delta sync"""
+    return int(os.environ.get("RUN_TOMBSTONE_TTL_DAYS", "30"))
+
+
+def year_buckets_enabled():
+    """Whether date-range reads use the user-year-index (see module docstring)"""
+    return os.environ.get("RUNS_YEAR_BUCKETS", "false").lower() == "true"
+
+
+def index_lag_seconds():
+    """How long a runs write may take to reach the indexes (see index_settled)"""
+    return float(os.environ.get("RUNS_INDEX_LAG_SECONDS", "10"))
+
+
+def index_settled(written_at, now=None):
+    """Whether a runs write made at `written_at` (ISO) has surely reached the indexes
+
+    Index updates are asynchronous and normally land well within a second;
+    RUNS_INDEX_LAG_SECONDS after a user's last write, a range read through
+    the indexes sees every run.
+    """
+    if written_at is None:
+        return True
+    now = now or datetime.utcnow()
+    return (now - datetime.fromisoformat(written_at)).total_seconds() >= index_lag_seconds()
+
+
+def year_bucket(user_id, year):
+    """Partition key of a user's runs of one year in the user-year-index"""
+    return f"{user_id}#{year:04d}"
+
 
+def _pace_key(run):
+    """Sort key for the personal-best index: '<bucket>#<pace seconds>'"""
+    bucket = run.distance_bucket
+    if bucket is None:
+        return None
+    return f"{bucket}#{run.pace_per_km_seconds:06d}"
+
+
+def _run_to_item(run):
+    """Convert a Run model to a DynamoDB item"""
     item = {
         "user_id": run.user_id,
         "run_id": run.run_id,
@@ -30,22 +92,29 @@ def save_run(run):
         "duration_seconds": run.duration_seconds,
         "notes": run.notes,
         "created_at": run.created_at.isoformat(),
+        "updated_at": datetime.utcnow().isoformat(timespec="microseconds"),
+        # Sort key of the user-date-index; tombstones have none, so the
+        # index holds only live runs
+        "run_date": run.date.isoformat(),
+        "user_year": year_bucket(run.user_id, run.date.year),
     }
 
-    table.put_item(Item=item)
+    # Only runs in a distance bucket get a pace key, keeping the
+    # personal-best index (user-pace-index) sparse
+    pace_key = _pace_key(run)
+    if pace_key:
+        item["pace_key"] = pace_key
 
+    # Only the reference - the points themselves live in the track store
+    if run.track_key:
+        item["track_key"] = run.track_key
+        item["track_points"] = run.track_points
 
-def get_run_by_id(user_id, run_id):
-    """Get a specific run by user_id and run_id"""
-    table = _get_table()
+    return item
 
-    response = table.get_item(Key={"user_id": user_id, "run_id": run_id})
 
-    item = response.get("Item")
-    if not item:
-        return None
-
-    # Convert DynamoDB item back to Run model
+def _item_to_run(item):
+    """Convert a DynamoDB item back to a Run model"""
     # We need to reconstruct the duration string from seconds
     duration_seconds = int(item["duration_seconds"])
     hours = duration_seconds // 3600
@@ -64,76 +133,382 @@ def get_run_by_id(user_id, run_id):
     # Override auto-generated values with stored ones
     run.run_id = item["run_id"]
     run.created_at = datetime.fromisoformat(item["created_at"])
+    if "track_key" in item:
+        run.track_key = item["track_key"]
+        run.track_points = int(item.get("track_points", 0))
 
     return run
 
 
-def get_runs_by_user(user_id):
-    """Get all runs for a specific user"""
+def run_from_item(item):
+    """Run model of a stored item, or None for a missing item or a delete tombstone"""
+    if not item or "deleted_at" in item:
+        return None
+    return _item_to_run(item)
+
+
+@invalidates("runs")
+@invalidates("versions")
+def save_run(run):
+    """Save a run to DynamoDB
+
+    The put and the runs version bump are one transaction, so the ETag
+    always moves with the data.
+    """
     table = _get_table()
 
-    response = table.query(
-        KeyConditionExpression="user_id = :user_id",
-        ExpressionAttributeValues={":user_id": user_id},
-    )
+    transaction = Transaction()
+    transaction.put(table, _run_to_item(run))
+    add_version_bump(transaction, run.user_id, "runs")
+    transaction.commit()
 
-    runs = []
-    for item in response.get("Items", []):
-        # Convert each item back to Run model
-        duration_seconds = int(item["duration_seconds"])
-        hours = duration_seconds // 3600
-        minutes = (duration_seconds % 3600) // 60
-        seconds = duration_seconds % 60
-        duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
-        run = Run(
-            user_id=item["user_id"],
-            date=date.fromisoformat(item["date"]),
-            distance_km=item["distance_km"],
-            duration=duration_str,
-            notes=item.get("notes", ""),
-        )
+@invalidates("runs")
+def save_runs(runs):
+    """Save many runs with BatchWriteItem, 25 items per request
 
-        run.run_id = item["run_id"]
-        run.created_at = datetime.fromisoformat(item["created_at"])
-        runs.append(run)
+    The batch writer resends unprocessed items (e.g. when throttled) until
+    every run is written. Writes are not atomic as a group.
+    """
+    table = _get_table()
 
-    return runs
+    with table.batch_writer(overwrite_by_pkeys=["user_id", "run_id"]) as batch:
+        for run in runs:
+            batch.put_item(Item=_run_to_item(run))
 
 
-def update_run_by_id(run_id, user_id, updated_run):
-    """Update a specific run in DynamoDB"""
+@memoized("runs")
+def get_run_by_id(user_id, run_id):
+    """Get a specific run by user_id and run_id"""
     table = _get_table()
 
-    # Delete the old run first
-    table.delete_item(
-        Key={
-            "user_id": user_id,
-            "run_id": run_id,
-        }
-    )
+    response = table.get_item(Key={"user_id": user_id, "run_id": run_id})
 
-    # Save the updated run (same as save_run but with existing run_id)
-    item = {
-        "user_id": updated_run.user_id,
-        "run_id": updated_run.run_id,
-        "date": updated_run.date.isoformat(),
-        "distance_km": updated_run.distance_km,
-        "duration_seconds": updated_run.duration_seconds,
-        "notes": updated_run.notes,
-        "created_at": updated_run.created_at.isoformat(),
+    item = response.get("Item")
+    if not item or "deleted_at" in item:
+        return None
+
+    return _item_to_run(item)
+
+
+@memoized("runs")
+def get_runs_by_user(user_id, fields=None, consistent=False):
+    """Get all runs for a specific user
+
+    Args:
+        user_id: Owner of the runs
+        fields: Optional set of stored attribute names. When given, only those
+            attributes are read (ProjectionExpression) and raw item dicts are
+            returned instead of Run models.
+        consistent: Read with ConsistentRead, for results labelled with the
+            runs version (an ETag or a shared cache key)
+    """
+    table = _get_table()
+
+    # Skip tombstones left behind by deletes
+    query_kwargs = {
+        "KeyConditionExpression": "user_id = :user_id",
+        "FilterExpression": "attribute_not_exists(deleted_at)",
+        "ExpressionAttributeValues": {":user_id": user_id},
     }
+    if consistent:
+        query_kwargs["ConsistentRead"] = True
+
+    if fields:
+        projection, names = build_projection(fields)
+        query_kwargs["ProjectionExpression"] = projection
+        query_kwargs["ExpressionAttributeNames"] = names
+
+    response = table.query(**query_kwargs)
+    items = response.get("Items", [])
 
-    table.put_item(Item=item)
+    if fields:
+        return items
+
+    return [_item_to_run(item) for item in items]
+
+
+def get_runs_page(user_id, page_size=500, start_key=None):
+    """Read one page of a user's runs
+
+    Returns (runs, next_key); pass next_key back as start_key for the next
+    page. next_key is None after the last page. Keys are plain dicts of
+    strings, so callers can checkpoint them (see export_jobs).
+    """
+    table = _get_table()
+
+    query_kwargs = {
+        "KeyConditionExpression": "user_id = :user_id",
+        "FilterExpression": "attribute_not_exists(deleted_at)",
+        "ExpressionAttributeValues": {":user_id": user_id},
+        "Limit": page_size,
+    }
+    if start_key:
+        query_kwargs["ExclusiveStartKey"] = start_key
 
+    response = table.query(**query_kwargs)
+    runs = [_item_to_run(item) for item in response.get("Items", [])]
+    return runs, response.get("LastEvaluatedKey")
 
+
+def iter_runs_by_user(user_id, page_size=500):
+    """Yield all of a user's runs, reading one page of `page_size` items at a time
+
+    Unlike get_runs_by_user this never holds more than one page in memory,
+    so it suits exports of arbitrarily long histories. Runs come in key
+    (run_id) order. Not memoized - every call reads from DynamoDB.
+    """
+    start_key = None
+    while True:
+        runs, start_key = get_runs_page(user_id, page_size, start_key)
+        yield from runs
+
+        if start_key is None:
+            break
+
+
+def _query_year_bucket(user_id, year, start_date, end_date):
+    """Items of one year bucket dated in the range (tombstones aren't in the index)"""
+    table = _get_table()
+
+    items = []
+    query_kwargs = {
+        "IndexName": "user-year-index",
+        "KeyConditionExpression": "user_year = :bucket AND #date BETWEEN :start AND :end",
+        "ExpressionAttributeNames": {"#date": "date"},
+        "ExpressionAttributeValues": {
+            ":bucket": year_bucket(user_id, year),
+            ":start": start_date.isoformat(),
+            ":end": end_date.isoformat(),
+        },
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _get_runs_in_range_by_year(user_id, start_date, end_date):
+    """Fan out over the year buckets of a range, one query per year in parallel"""
+    years = range(start_date.year, end_date.year + 1)
+    bounds = [
+        (max(start_date, date(year, 1, 1)), min(end_date, date(year, 12, 31)))
+        for year in years
+    ]
+
+    if not bounds:
+        return []
+    if len(bounds) == 1:
+        buckets = [_query_year_bucket(user_id, years[0], *bounds[0])]
+    else:
+        max_workers = int(os.environ.get("RUNS_YEAR_BUCKET_WORKERS", "8"))
+        with ThreadPoolExecutor(max_workers=min(len(bounds), max_workers)) as executor:
+            # Each query runs in a copy of this context, keeping the request's
+            # deadline and capacity accounting (see dynamodb.py)
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    _query_year_bucket,
+                    user_id,
+                    year,
+                    start,
+                    end,
+                )
+                for year, (start, end) in zip(years, bounds)
+            ]
+            buckets = [future.result() for future in futures]
+
+    return [_item_to_run(item) for items in buckets for item in items]
+
+
+def _query_range_consistent(user_id, start_date, end_date):
+    """Items dated in the range, read from the base table with ConsistentRead
+
+    Indexes can't be read consistently, so this reads the user's whole
+    partition and filters on date - tombstones have no date and drop out
+    too. Only used right after a write (see get_runs_by_user_in_range).
+    """
+    table = _get_table()
+
+    items = []
+    query_kwargs = {
+        "KeyConditionExpression": "user_id = :user_id",
+        "FilterExpression": "#date BETWEEN :start AND :end",
+        "ExpressionAttributeNames": {"#date": "date"},
+        "ExpressionAttributeValues": {
+            ":user_id": user_id,
+            ":start": start_date.isoformat(),
+            ":end": end_date.isoformat(),
+        },
+        "ConsistentRead": True,
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+@memoized("runs")
+def get_runs_by_user_in_range(user_id, start_date, end_date, consistent=False):
+    """Get a user's runs dated between start_date and end_date (inclusive)
+
+    A range query on the user-date-index (or the year buckets) reads only
+    the runs in the range, not the user's whole history. The indexes are
+    eventually consistent; `consistent=True` guarantees every committed run
+    is included, for results written back as totals. It still reads the
+    indexes once the user's last runs write has settled (index_settled),
+    and only within seconds of a write reads the base table instead.
+    """
+    if consistent:
+        _, written_at = get_version_states(user_id, ["runs"])["runs"]
+        if not index_settled(written_at):
+            items = _query_range_consistent(user_id, start_date, end_date)
+            return [_item_to_run(item) for item in items]
+
+    if year_buckets_enabled():
+        return _get_runs_in_range_by_year(user_id, start_date, end_date)
+
+    table = _get_table()
+
+    items = []
+    query_kwargs = {
+        "IndexName": "user-date-index",
+        "KeyConditionExpression": "user_id = :user_id AND run_date BETWEEN :start AND :end",
+        "ExpressionAttributeValues": {
+            ":user_id": user_id,
+            ":start": start_date.isoformat(),
+            ":end": end_date.isoformat(),
+        },
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    return [_item_to_run(item) for item in items]
+
+
+@memoized("runs")
+def get_fastest_run_in_bucket(user_id, bucket, exclude_run_id=None):
+    """Get the user's fastest run in a distance bucket via the pace index
+
+    The index is eventually consistent, so right after a change it can still
+    list a deleted run or a run's old pace. Each candidate is confirmed with
+    a consistent read of its base item. exclude_run_id skips the run whose
+    change prompted the lookup; the caller knows its new values.
+    """
+    table = _get_table()
+
+    query_kwargs = {
+        "IndexName": "user-pace-index",
+        "KeyConditionExpression": "user_id = :user_id AND begins_with(pace_key, :prefix)",
+        "ExpressionAttributeValues": {":user_id": user_id, ":prefix": f"{bucket}#"},
+        "Limit": 10,
+    }
+    while True:
+        response = table.query(**query_kwargs)
+        for candidate in response.get("Items", []):
+            if candidate["run_id"] == exclude_run_id:
+                continue
+            item = table.get_item(
+                Key={"user_id": user_id, "run_id": candidate["run_id"]},
+                ConsistentRead=True,
+            ).get("Item")
+            # Stale index entry: the run was deleted or its pace changed
+            if run_from_item(item) and item.get("pace_key") == candidate["pace_key"]:
+                return _item_to_run(item)
+        if "LastEvaluatedKey" not in response:
+            return None
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+@invalidates("runs")
+@invalidates("versions")
+def update_run_by_id(run_id, user_id, updated_run):
+    """Update a specific run in DynamoDB
+
+    The put replaces the whole item, and is written in one transaction with
+    the runs version bump so the ETag always moves with the data.
+    """
+    table = _get_table()
+
+    transaction = Transaction()
+
+    # Normally the run keeps its id and the put replaces the old item
+    if updated_run.run_id != run_id or updated_run.user_id != user_id:
+        transaction.delete(table, {"user_id": user_id, "run_id": run_id})
+
+    # Save the updated run (same as save_run but with existing run_id)
+    transaction.put(table, _run_to_item(updated_run))
+    add_version_bump(transaction, user_id, "runs")
+    transaction.commit()
+
+
+@invalidates("runs")
+@invalidates("versions")
 def delete_run_by_id(run_id, user_id):
-    """Delete a specific run from DynamoDB"""
+    """Delete a specific run by replacing it with a tombstone.
+
+    The tombstone lets delta sync report the delete; DynamoDB TTL removes it
+    once expires_at has passed. It is written in one transaction with the
+    runs version bump.
+    """
     table = _get_table()
 
-    table.delete_item(
-        Key={
+    now = datetime.utcnow()
+    expires_at = now + timedelta(days=tombstone_ttl_days())
+
+    transaction = Transaction()
+    transaction.put(
+        table,
+        {
             "user_id": user_id,
             "run_id": run_id,
-        }
+            "deleted_at": now.isoformat(timespec="microseconds"),
+            "updated_at": now.isoformat(timespec="microseconds"),
+            "expires_at": int(expires_at.timestamp()),
+        },
     )
+    add_version_bump(transaction, user_id, "runs")
+    transaction.commit()
+
+
+def get_run_changes_since(user_id, since):
+    """Get runs created, updated or deleted after the `since` ISO timestamp.
+
+    Returns a tuple of (changed runs, deleted run ids, latest updated_at seen).
+    Reads the user-updated-index so only changed items are touched.
+    """
+    table = _get_table()
+
+    query_kwargs = {
+        "IndexName": "user-updated-index",
+        "KeyConditionExpression": "user_id = :user_id AND updated_at > :since",
+        "ExpressionAttributeValues": {":user_id": user_id, ":since": since},
+    }
+
+    runs = []
+    deleted_run_ids = []
+    latest = since
+
+    while True:
+        response = table.query(**query_kwargs)
+
+        for item in response.get("Items", []):
+            if "deleted_at" in item:
+                deleted_run_ids.append(item["run_id"])
+            else:
+                runs.append(_item_to_run(item))
+            latest = max(latest, item["updated_at"])
+
+        if "LastEvaluatedKey" not in response:
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    return runs, deleted_run_ids, latest
@@ -1,23 +1,83 @@
 """Target Data Access Layer - handles saving/loading targets from DynamoDB"""
 
-import boto3
+import json
 import os
 from decimal import Decimal
 from datetime import datetime
 
 try:
     from models.target import Target
+    from dal.expressions import build_projection
+    from dal.dynamodb import get_table
+    from dal.cache import LocalCache
+    from dal.unit_of_work import memoized, invalidates
+    from dal.transaction import Transaction
+    from dal.version_dal import add_version_bump
 except ImportError:
     from ..models.target import Target
+    from .expressions import build_projection
+    from .dynamodb import get_table
+    from .cache import LocalCache
+    from .unit_of_work import memoized, invalidates
+    from .transaction import Transaction
+    from .version_dal import add_version_bump
+
+# Targets change rarely, so each container keeps a user's target items for
+# a short TTL. Writes through this module invalidate immediately; the TTL
+# bounds staleness for writes made by other containers.
+_targets_cache = LocalCache(
+    max_entries=int(os.environ.get("TARGETS_CACHE_MAX_ENTRIES", "1000")),
+    max_bytes=int(os.environ.get("TARGETS_CACHE_MAX_BYTES", str(4 * 1024 * 1024))),
+    ttl_seconds=float(os.environ.get("TARGETS_CACHE_TTL_SECONDS", "30")),
+)
 
 
 def _get_table():
     """Get the DynamoDB table for targets"""
-    dynamodb = boto3.resource("dynamodb")
-    table_name = os.environ.get("TARGETS_TABLE", "test-targets")
-    return dynamodb.Table(table_name)
+    return get_table("TARGETS_TABLE", "test-targets")
 
 
+def targets_cache_stats():
+    """Hit-rate metrics of this container's targets cache"""
+    return _targets_cache.stats()
+
+
+def _item_to_target(item):
+    """Convert a DynamoDB item back to a Target model"""
+    target = Target(
+        user_id=item["user_id"],
+        target_type=item["target_type"],
+        period=item["period"],
+        distance_km=item["distance_km"],
+    )
+
+    # Override auto-generated values with stored ones
+    target.target_id = item["target_id"]
+    target.created_at = datetime.fromisoformat(item["created_at"])
+    return target
+
+
+def _query_targets(user_id, fields=None, consistent=False):
+    """Query a user's target items, optionally projected to `fields`"""
+    table = _get_table()
+
+    query_kwargs = {
+        "KeyConditionExpression": "user_id = :user_id",
+        "ExpressionAttributeValues": {":user_id": user_id},
+    }
+    if consistent:
+        query_kwargs["ConsistentRead"] = True
+
+    if fields:
+        projection, names = build_projection(fields)
+        query_kwargs["ProjectionExpression"] = projection
+        query_kwargs["ExpressionAttributeNames"] = names
+
+    response = table.query(**query_kwargs)
+    return response.get("Items", [])
+
+
+@invalidates("targets")
 def save_target(target):
     """Save a target to DynamoDB"""
     table = _get_table()
@@ -32,40 +92,87 @@ def save_target(target):
     }
 
     table.put_item(Item=item)
+    _targets_cache.invalidate(target.user_id)
 
 
-def get_targets_by_user(user_id):
-    """Get all targets for a specific user"""
-    table = _get_table()
+@memoized("targets")
+def get_targets_by_user(user_id, fields=None, consistent=False):
+    """Get all targets for a specific user
 
-    response = table.query(
-        KeyConditionExpression="user_id = :user_id",
-        ExpressionAttributeValues={":user_id": user_id},
-    )
+    Args:
+        user_id: Owner of the targets
+        fields: Optional set of stored attribute names. When given, only those
+            attributes are read (ProjectionExpression) and raw item dicts are
+            returned instead of Target models.
+        consistent: Skip the cache and read with ConsistentRead. Reads whose
+            result is labelled with the targets version (an ETag or a shared
+            cache key) need this: the cache can trail that version by a TTL.
 
-    targets = []
-    for item in response.get("Items", []):
-        target = Target(
-            user_id=item["user_id"],
-            target_type=item["target_type"],
-            period=item["period"],
-            distance_km=item["distance_km"],
-        )
+    Full reads go through the per-container cache; projected reads are
+    served from it when the user's items are already cached.
+    """
+    if consistent:
+        items = _query_targets(user_id, fields, consistent=True)
+        if fields:
+            return items
+        return [_item_to_target(item) for item in items]
+
+    items = _targets_cache.get(user_id)
+
+    if items is None:
+        if fields:
+            # Don't fill the cache from a partial read
+            return _query_targets(user_id, fields)
+
+        generation = _targets_cache.generation(user_id)
+        items = _query_targets(user_id)
+        size = len(json.dumps(items, default=str))
+        _targets_cache.set(user_id, items, size, generation=generation)
+
+    if fields:
+        return [{k: item[k] for k in fields if k in item} for item in items]
+
+    # Fresh models on every call, so callers can't mutate cached state
+    return [_item_to_target(item) for item in items]
 
-        # Override auto-generated values with stored ones
-        target.target_id = item["target_id"]
-        target.created_at = datetime.fromisoformat(item["created_at"])
-        targets.append(target)
 
-    return targets
+def get_targets_page(user_id, page_size=500, start_key=None):
+    """Read one page of a user's targets straight from DynamoDB
 
+    Returns (targets, next_key) like run_dal.get_runs_page. Bypasses the
+    cache, which only holds complete target lists.
+    """
+    table = _get_table()
+
+    query_kwargs = {
+        "KeyConditionExpression": "user_id = :user_id",
+        "ExpressionAttributeValues": {":user_id": user_id},
+        "Limit": page_size,
+    }
+    if start_key:
+        query_kwargs["ExclusiveStartKey"] = start_key
+
+    response = table.query(**query_kwargs)
+    targets = [_item_to_target(item) for item in response.get("Items", [])]
+    return targets, response.get("LastEvaluatedKey")
 
+
+@invalidates("targets")
+@invalidates("versions")
 def upsert_target(target):
-    """Save or update a target - overwrites existing target for same user/type/period"""
+    """Save or update a target - overwrites existing target for same user/type/period
+
+    The replacement and the targets version bump are written in one
+    transaction, so readers never see both targets, or neither, and the
+    ETag always moves with the data.
+    """
     table = _get_table()
+    transaction = Transaction()
 
-    # First, check if a target already exists for this user/type/period
-    existing_targets = get_targets_by_user(target.user_id)
+    # First, check if a target already exists for this user/type/period.
+    # Read uncached: a stale list would miss a target another container
+    # just wrote and leave two for the same type/period.
+    existing_targets = get_targets_by_user(target.user_id, consistent=True)
     existing_target = None
 
     for existing in existing_targets:
@@ -76,13 +183,14 @@ def upsert_target(target):
             existing_target = existing
             break
 
-    if existing_target:
-        # Delete the existing target first
-        table.delete_item(
-            Key={
+    # An update keeps its target_id, in which case the put replaces it
+    if existing_target and existing_target.target_id != target.target_id:
+        transaction.delete(
+            table,
+            {
                 "user_id": existing_target.user_id,
                 "target_id": existing_target.target_id,
-            }
+            },
         )
 
     # Now save the new target (same as save_target)
@@ -95,16 +203,26 @@ def upsert_target(target):
         "created_at": target.created_at.isoformat(),
     }
 
-    table.put_item(Item=item)
+    transaction.put(table, item)
+    add_version_bump(transaction, target.user_id, "targets")
+    transaction.commit()
+    _targets_cache.invalidate(target.user_id)
 
 
+@invalidates("targets")
+@invalidates("versions")
 def delete_target_by_id(target_id, user_id):
-    """Delete a specific target from DynamoDB"""
+    """Delete a specific target, bumping the targets version in the same transaction"""
     table = _get_table()
 
-    table.delete_item(
-        Key={
+    transaction = Transaction()
+    transaction.delete(
+        table,
+        {
             "user_id": user_id,
             "target_id": target_id,
-        }
+        },
     )
+    add_version_bump(transaction, user_id, "targets")
+    transaction.commit()
+    _targets_cache.invalidate(user_id)
@@ -0,0 +1,95 @@
+"""Track Data Access Layer - GPS trackpoints of runs, stored in S3
+
+Thousands of trackpoints per run would push run items towards the 400 KB
+DynamoDB item limit and make every run list read pay for them. Instead
+each track is one encoded object (see track_codec.py) in the tracks
+bucket, and the run item only keeps its key (`track_key`) and point count.
+Tracks are read only by GET /runs/{run_id}/track.
+
+Next to the full track, save_track stores one simplified copy per detail
+level (see simplify.py) under `{key minus .trk}.{detail}.trk`, so map
+views fetch a few hundred points instead of thousands. Tracks stored
+before the detail levels existed get them lazily on first request.
+"""
+
+import os
+
+try:
+    from dal.aws_clients import get_client
+    from simplify import DETAIL_LEVELS, simplify
+    from track_codec import decode_track, encode_track
+except ImportError:
+    from .aws_clients import get_client
+    from ..simplify import DETAIL_LEVELS, simplify
+    from ..track_codec import decode_track, encode_track
+
+
+def _bucket():
+    return os.environ.get("TRACKS_BUCKET", "test-tracks")
+
+
+def track_key(user_id, run_id):
+    """S3 key of a run's track"""
+    return f"tracks/{user_id}/{run_id}.trk"
+
+
+def detail_key(key, detail=None):
+    """S3 key of a track's simplified copy at a detail level (None: the full track)"""
+    if detail is None:
+        return key
+    return f"{key.removesuffix('.trk')}.{detail}.trk"
+
+
+def _put(key, data):
+    get_client("s3").put_object(
+        Bucket=_bucket(),
+        Key=key,
+        Body=data,
+        ContentType="application/octet-stream",
+    )
+
+
+def save_track(user_id, run_id, points):
+    """Encode and store a run's trackpoints and their detail levels; returns the object key"""
+    key = track_key(user_id, run_id)
+
+    _put(key, encode_track(points))
+    for detail in DETAIL_LEVELS:
+        _put(detail_key(key, detail), encode_track(simplify(points, detail)))
+    return key
+
+
+def get_track_data(key, detail=None):
+    """Encoded track bytes at a detail level, or None if the track is missing
+
+    A missing detail level is built from the full track and stored.
+    """
+    s3 = get_client("s3")
+    try:
+        response = s3.get_object(Bucket=_bucket(), Key=detail_key(key, detail))
+        return response["Body"].read()
+    except s3.exceptions.NoSuchKey:
+        if detail is None:
+            return None
+
+    full = get_track_data(key)
+    if full is None:
+        return None
+    data = encode_track(simplify(decode_track(full), detail))
+    _put(detail_key(key, detail), data)
+    return data
+
+
+def get_track(key, detail=None):
+    """Decoded (latitude, longitude, seconds) points, or None if missing"""
+    data = get_track_data(key, detail)
+    return decode_track(data) if data is not None else None
+
+
+def delete_track(key):
+    """Delete a stored track and its detail levels (deleting a missing track is not an error)"""
+    keys = [key] + [detail_key(key, detail) for detail in DETAIL_LEVELS]
+    get_client("s3").delete_objects(
+        Bucket=_bucket(),
+        Delete={"Objects": [{"Key": k} for k in keys], "Quiet": True},
+    )
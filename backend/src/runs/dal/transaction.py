@@ -0,0 +1,100 @@
+"""Transaction builder - compound writes as a single TransactWriteItems call
+
+Collect puts, updates, deletes and condition checks (possibly across
+tables), then commit them together: either every action applies or none
+does, and the whole write costs one round trip.
+
+    transaction = Transaction()
+    transaction.delete(targets_table, {"user_id": user_id, "target_id": old_id})
+    transaction.put(targets_table, new_item)
+    transaction.commit()
+
+Each Transaction carries a ClientRequestToken, so committing the same
+transaction again (e.g. retrying after a timeout) is idempotent for ten
+minutes instead of applying the writes twice.
+"""
+
+import uuid
+
+from botocore.exceptions import ClientError
+
+# DynamoDB's limit on actions per TransactWriteItems call
+MAX_ACTIONS = 100
+
+
+class TransactionCancelledError(Exception):
+    """Raised when DynamoDB cancels a transaction (no action was applied)
+
+    `reasons` holds one cancellation code per action, in the order they
+    were added, e.g. ["None", "ConditionalCheckFailed"].
+    """
+
+    def __init__(self, message, reasons):
+        super().__init__(message)
+        self.reasons = reasons
+
+
+class Transaction:
+    """Collects write actions and submits them as one TransactWriteItems"""
+
+    def __init__(self, client_request_token=None):
+        self.client_request_token = client_request_token or str(uuid.uuid4())
+        self._actions = []
+        self._client = None
+
+    def __len__(self):
+        return len(self._actions)
+
+    def _add(self, kind, table, action, condition=None, names=None, values=None):
+        if len(self._actions) >= MAX_ACTIONS:
+            raise ValueError(f"A transaction can hold at most {MAX_ACTIONS} actions")
+
+        action["TableName"] = table.name
+        if condition:
+            action["ConditionExpression"] = condition
+        if names:
+            action["ExpressionAttributeNames"] = names
+        if values:
+            action["ExpressionAttributeValues"] = values
+
+        # All tables share the DAL's resource, so any table's client will do.
+        # The resource's client serializes plain Python values (Decimal, str,
+        # dict...) itself, just like Table.put_item.
+        self._client = self._client or table.meta.client
+        self._actions.append({kind: action})
+
+    def put(self, table, item, condition=None, names=None, values=None):
+        """Add a PutItem"""
+        self._add("Put", table, {"Item": item}, condition, names, values)
+
+    def update(self, table, key, update_expression, condition=None, names=None, values=None):
+        """Add an UpdateItem"""
+        action = {"Key": key, "UpdateExpression": update_expression}
+        self._add("Update", table, action, condition, names, values)
+
+    def delete(self, table, key, condition=None, names=None, values=None):
+        """Add a DeleteItem"""
+        self._add("Delete", table, {"Key": key}, condition, names, values)
+
+    def condition_check(self, table, key, condition, names=None, values=None):
+        """Require a condition on an item the transaction does not write"""
+        self._add("ConditionCheck", table, {"Key": key}, condition, names, values)
+
+    def commit(self):
+        """Submit all actions atomically"""
+        if not self._actions:
+            return
+
+        try:
+            self._client.transact_write_items(
+                TransactItems=self._actions,
+                ClientRequestToken=self.client_request_token,
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = [
+                reason.get("Code", "None")
+                for reason in e.response.get("CancellationReasons", [])
+            ]
+            raise TransactionCancelledError(e.response["Error"]["Message"], reasons) from e
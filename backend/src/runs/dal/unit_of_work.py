@@ -0,0 +1,128 @@
+"""Request-scoped identity map for DAL reads
+
+Within one request the same read is often issued more than once - e.g.
+PUT /targets/{id} reads the user's targets to check ownership, and then
+upsert_target reads them again. While a RequestScope is active, reads
+decorated with @memoized return the result already fetched in this request,
+and writes decorated with @invalidates drop the memoized reads of their
+namespace so later reads see the write.
+
+Nothing is shared between requests: the scope lives in a contextvar, set
+per request by RequestScopeMiddleware. Outside a scope (scripts, tests
+calling the DAL directly) the decorators are pass-throughs.
+"""
+
+import functools
+import threading
+from contextvars import ContextVar
+
+_current_scope = ContextVar("dal_request_scope", default=None)
+
+
+class RequestScope:
+    """Memoized read results of a single request"""
+
+    def __init__(self):
+        # gather_async runs DAL calls of one request on several threads
+        self._lock = threading.Lock()
+        self._results = {}  # namespace -> {call key: result}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, namespace, key):
+        with self._lock:
+            results = self._results.get(namespace, {})
+            if key in results:
+                self.hits += 1
+                return True, results[key]
+            self.misses += 1
+            return False, None
+
+    def store(self, namespace, key, result):
+        with self._lock:
+            self._results.setdefault(namespace, {})[key] = result
+
+    def invalidate(self, namespace):
+        with self._lock:
+            self._results.pop(namespace, None)
+
+
+def current_scope():
+    """The active request scope, or None"""
+    return _current_scope.get()
+
+
+class request_scope:
+    """Context manager that activates a fresh RequestScope"""
+
+    def __enter__(self):
+        self.scope = RequestScope()
+        self._token = _current_scope.set(self.scope)
+        return self.scope
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_scope.reset(self._token)
+        return False
+
+
+def _call_key(func, args, kwargs):
+    # repr keeps list/set arguments (e.g. projected fields) usable as keys
+    return (func.__module__, func.__qualname__, repr(args), repr(sorted(kwargs.items())))
+
+
+def memoized(namespace):
+    """Memoize a DAL read for the rest of the current request"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            scope = _current_scope.get()
+            if scope is None:
+                return func(*args, **kwargs)
+
+            key = _call_key(func, args, kwargs)
+            found, result = scope.lookup(namespace, key)
+            if found:
+                return result
+
+            result = func(*args, **kwargs)
+            scope.store(namespace, key, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(namespace):
+    """Drop the memoized reads of a namespace after a DAL write"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            scope = _current_scope.get()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # Also on failure - the write may have partially applied
+                if scope is not None:
+                    scope.invalidate(namespace)
+
+        return wrapper
+
+    return decorator
+
+
+class RequestScopeMiddleware:
+    """Pure ASGI middleware giving each HTTP request its own RequestScope"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request_scope():
+            await self.app(scope, receive, send)
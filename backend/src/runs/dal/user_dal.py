@@ -1,21 +1,133 @@
-"""User Data Access Layer - handles saving/loading users from DynamoDB"""
+"""User Data Access Layer - handles saving/loading users from DynamoDB
 
-import boto3
+User items sit behind a write-through item cache: a per-container LRU,
+optionally backed by the shared cache tier (USERS_CACHE_SHARED=true), so
+repeat profile lookups by id or email cost no DynamoDB reads. Lookups that
+find nothing are cached too, for a much shorter TTL, since the user may
+register through another container in the meantime.
+
+The shared tier is a separate store that other services can reach, so it
+never holds credentials: it caches the profile without password_hash, and
+users served from it have password_hash None. Passwords are verified by
+Cognito, not from these lookups.
+"""
+
+import json
 import os
 from decimal import Decimal
 from datetime import datetime
 
 try:
     from models.user import User
+    from dal.dynamodb import get_table
+    from dal.cache import LocalCache
+    from shared_cache import get_cache_backend, item_key
 except ImportError:
     from ..models.user import User
+    from .dynamodb import get_table
+    from .cache import LocalCache
+    from ..shared_cache import get_cache_backend, item_key
+
+# Cached in place of an item when the lookup found no user
+_MISSING = object()
+
+# Item attributes that are never written to the shared tier
+_CREDENTIAL_ATTRIBUTES = ("password_hash",)
+
+_users_cache = LocalCache(
+    max_entries=int(os.environ.get("USERS_CACHE_MAX_ENTRIES", "5000")),
+    max_bytes=int(os.environ.get("USERS_CACHE_MAX_BYTES", str(4 * 1024 * 1024))),
+    ttl_seconds=float(os.environ.get("USERS_CACHE_TTL_SECONDS", "300")),
+)
+NEGATIVE_TTL_SECONDS = float(os.environ.get("USERS_CACHE_NEGATIVE_TTL_SECONDS", "5"))
 
 
 def _get_table():
     """Get the DynamoDB table for users"""
-    dynamodb = boto3.resource("dynamodb")
-    table_name = os.environ.get("USERS_TABLE", "test-users")
-    return dynamodb.Table(table_name)
+    return get_table("USERS_TABLE", "test-users")
+
+
+def _shared_backend():
+    """The shared cache tier, if user items are configured to use it"""
+    if os.environ.get("USERS_CACHE_SHARED", "false").lower() != "true":
+        return None
+    return get_cache_backend()
+
+
+def users_cache_stats():
+    """Hit-rate metrics of this container's user item cache"""
+    return _users_cache.stats()
+
+
+def _item_size(item):
+    return len(json.dumps(item))
+
+
+def _shared_body(item):
+    """Serialized item for the shared tier, without credentials"""
+    profile = {k: v for k, v in item.items() if k not in _CREDENTIAL_ATTRIBUTES}
+    return json.dumps(profile).encode()
+
+
+def _cache_item(item):
+    """Write a user item through to the caches under both of its keys"""
+    for key in (f"id:{item['user_id']}", f"email:{item['email']}"):
+        # Invalidate first so in-flight reads can't overwrite this with older data
+        _users_cache.invalidate(key)
+        _users_cache.set(key, item, _item_size(item))
+
+    backend = _shared_backend()
+    if backend is not None:
+        body = _shared_body(item)
+        backend.set(item_key("user-id", item["user_id"]), body)
+        backend.set(item_key("user-email", item["email"]), body)
+
+
+def _cached_lookup(kind, value, load):
+    """Read-through lookup of a user item (None when there is no such user)"""
+    key = f"{kind}:{value}"
+
+    item = _users_cache.get(key)
+    if item is not None:
+        return None if item is _MISSING else item
+
+    generation = _users_cache.generation(key)
+
+    backend = _shared_backend()
+    if backend is not None:
+        body = backend.get(item_key(f"user-{kind}", value))
+        if body is not None:
+            item = json.loads(body)
+            _users_cache.set(key, item, _item_size(item), generation=generation)
+            return item
+
+    item = load()
+
+    if item is None:
+        # Negative entries stay local: a shared one would hide a user who
+        # registers through another container for the whole shared TTL
+        _users_cache.set(key, _MISSING, len(key), generation=generation, ttl_seconds=NEGATIVE_TTL_SECONDS)
+        return None
+
+    _users_cache.set(key, item, _item_size(item), generation=generation)
+    if backend is not None:
+        backend.set(item_key(f"user-{kind}", value), _shared_body(item))
+    return item
+
+
+def _item_to_user(item):
+    """Convert DynamoDB item back to User model"""
+    user = User(
+        email=item["email"],
+        password_hash=item.get("password_hash"),  # absent in shared-tier items
+        first_name=item["first_name"],
+        last_name=item["last_name"],
+    )
+    # Override the auto-generated values with stored ones
+    user.user_id = item["user_id"]
+    user.created_at = datetime.fromisoformat(item["created_at"])
+
+    return user
 
 
 def save_user(user):
@@ -31,58 +143,49 @@ def save_user(user):
         "created_at": user.created_at.isoformat(),
     }
 
-    table.put_item(Item=item)
+    response = table.put_item(Item=item, ReturnValues="ALL_OLD")
 
+    # If the user's email changed, drop the lookups under the old address.
+    # The replaced item says what it was, even if this container never
+    # cached the user.
+    previous_email = response.get("Attributes", {}).get("email")
+    if previous_email and previous_email != user.email:
+        _users_cache.invalidate(f"email:{previous_email}")
+        backend = _shared_backend()
+        if backend is not None:
+            backend.delete(item_key("user-email", previous_email))
 
-def get_user_by_id(user_id):
-    """Get a user by their user_id"""
-    table = _get_table()
+    _cache_item(item)
 
-    response = table.get_item(Key={"user_id": user_id})
-    item = response.get("Item")
 
-    if not item:
-        return None
+def get_user_by_id(user_id):
+    """Get a user by their user_id"""
 
-    # Convert DynamoDB item back to User model
-    user = User(
-        email=item["email"],
-        password_hash=item["password_hash"],
-        first_name=item["first_name"],
-        last_name=item["last_name"],
-    )
-    # Override the auto-generated values with stored ones
-    user.user_id = item["user_id"]
-    user.created_at = datetime.fromisoformat(item["created_at"])
+    def load():
+        table = _get_table()
+        response = table.get_item(Key={"user_id": user_id})
+        return response.get("Item")
 
-    return user
+    item = _cached_lookup("id", user_id, load)
+    return _item_to_user(item) if item else None
 
 
 def get_user_by_email(email):
     """Get a user by their email address"""
-    table = _get_table()
-
-    # Query the email GSI
-    response = table.query(
-        IndexName="email-index",
-        KeyConditionExpression="email = :email",
-        ExpressionAttributeValues={":email": email},
-    )
 
-    items = response.get("Items", [])
-    if not items:
-        return None
+    def load():
+        table = _get_table()
 
-    # Take the first match (should be unique)
-    item = items[0]
+        # Query the email GSI
+        response = table.query(
+            IndexName="email-index",
+            KeyConditionExpression="email = :email",
+            ExpressionAttributeValues={":email": email},
+        )
 
-    user = User(
-        email=item["email"],
-        password_hash=item["password_hash"],
-        first_name=item["first_name"],
-        last_name=item["last_name"],
-    )
-    user.user_id = item["user_id"]
-    user.created_at = datetime.fromisoformat(item["created_at"])
+        items = response.get("Items", [])
+        # Take the first match (should be unique)
+        return items[0] if items else None
 
-    return user
+    item = _cached_lookup("email", email, load)
+    return _item_to_user(item) if item else None
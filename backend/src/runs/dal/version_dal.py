@@ -0,0 +1,133 @@
+"""Version Data Access Layer - per-user collection version counters used for ETags
+
+Every bump also records when the collection was last written
+(<collection>_written_at), which tells readers whether the write can
+still be on its way to the table's indexes (see run_dal.index_settled).
+"""
+
+from datetime import datetime
+
+try:
+    from dal.dynamodb import get_table
+    from dal.unit_of_work import memoized, invalidates
+except ImportError:
+    from .dynamodb import get_table
+    from .unit_of_work import memoized, invalidates
+
+# Collections that carry a version counter (attribute name on the version item)
+COLLECTIONS = {
+    "runs": "runs_version",
+    "targets": "targets_version",
+}
+
+
+def _get_table():
+    """Get the DynamoDB table for collection versions"""
+    return get_table("VERSIONS_TABLE", "test-versions")
+
+
+def _written_at_attribute(collection):
+    return f"{collection}_written_at"
+
+
+def _bump_expression(collection):
+    """Update expression and values that bump a version and stamp the write time"""
+    expression = (
+        f"ADD {COLLECTIONS[collection]} :one "
+        f"SET {_written_at_attribute(collection)} = :now"
+    )
+    values = {":one": 1, ":now": datetime.utcnow().isoformat(timespec="microseconds")}
+    return expression, values
+
+
+@memoized("versions")
+def get_version(user_id, collection):
+    """Get the current version of a user's collection (0 if never written)"""
+    table = _get_table()
+    attribute = COLLECTIONS[collection]
+
+    # Single GetItem, projected down to the one counter we need. Strongly
+    # consistent: a read right after a write must see the bumped version, or
+    # it would answer 304 or hand out the old ETag for the new data
+    response = table.get_item(
+        Key={"user_id": user_id},
+        ProjectionExpression=attribute,
+        ConsistentRead=True,
+    )
+
+    item = response.get("Item") or {}
+    return int(item.get(attribute, 0))
+
+
+@invalidates("versions")
+def bump_version(user_id, collection):
+    """Increment the version of a user's collection after a write"""
+    table = _get_table()
+    attribute = COLLECTIONS[collection]
+    expression, values = _bump_expression(collection)
+
+    response = table.update_item(
+        Key={"user_id": user_id},
+        UpdateExpression=expression,
+        ExpressionAttributeValues=values,
+        ReturnValues="UPDATED_NEW",
+    )
+
+    return int(response["Attributes"][attribute])
+
+
+def add_version_bump(transaction, user_id, collection):
+    """Bump a collection version as part of a transaction, atomically with its write"""
+    expression, values = _bump_expression(collection)
+
+    transaction.update(_get_table(), {"user_id": user_id}, expression, values=values)
+
+
+@memoized("versions")
+def get_versions(user_id, collections):
+    """Get the versions of several collections in a single GetItem"""
+    table = _get_table()
+    attributes = [COLLECTIONS[collection] for collection in collections]
+
+    # Strongly consistent, like get_version
+    response = table.get_item(
+        Key={"user_id": user_id},
+        ProjectionExpression=", ".join(attributes),
+        ConsistentRead=True,
+    )
+
+    item = response.get("Item") or {}
+    return {
+        collection: int(item.get(attribute, 0))
+        for collection, attribute in zip(collections, attributes)
+    }
+
+
+@memoized("versions")
+def get_version_states(user_id, collections):
+    """Versions of several collections and when each was last written, in one GetItem
+
+    Returns {collection: (version, written_at)}; written_at is an ISO
+    timestamp, or None for a collection never written (or not since
+    write times were recorded).
+    """
+    table = _get_table()
+    attributes = []
+    for collection in collections:
+        attributes += [COLLECTIONS[collection], _written_at_attribute(collection)]
+
+    # Strongly consistent, like get_version
+    response = table.get_item(
+        Key={"user_id": user_id},
+        ProjectionExpression=", ".join(attributes),
+        ConsistentRead=True,
+    )
+
+    item = response.get("Item") or {}
+    return {
+        collection: (
+            int(item.get(COLLECTIONS[collection], 0)),
+            item.get(_written_at_attribute(collection)),
+        )
+        for collection in collections
+    }
@@ -0,0 +1,147 @@
+# src/runs/export.py
+"""Run history export - renders runs and targets as CSV, NDJSON or Parquet
+
+The streaming renderers take any iterable of models (normally the pages
+read by run_dal.iter_runs_by_user) and yield encoded chunks of about
+CHUNK_BYTES, so memory use stays flat however long the history is.
+render_file() renders one page as a self-contained file for export jobs
+(see export_jobs.py). Parquet needs pyarrow and is only offered when it is
+installed.
+"""
+
+import csv
+import io
+import json
+import os
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional - Parquet exports are disabled without it
+    pyarrow = None
+
+# Rows are buffered into chunks of roughly this size before being yielded
+CHUNK_BYTES = int(os.environ.get("RUNS_EXPORT_CHUNK_BYTES", str(64 * 1024)))
+
+# Items per DynamoDB page read while exporting
+PAGE_SIZE = int(os.environ.get("RUNS_EXPORT_PAGE_SIZE", "500"))
+
+EXPORT_FIELDS = [
+    "run_id",
+    "date",
+    "distance_km",
+    "duration",
+    "duration_seconds",
+    "pace",
+    "notes",
+    "created_at",
+]
+
+TARGET_EXPORT_FIELDS = [
+    "target_id",
+    "target_type",
+    "period",
+    "distance_km",
+    "created_at",
+]
+
+# Formats that can be streamed row by row
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def file_formats():
+    """Formats available for export files (Parquet only with pyarrow)"""
+    formats = list(MEDIA_TYPES)
+    if pyarrow is not None:
+        formats.append("parquet")
+    return formats
+
+
+def run_to_export_row(run) -> dict:
+    """Flatten a Run model into the exported fields"""
+    return {
+        "run_id": run.run_id,
+        "date": run.date.isoformat(),
+        "distance_km": float(run.distance_km),
+        "duration": run.duration_formatted,
+        "duration_seconds": run.duration_seconds,
+        "pace": run.pace_per_km_formatted,
+        "notes": run.notes,
+        "created_at": run.created_at.isoformat(),
+    }
+
+
+def target_to_export_row(target) -> dict:
+    """Flatten a Target model into the exported fields"""
+    return {
+        "target_id": target.target_id,
+        "target_type": target.target_type,
+        "period": target.period,
+        "distance_km": float(target.distance_km),
+        "created_at": target.created_at.isoformat(),
+    }
+
+
+def _chunked(lines):
+    """Join encoded lines into chunks of about CHUNK_BYTES"""
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _csv_lines(rows, fields):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=fields)
+
+    def take_line():
+        line = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return line.encode("utf-8")
+
+    writer.writeheader()
+    yield take_line()
+    for row in rows:
+        writer.writerow(row)
+        yield take_line()
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def export_chunks(runs, export_format):
+    """Encoded chunks of `runs` in the given format ("csv" or "ndjson")"""
+    rows = (run_to_export_row(run) for run in runs)
+    if export_format == "csv":
+        return _chunked(_csv_lines(rows, EXPORT_FIELDS))
+    if export_format == "ndjson":
+        return _chunked(_ndjson_lines(rows))
+    raise ValueError(f"Invalid format '{export_format}'. Must be one of: {list(MEDIA_TYPES)}")
+
+
+def render_file(rows, fields, export_format):
+    """Render a list of export rows as one complete file in memory"""
+    if export_format == "csv":
+        return b"".join(_csv_lines(rows, fields))
+    if export_format == "ndjson":
+        return b"".join(_ndjson_lines(rows))
+    if export_format == "parquet" and pyarrow is not None:
+        table = pyarrow.Table.from_pylist(rows)
+        out = io.BytesIO()
+        pyarrow.parquet.write_table(table, out)
+        return out.getvalue()
+    raise ValueError(f"Invalid format '{export_format}'. Must be one of: {file_formats()}")
@@ -0,0 +1,210 @@
+# src/runs/export_jobs.py
+"""Asynchronous export jobs - full histories written to S3 as partitioned files
+
+Heavy users' histories don't fit in one API Gateway response (29 s, 10 MB),
+so POST /exports only creates a job and queues it on SQS. The export worker
+(lambda_handler below, its own Lambda function) pages through the user's
+runs and then targets, writing one file per DynamoDB page:
+
+    exports/<user_id>/<export_id>/runs/part-00000.csv
+    exports/<user_id>/<export_id>/runs/part-00001.csv
+    exports/<user_id>/<export_id>/targets/part-00000.csv
+
+After every file the worker checkpoints its cursor (collection, part number
+and DynamoDB LastEvaluatedKey) on the job item. When the invocation is
+about to time out it stops and re-queues the job, and the next invocation
+continues from the checkpoint. Part names are deterministic, so a page
+redone after a crash overwrites its file instead of duplicating it.
+GET /exports/{id} hands out presigned URLs once the job has completed.
+
+Without EXPORT_QUEUE_URL (local development) the API runs the job itself
+after responding. Point boto3 at MinIO with AWS_ENDPOINT_URL_S3.
+"""
+
+import json
+import os
+
+try:
+    from dal.run_dal import get_runs_page
+    from dal.target_dal import get_targets_page
+    from dal.export_job_dal import (
+        COMPLETED,
+        FAILED,
+        finish_export_job,
+        save_export_checkpoint,
+        start_export_attempt,
+    )
+    from dal.dynamodb import reset_deadline, set_deadline
+    from dal.aws_clients import get_client
+    from export import (
+        EXPORT_FIELDS,
+        TARGET_EXPORT_FIELDS,
+        render_file,
+        run_to_export_row,
+        target_to_export_row,
+    )
+except ImportError:
+    from .dal.run_dal import get_runs_page
+    from .dal.target_dal import get_targets_page
+    from .dal.export_job_dal import (
+        COMPLETED,
+        FAILED,
+        finish_export_job,
+        save_export_checkpoint,
+        start_export_attempt,
+    )
+    from .dal.dynamodb import reset_deadline, set_deadline
+    from .dal.aws_clients import get_client
+    from .export import (
+        EXPORT_FIELDS,
+        TARGET_EXPORT_FIELDS,
+        render_file,
+        run_to_export_row,
+        target_to_export_row,
+    )
+
+# Exported collections in order: name, page reader, row renderer, columns
+COLLECTIONS = [
+    ("runs", get_runs_page, run_to_export_row, EXPORT_FIELDS),
+    ("targets", get_targets_page, target_to_export_row, TARGET_EXPORT_FIELDS),
+]
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _bucket():
+    return os.environ.get("EXPORTS_BUCKET", "test-exports")
+
+
+def _page_size():
+    return int(os.environ.get("EXPORT_JOB_PAGE_SIZE", "1000"))
+
+
+def _min_time_seconds():
+    """Stop and re-queue when less than this much invocation time is left"""
+    return float(os.environ.get("EXPORT_MIN_TIME_SECONDS", "20"))
+
+
+def _max_receives():
+    """Deliveries of a failing job message before the job is marked failed"""
+    return int(os.environ.get("EXPORT_MAX_RECEIVES", "3"))
+
+
+def file_key(user_id, export_id, collection, part, export_format):
+    """S3 key of one export file"""
+    return f"exports/{user_id}/{export_id}/{collection}/part-{part:05d}.{export_format}"
+
+
+def enqueue_export_job(user_id, export_id):
+    """Queue a job for the export worker; False when no queue is configured"""
+    queue_url = os.environ.get("EXPORT_QUEUE_URL")
+    if not queue_url:
+        return False
+
+    get_client("sqs").send_message(
+        QueueUrl=queue_url,
+        MessageBody=json.dumps({"user_id": user_id, "export_id": export_id}),
+    )
+    return True
+
+
+def presigned_url(key):
+    """Time-limited download URL for an export file"""
+    return get_client("s3").generate_presigned_url(
+        "get_object",
+        Params={"Bucket": _bucket(), "Key": key},
+        ExpiresIn=int(os.environ.get("EXPORT_URL_TTL_SECONDS", "3600")),
+    )
+
+
+def run_export_job(user_id, export_id, time_left=None):
+    """Write a job's files to S3, resuming from its checkpoint
+
+    `time_left` returns the seconds left in the invocation; without it the
+    job runs to the end. Returns True when the job is finished (or there is
+    nothing to do), False when it stopped early and must be re-queued.
+    """
+    job = start_export_attempt(user_id, export_id)
+    if job is None:
+        print(f"Export {export_id} is missing or already finished")  # Debug
+        return True
+
+    export_format = job["format"]
+    files = list(job.get("files", []))
+    cursor = job.get("cursor") or {"collection": COLLECTIONS[0][0], "part": 0}
+
+    names = [name for name, _, _, _ in COLLECTIONS]
+    position = names.index(cursor["collection"])
+    part = int(cursor["part"])
+    start_key = cursor.get("start_key")
+
+    while position < len(COLLECTIONS):
+        if time_left is not None and time_left() < _min_time_seconds():
+            print(f"Export {export_id} paused at {cursor}")  # Debug
+            return False
+
+        collection, read_page, to_row, fields = COLLECTIONS[position]
+        items, start_key = read_page(user_id, _page_size(), start_key)
+
+        if items:
+            key = file_key(user_id, export_id, collection, part, export_format)
+            get_client("s3").put_object(
+                Bucket=_bucket(),
+                Key=key,
+                Body=render_file([to_row(item) for item in items], fields, export_format),
+                ContentType=CONTENT_TYPES[export_format],
+            )
+            if key not in files:
+                files.append(key)
+            part += 1
+
+        if start_key is None:
+            # Collection done - continue with the next one from its start
+            position += 1
+            part = 0
+            if position == len(COLLECTIONS):
+                break
+            cursor = {"collection": names[position], "part": 0}
+        else:
+            cursor = {"collection": collection, "part": part, "start_key": start_key}
+
+        save_export_checkpoint(user_id, export_id, cursor, files)
+
+    finish_export_job(user_id, export_id, COMPLETED, files=files)
+    print(f"Export {export_id} completed with {len(files)} files")  # Debug
+    return True
+
+
+def lambda_handler(event, context):
+    """Export worker entry point for SQS batches (ReportBatchItemFailures)"""
+    failures = []
+
+    for record in event.get("Records", []):
+        message = json.loads(record["body"])
+        user_id, export_id = message["user_id"], message["export_id"]
+
+        token = set_deadline(context.get_remaining_time_in_millis())
+        try:
+            finished = run_export_job(
+                user_id,
+                export_id,
+                time_left=lambda: context.get_remaining_time_in_millis() / 1000,
+            )
+            if not finished:
+                enqueue_export_job(user_id, export_id)
+        except Exception as e:
+            print(f"Export {export_id} failed: {e}")  # Debug
+            receives = int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+            if receives >= _max_receives():
+                finish_export_job(user_id, export_id, FAILED, error=str(e))
+            else:
+                # Redelivered after the visibility timeout, resuming from the checkpoint
+                failures.append({"itemIdentifier": record["messageId"]})
+        finally:
+            reset_deadline(token)
+
+    return {"batchItemFailures": failures}
@@ -0,0 +1,205 @@
+"""Per-request performance instrumentation
+
+PerformanceMiddleware records how long each phase of a request takes - JWT
+verification, every DAL call (with the DynamoDB capacity it consumed),
+model conversion and serialization - and reports it twice:
+
+- a Server-Timing response header, shown by browser dev tools
+- one CloudWatch Embedded Metric Format (EMF) log line per request, which
+  CloudWatch turns into metrics without any API calls
+
+Consumed capacity is also totalled per route in `endpoint_capacity`, and
+tools/cost_report.py turns the EMF lines into a cost-per-endpoint table.
+
+Code marks phases with `with timed("phase"):`. The timings live in a
+contextvar, so phases recorded on DAL threads (see dal/async_dal.py) land on
+the right request. With PERF_INSTRUMENTATION unset the middleware is a
+pass-through and timed() costs a single contextvar lookup.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+EMF_NAMESPACE = os.environ.get("PERF_METRICS_NAMESPACE", "RunningLog")
+
+# DynamoDB operations that consume read capacity (everything else consumes write)
+READ_OPERATIONS = {"GetItem", "BatchGetItem", "Query", "Scan", "TransactGetItems"}
+
+_current_timings = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """Phase durations and consumed capacity of one request"""
+
+    def __init__(self):
+        # gather_async records phases from several threads at once
+        self._lock = threading.Lock()
+        self.phases = {}  # phase -> [total ms, count]
+        self.read_capacity = 0.0
+        self.write_capacity = 0.0
+
+    def add(self, phase, duration_ms):
+        with self._lock:
+            totals = self.phases.setdefault(phase, [0.0, 0])
+            totals[0] += duration_ms
+            totals[1] += 1
+
+    def add_capacity(self, read_units, write_units):
+        with self._lock:
+            self.read_capacity += read_units
+            self.write_capacity += write_units
+
+    def server_timing(self, total_ms):
+        """Server-Timing header value, e.g. 'auth;dur=0.4, total;dur=12.1'"""
+        with self._lock:
+            metrics = []
+            for phase, (duration_ms, count) in self.phases.items():
+                metric = f"{phase};dur={duration_ms:.1f}"
+                if count > 1:
+                    metric += f';desc="{count} calls"'
+                metrics.append(metric)
+
+            if self.read_capacity or self.write_capacity:
+                metrics.append(
+                    f'capacity;desc="RCU {self.read_capacity:g} WCU {self.write_capacity:g}"'
+                )
+
+        metrics.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(metrics)
+
+    def emf(self, route, status_code, total_ms):
+        """CloudWatch Embedded Metric Format record for this request"""
+        with self._lock:
+            values = {phase: round(duration_ms, 3) for phase, (duration_ms, _) in self.phases.items()}
+            read_capacity, write_capacity = self.read_capacity, self.write_capacity
+
+        values["total"] = round(total_ms, 3)
+        metrics = [{"Name": name, "Unit": "Milliseconds"} for name in values]
+        metrics += [
+            {"Name": "ConsumedReadCapacity", "Unit": "Count"},
+            {"Name": "ConsumedWriteCapacity", "Unit": "Count"},
+        ]
+
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": EMF_NAMESPACE,
+                        "Dimensions": [["Route"]],
+                        "Metrics": metrics,
+                    }
+                ],
+            },
+            "Route": route,
+            "StatusCode": status_code,
+            "ConsumedReadCapacity": read_capacity,
+            "ConsumedWriteCapacity": write_capacity,
+            **values,
+        }
+
+
+def capacity_units(operation, consumed):
+    """(read units, write units) of a DynamoDB ConsumedCapacity entry or list"""
+    entries = consumed if isinstance(consumed, list) else [consumed]
+    units = sum(float(entry.get("CapacityUnits", 0)) for entry in entries)
+    if operation in READ_OPERATIONS:
+        return units, 0.0
+    return 0.0, units
+
+
+class EndpointCapacity:
+    """Requests and consumed capacity per route, since the container started"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def add(self, route, read_units, write_units):
+        with self._lock:
+            totals = self._routes.setdefault(
+                route, {"requests": 0, "read_capacity": 0.0, "write_capacity": 0.0}
+            )
+            totals["requests"] += 1
+            totals["read_capacity"] += read_units
+            totals["write_capacity"] += write_units
+
+    def stats(self):
+        with self._lock:
+            return {route: dict(totals) for route, totals in self._routes.items()}
+
+
+endpoint_capacity = EndpointCapacity()
+
+
+def current_timings():
+    """Timings of the request being handled, or None when not instrumented"""
+    return _current_timings.get()
+
+
+@contextmanager
+def timed(phase):
+    """Record the duration of a block as a phase of the current request"""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, (time.perf_counter() - start) * 1000)
+
+
+def _route_name(scope):
+    """Method and route template, so /runs/{run_id} is one metric series"""
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+class PerformanceMiddleware:
+    """Pure ASGI middleware emitting Server-Timing headers and EMF metrics"""
+
+    def __init__(self, app, enabled=None):
+        self.app = app
+        if enabled is None:
+            enabled = os.environ.get("PERF_INSTRUMENTATION", "false").lower() == "true"
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Everything up to here (auth, DAL, rendering) is in the header
+                total_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", timings.server_timing(total_ms).encode("latin-1"))
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timings.reset(token)
+            total_ms = (time.perf_counter() - start) * 1000
+            route = _route_name(scope)
+            endpoint_capacity.add(route, timings.read_capacity, timings.write_capacity)
+            print(json.dumps(timings.emf(route, status_code, total_ms)))
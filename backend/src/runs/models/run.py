@@ -3,6 +3,15 @@ from datetime import datetime, date
 from decimal import Decimal
 import re
 
+# Distance buckets used for personal bests: bucket name -> (min_km, max_km).
+# A run counts towards a bucket when its distance falls in [min_km, max_km).
+DISTANCE_BUCKETS = {
+    "5k": (Decimal("5.0"), Decimal("5.5")),
+    "10k": (Decimal("10.0"), Decimal("11.0")),
+    "half": (Decimal("21.0975"), Decimal("23.0")),
+    "marathon": (Decimal("42.195"), Decimal("45.0")),
+}
+
 
 class Run:
     def __init__(
@@ -20,6 +29,10 @@ class Run:
         self.run_id = str(uuid.uuid4())
         self.created_at = datetime.utcnow()
 
+        # GPS track in the track store (see dal/track_dal.py), if recorded
+        self.track_key = None
+        self.track_points = 0
+
         # Parse and store duration
         self.duration_seconds = self._parse_duration(duration)
 
@@ -67,3 +80,12 @@ class Run:
         minutes = pace_seconds // 60
         seconds = pace_seconds % 60
         return f"{minutes:02d}:{seconds:02d}"
+
+    @property
+    def distance_bucket(self):
+        """Return the personal-best bucket this run falls into, or None"""
+        distance = Decimal(str(self.distance_km))
+        for bucket, (min_km, max_km) in DISTANCE_BUCKETS.items():
+            if min_km <= distance < max_km:
+                return bucket
+        return None
@@ -0,0 +1,158 @@
+"""Shared cache tier for rendered per-user payloads
+
+Per-container caches only help requests that land on the same Lambda
+container. This module puts rendered JSON bodies (run lists, targets,
+dashboard progress) behind a small backend interface so they can live in
+a store shared by all containers.
+
+Keys embed the user's collection versions (see dal/version_dal.py). A write
+bumps the version, so every reader moves to a new key at once - there is
+nothing to delete, and old entries simply age out through the TTL. Item
+keys (item_key) aren't versioned; their owners delete them when the item
+moves to another key.
+
+CACHE_BACKEND selects the backend:
+    none    no caching (default)
+    memory  per-container LRU, useful locally and as a fallback
+    redis   any Redis-protocol server at CACHE_REDIS_URL
+"""
+
+import os
+
+try:
+    from dal.cache import LocalCache
+except ImportError:
+    from .dal.cache import LocalCache
+
+# Bump when the shape of a cached payload changes, so a deploy never
+# serves bodies rendered by the previous version of the code
+KEY_SCHEMA = "v1"
+
+
+class MemoryBackend:
+    """In-process backend (per container)"""
+
+    def __init__(self, ttl_seconds, max_entries=1000, max_bytes=32 * 1024 * 1024):
+        self._cache = LocalCache(
+            max_entries=max_entries, max_bytes=max_bytes, ttl_seconds=ttl_seconds
+        )
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value, len(value))
+
+    def delete(self, key):
+        self._cache.invalidate(key)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class RedisBackend:
+    """Redis-protocol backend shared by all containers
+
+    Cache errors never fail a request: an unreachable server is treated as
+    a miss and the payload is built from DynamoDB as usual.
+    """
+
+    def __init__(self, client, ttl_seconds):
+        self._client = client
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key):
+        try:
+            value = self._client.get(key)
+        except Exception as e:
+            print(f"Shared cache get failed: {e}")  # Debug
+            self.errors += 1
+            return None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        try:
+            self._client.set(key, value, ex=self.ttl_seconds)
+        except Exception as e:
+            print(f"Shared cache set failed: {e}")  # Debug
+            self.errors += 1
+
+    def delete(self, key):
+        try:
+            self._client.delete(key)
+        except Exception as e:
+            print(f"Shared cache delete failed: {e}")  # Debug
+            self.errors += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def _connect_redis(url):
+    """Create a Redis client (redis is only required for CACHE_BACKEND=redis)"""
+    import redis
+
+    # Tight timeouts: a slow cache must cost less than the read it replaces
+    timeout = float(os.environ.get("CACHE_REDIS_TIMEOUT_SECONDS", "0.1"))
+    return redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+
+
+def create_backend():
+    """Build the backend selected by CACHE_BACKEND (None when caching is off)"""
+    name = os.environ.get("CACHE_BACKEND", "none").lower()
+    ttl_seconds = int(os.environ.get("CACHE_TTL_SECONDS", "300"))
+
+    if name == "none":
+        return None
+    if name == "memory":
+        return MemoryBackend(ttl_seconds)
+    if name == "redis":
+        url = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+        return RedisBackend(_connect_redis(url), ttl_seconds)
+
+    raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+
+
+_backend = None
+_backend_loaded = False
+
+
+def get_cache_backend():
+    """The configured backend for this container, created on first use"""
+    global _backend, _backend_loaded
+    if not _backend_loaded:
+        _backend = create_backend()
+        _backend_loaded = True
+    return _backend
+
+
+def cache_key(user_id, name, versions, variant=None):
+    """Versioned key for a user's payload
+
+    `versions` maps each collection the payload is built from to its current
+    version, e.g. {"runs": 12, "targets": 3} for the dashboard.
+    """
+    version_part = ",".join(f"{collection}={versions[collection]}" for collection in sorted(versions))
+    key = f"runlog:{KEY_SCHEMA}:{user_id}:{name}:{version_part}"
+    if variant:
+        key = f"{key}:{variant}"
+    return key
+
+
+def item_key(kind, value):
+    """Key for a single cached item, e.g. item_key("user-email", email)"""
+    return f"runlog:{KEY_SCHEMA}:{kind}:{value}"
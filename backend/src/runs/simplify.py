@@ -0,0 +1,139 @@
+# src/runs/simplify.py
+"""Track simplification for map rendering
+
+A 10k-point track has far more points than a map can show at any zoom
+level. Each detail level drops the points that move the line by less than
+its tolerance:
+
+- low (overviews, run list thumbnails): 20 m
+- medium (a whole run on screen): 5 m
+- high (zoomed in on a section): 1.5 m
+
+Ramer-Douglas-Peucker keeps the point furthest from the current chord
+while it is further than the tolerance. Visvalingam-Whyatt instead
+repeatedly drops the point forming the smallest triangle with its
+neighbours, which gives smoother shapes for the same point budget; its
+threshold is the tolerance squared (an area). Positions are projected to
+local metres (equirectangular), accurate enough at track scale.
+
+Simplified tracks are precomputed when a track is stored (see
+dal/track_dal.py) and served by GET /runs/{run_id}/track?detail=...
+"""
+
+import heapq
+import math
+import os
+
+EARTH_RADIUS_M = 6371008.8
+
+# Detail level -> tolerance in metres
+DETAIL_LEVELS = {
+    "low": 20.0,
+    "medium": 5.0,
+    "high": 1.5,
+}
+
+
+def _project(points):
+    """Positions as (x, y) metres around the track's first point"""
+    lat0 = math.radians(points[0][0])
+    scale_x = EARTH_RADIUS_M * math.cos(lat0)
+    return [
+        (math.radians(lon) * scale_x, math.radians(lat) * EARTH_RADIUS_M)
+        for lat, lon, _ in points
+    ]
+
+
+def _distance_to_segment(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    t = max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length_sq))
+    return math.hypot(p[0] - (a[0] + t * dx), p[1] - (a[1] + t * dy))
+
+
+def rdp(points, tolerance_m):
+    """Ramer-Douglas-Peucker simplification (iterative, so long tracks can't overflow the stack)"""
+    if len(points) < 3:
+        return list(points)
+
+    xy = _project(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        furthest, index = 0.0, None
+        for i in range(start + 1, end):
+            distance = _distance_to_segment(xy[i], xy[start], xy[end])
+            if distance > furthest:
+                furthest, index = distance, i
+
+        if index is not None and furthest > tolerance_m:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _triangle_area(a, b, c):
+    return abs((b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1])) / 2
+
+
+def visvalingam(points, tolerance_m):
+    """Visvalingam-Whyatt simplification, dropping triangles under tolerance_m² """
+    if len(points) < 3:
+        return list(points)
+
+    min_area = tolerance_m * tolerance_m
+    xy = _project(points)
+    count = len(points)
+    previous = list(range(-1, count - 1))
+    following = list(range(1, count + 1))
+    areas = [math.inf] * count
+    removed = [False] * count
+
+    heap = []
+    for i in range(1, count - 1):
+        areas[i] = _triangle_area(xy[i - 1], xy[i], xy[i + 1])
+        heap.append((areas[i], i))
+    heapq.heapify(heap)
+
+    while heap:
+        area, i = heapq.heappop(heap)
+        if removed[i] or area != areas[i]:
+            continue  # Stale entry - the area changed when a neighbour went
+        if area >= min_area:
+            break
+
+        removed[i] = True
+        before, after = previous[i], following[i]
+        following[before], previous[after] = after, before
+
+        # A neighbour's area never drops below the removed point's, so the
+        # removal order stays monotonic
+        for j in (before, after):
+            if 0 < j < count - 1:
+                areas[j] = max(
+                    area, _triangle_area(xy[previous[j]], xy[j], xy[following[j]])
+                )
+                heapq.heappush(heap, (areas[j], j))
+
+    return [point for point, gone in zip(points, removed) if not gone]
+
+
+def simplify(points, detail, method=None):
+    """Simplify a track to a detail level ("low", "medium" or "high")
+
+    `method` is "rdp" or "visvalingam" (default: TRACK_SIMPLIFY_METHOD, rdp).
+    """
+    if detail not in DETAIL_LEVELS:
+        raise ValueError(f"Invalid detail '{detail}'. Must be one of: {list(DETAIL_LEVELS)}")
+
+    method = method or os.environ.get("TRACK_SIMPLIFY_METHOD", "rdp")
+    if method == "visvalingam":
+        return visvalingam(points, DETAIL_LEVELS[detail])
+    return rdp(points, DETAIL_LEVELS[detail])
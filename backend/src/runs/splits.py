@@ -0,0 +1,194 @@
+# src/runs/splits.py
+"""Split analysis of a run's GPS track
+
+From the (latitude, longitude, seconds) trackpoints this computes:
+
+- per-km splits (the last one usually partial)
+- the fastest 1 km / 5 km / 10 km / half marathon segments inside the run
+- whether the run was a negative split (second half faster than the first)
+
+Cumulative distance is the running sum of haversine distances. The time at
+which the runner first reached a distance is interpolated between the two
+surrounding trackpoints, which makes the result independent of the GPS
+sampling rate. With NumPy installed all of this is vectorized
+(np.searchsorted finds every boundary at once) and takes a few
+milliseconds for a 10k-point track; without it the same algorithm runs as
+plain Python with bisect.
+"""
+
+import bisect
+import math
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional - the pure-Python path gives the same results
+    np = None
+
+EARTH_RADIUS_M = 6371008.8
+
+SPLIT_M = 1000
+
+# A shorter remainder after the last full km is folded into that km
+MIN_PARTIAL_SPLIT_M = 10
+
+# Segment distances searched for the fastest efforts
+SEGMENTS = {
+    "1k": 1000,
+    "5k": 5000,
+    "10k": 10000,
+    "half": 21097.5,
+}
+
+# Halves within this fraction of each other count as an even split
+EVEN_TOLERANCE = 0.01
+
+
+def _cumulative_np(points):
+    track = np.asarray(points, dtype=float)
+    lat, lon = np.radians(track[:, 0]), np.radians(track[:, 1])
+    a = (
+        np.sin(np.diff(lat) / 2) ** 2
+        + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    )
+    steps = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    return np.concatenate(([0.0], np.cumsum(steps))), track[:, 2]
+
+
+def _cumulative_py(points):
+    distances = [0.0]
+    for (lat1, lon1, _), (lat2, lon2, _) in zip(points, points[1:]):
+        phi1, phi2 = math.radians(lat1), math.radians(lat2)
+        a = (
+            math.sin((phi2 - phi1) / 2) ** 2
+            + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+        )
+        distances.append(distances[-1] + 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0))))
+    return distances, [float(point[2]) for point in points]
+
+
+def _time_at_np(distances, times, targets):
+    """Interpolated time at which each target distance was first reached"""
+    targets = np.asarray(targets, dtype=float)
+    after = np.clip(np.searchsorted(distances, targets, side="left"), 1, len(distances) - 1)
+    before = after - 1
+    span = distances[after] - distances[before]
+    fraction = np.divide(
+        targets - distances[before], span, out=np.zeros_like(targets), where=span > 0
+    )
+    return times[before] + fraction * (times[after] - times[before])
+
+
+def _time_at_py(distances, times, targets):
+    result = []
+    for target in targets:
+        after = min(max(bisect.bisect_left(distances, target), 1), len(distances) - 1)
+        before = after - 1
+        span = distances[after] - distances[before]
+        fraction = (target - distances[before]) / span if span > 0 else 0.0
+        result.append(times[before] + fraction * (times[after] - times[before]))
+    return result
+
+
+def _fastest_np(distances, times, length):
+    """(seconds, start metres) of the fastest `length` window, or None"""
+    starts = np.flatnonzero(distances + length <= distances[-1])
+    if not len(starts):
+        return None
+    durations = _time_at_np(distances, times, distances[starts] + length) - times[starts]
+    best = int(np.argmin(durations))
+    return float(durations[best]), float(distances[starts[best]])
+
+
+def _fastest_py(distances, times, length):
+    best = None
+    for start, time in zip(distances, times):
+        if start + length > distances[-1]:
+            break
+        duration = _time_at_py(distances, times, [start + length])[0] - time
+        if best is None or duration < best[0]:
+            best = (duration, start)
+    return best
+
+
+def compute_splits(points, use_numpy=None):
+    """Splits, fastest segments and split type of a track
+
+    `points` are (latitude, longitude, seconds since start) tuples with
+    times on every point. Raises ValueError for tracks that can't be
+    analysed. `use_numpy` forces a path (default: NumPy when installed).
+    """
+    if len(points) < 2:
+        raise ValueError("Track has too few points for splits")
+    if any(point[2] is None for point in points):
+        raise ValueError("Track has no timestamps")
+
+    vectorized = np is not None if use_numpy is None else use_numpy
+    if vectorized:
+        distances, times = _cumulative_np(points)
+        time_at, fastest = _time_at_np, _fastest_np
+    else:
+        distances, times = _cumulative_py(points)
+        time_at, fastest = _time_at_py, _fastest_py
+
+    total_m = float(distances[-1])
+    total_s = float(times[-1] - times[0])
+    if total_m <= 0:
+        raise ValueError("Track covers no distance")
+
+    # Split boundaries, with the finish as the end of the last (partial)
+    # split. A few metres past the last full km are GPS noise, not a split.
+    boundaries = [SPLIT_M * k for k in range(1, int(total_m // SPLIT_M) + 1)]
+    if boundaries and total_m - boundaries[-1] < MIN_PARTIAL_SPLIT_M:
+        boundaries[-1] = total_m
+    else:
+        boundaries.append(total_m)
+    boundary_times = [float(t) for t in time_at(distances, times, boundaries)]
+    boundary_times[-1] = float(times[-1])
+
+    splits = []
+    previous_m, previous_s = 0.0, float(times[0])
+    for number, (boundary_m, boundary_s) in enumerate(zip(boundaries, boundary_times), 1):
+        distance_m = boundary_m - previous_m
+        duration_s = boundary_s - previous_s
+        splits.append(
+            {
+                "split": number,
+                "distance_m": round(distance_m, 1),
+                "duration_s": round(duration_s, 1),
+                "pace_s_per_km": round(duration_s / distance_m * 1000, 1) if distance_m else 0.0,
+            }
+        )
+        previous_m, previous_s = boundary_m, boundary_s
+
+    fastest_segments = []
+    for name, length in SEGMENTS.items():
+        result = fastest(distances, times, length)
+        if result is not None:
+            duration_s, start_m = result
+            fastest_segments.append(
+                {
+                    "segment": name,
+                    "duration_s": round(duration_s, 1),
+                    "start_m": round(start_m, 1),
+                }
+            )
+
+    halfway_s = float(time_at(distances, times, [total_m / 2])[0])
+    first_half_s = halfway_s - float(times[0])
+    second_half_s = float(times[-1]) - halfway_s
+    if abs(second_half_s - first_half_s) <= EVEN_TOLERANCE * first_half_s:
+        split_type = "even"
+    elif second_half_s < first_half_s:
+        split_type = "negative"
+    else:
+        split_type = "positive"
+
+    return {
+        "distance_m": round(total_m, 1),
+        "duration_s": round(total_s, 1),
+        "splits": splits,
+        "fastest_segments": fastest_segments,
+        "first_half_s": round(first_half_s, 1),
+        "second_half_s": round(second_half_s, 1),
+        "split_type": split_type,
+    }
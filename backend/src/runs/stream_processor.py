@@ -0,0 +1,319 @@
+# src/runs/stream_processor.py
+"""Runs table stream consumer - rollups, personal bests and leaderboards
+
+With AGGREGATES_FROM_STREAM=true, run writes only write the run (and bump
+the ETag version); everything derived from runs is maintained here, off the
+request path, from the Runs table stream (NEW_AND_OLD_IMAGES):
+
+- per-user weekly/monthly/yearly rollups (dal/rollup_dal.py)
+- personal bests (dal/records_dal.py)
+- group leaderboards (dal/leaderboard_dal.py)
+
+Every record is turned into a (old run, new run) change - a delete
+tombstone or a missing image counts as no run - and the change's deltas
+are applied:
+
+- Rollup and leaderboard deltas are ADDs, written in transactions with
+  event marker items conditioned on not existing - one for the user's
+  rollups and one per group. A redelivered record finds the markers of
+  what it already applied and skips that, so each record is applied
+  exactly once, even if the user's groups changed in between.
+- Creating or joining a group recomputes the member's entries from the
+  runs table, which may already count changes still queued here. Entry
+  deltas are conditioned on the entry's `rebuilt_at` being older than the
+  change's updated_at; the deltas of entries that fail it are dropped.
+- Personal bests are conditional puts and recomputations, idempotent as
+  they are.
+
+Records are processed in order. A record that fails (throttling, a
+timeout) stops the batch and is reported as the batch item failure: Lambda
+checkpoints everything before it and retries from it. Records that can
+never be processed (an image that is not a run) go to the dead-letter
+queue (STREAM_DLQ_URL) and are skipped, so they don't block the shard.
+Records that keep failing for other reasons reach the same queue through
+the event source mapping's on-failure destination (see template.yaml).
+
+Run locally against fake records with tools/replay_stream.py.
+"""
+
+import json
+import os
+from collections import defaultdict
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+try:
+    from dal.run_dal import run_from_item
+    from dal.records_dal import (
+        record_run,
+        update_records_for_run_delete,
+        update_records_for_run_update,
+    )
+    from dal import leaderboard_dal, rollup_dal
+    from dal.group_dal import get_groups_for_user, groups_enabled
+    from dal.transaction import MAX_ACTIONS, Transaction, TransactionCancelledError
+    from dal.dynamodb import reset_deadline, set_deadline
+    from dal.aws_clients import get_client
+except ImportError:
+    from .dal.run_dal import run_from_item
+    from .dal.records_dal import (
+        record_run,
+        update_records_for_run_delete,
+        update_records_for_run_update,
+    )
+    from .dal import leaderboard_dal, rollup_dal
+    from .dal.group_dal import get_groups_for_user, groups_enabled
+    from .dal.transaction import MAX_ACTIONS, Transaction, TransactionCancelledError
+    from .dal.dynamodb import reset_deadline, set_deadline
+    from .dal.aws_clients import get_client
+
+_deserializer = TypeDeserializer()
+_serializer = TypeSerializer()
+
+
+class PoisonRecordError(Exception):
+    """Raised for a stream record that can never be processed"""
+
+
+def aggregates_from_stream():
+    """Whether derived data is maintained here instead of on the request path"""
+    return os.environ.get("AGGREGATES_FROM_STREAM", "false").lower() == "true"
+
+
+def _image(record, name):
+    image = record["dynamodb"].get(name)
+    if not image:
+        return None
+    return {key: _deserializer.deserialize(value) for key, value in image.items()}
+
+
+def parse_record(record):
+    """(old run, new run) of a stream record; None stands for no run"""
+    try:
+        return (
+            run_from_item(_image(record, "OldImage")),
+            run_from_item(_image(record, "NewImage")),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise PoisonRecordError(f"Not a run change: {e!r}") from e
+
+
+def _deltas(old_run, new_run, periods, key_for):
+    """Per-period (distance, seconds, runs) deltas of a change, zero deltas dropped"""
+    totals = defaultdict(lambda: [Decimal("0"), 0, 0])
+
+    for run, sign in ((old_run, -1), (new_run, 1)):
+        if run is None:
+            continue
+        for period in periods:
+            total = totals[key_for(period, run.date)]
+            total[0] += sign * Decimal(str(run.distance_km))
+            total[1] += sign * run.duration_seconds
+            total[2] += sign
+
+    return {key: tuple(total) for key, total in totals.items() if any(total)}
+
+
+def change_time(record):
+    """updated_at of the written item (a run or a tombstone), or None"""
+    image = _image(record, "NewImage") or {}
+    return image.get("updated_at")
+
+
+def _commit_units(event_id, user_id, units):
+    """Commit units of updates, each with its own event marker, in one transaction
+
+    `units` is a list of (name, updates). A unit whose marker already exists
+    was applied before and is dropped, as are the deltas of rebuilt entries;
+    the rest is retried.
+    """
+    while units:
+        transaction = Transaction()
+        positions = []  # (unit, update) of each action; update None for markers
+        for unit, (name, updates) in enumerate(units):
+            rollup_dal.add_event_marker(transaction, user_id, f"{event_id}#{name}")
+            positions.append((unit, None))
+            for update, (function, arguments) in enumerate(updates):
+                function(transaction, *arguments)
+                positions.append((unit, update))
+        try:
+            transaction.commit()
+            return
+        except TransactionCancelledError as e:
+            failed = {
+                positions[index]
+                for index, reason in enumerate(e.reasons)
+                if reason == "ConditionalCheckFailed"
+            }
+            if not failed:
+                raise
+
+        applied = {unit for unit, update in failed if update is None}
+        for unit in applied:
+            print(f"Stream event {event_id}#{units[unit][0]} already applied")  # Debug
+
+        # Leaderboard entries rebuilt after the change already count it
+        units = [
+            (name, [kept for index, kept in enumerate(updates) if (unit, index) not in failed])
+            for unit, (name, updates) in enumerate(units)
+            if unit not in applied
+        ]
+
+
+def apply_aggregates(event_id, old_run, new_run, changed_at=None):
+    """Apply a change's rollup and leaderboard deltas exactly once
+
+    `changed_at` is the change's updated_at (see change_time); entries
+    rebuilt later than that skip its deltas.
+    """
+    user_id = (new_run or old_run).user_id
+
+    rollups = _deltas(old_run, new_run, rollup_dal.PERIODS, rollup_dal.period_key)
+    boards, memberships = {}, []
+    if groups_enabled():
+        boards = _deltas(old_run, new_run, leaderboard_dal.PERIODS, leaderboard_dal.period_key)
+        if boards:
+            memberships = get_groups_for_user(user_id)
+
+    # Units of (function, arguments) updates: the user's rollups, then each
+    # group's entries. Markers are named after what a unit updates, not its
+    # position, so a redelivery that finds different memberships still
+    # skips exactly the units applied before.
+    units = []
+    if rollups:
+        units.append(
+            (
+                "rollups",
+                [
+                    (rollup_dal.add_rollup_update, (user_id, key, distance, seconds, runs))
+                    for key, (distance, seconds, runs) in rollups.items()
+                ],
+            )
+        )
+    for member in memberships:
+        units.append(
+            (
+                f"group#{member['group_id']}",
+                [
+                    (
+                        leaderboard_dal.add_entry_update,
+                        (member["group_id"], key, member, distance, runs, changed_at),
+                    )
+                    for key, (distance, _, runs) in boards.items()
+                ],
+            )
+        )
+
+    # Units are small (a few period keys each); pack whole units into
+    # transactions, so a batch that was partly applied before a failure
+    # resumes where it stopped
+    batch, actions = [], 0
+    for unit in units:
+        size = 1 + len(unit[1])
+        if batch and actions + size > MAX_ACTIONS:
+            _commit_units(event_id, user_id, batch)
+            batch, actions = [], 0
+        batch.append(unit)
+        actions += size
+    if batch:
+        _commit_units(event_id, user_id, batch)
+
+    # Periods the change emptied drop out of rollups and boards
+    for key, (_, _, runs) in rollups.items():
+        if runs < 0:
+            rollup_dal.remove_empty_rollup(user_id, key)
+    for member in memberships:
+        for key, (_, _, runs) in boards.items():
+            if runs < 0:
+                leaderboard_dal.remove_empty_entry(member["group_id"], key, user_id)
+
+
+def update_records(old_run, new_run):
+    """Keep personal bests in sync with a change"""
+    if old_run and new_run:
+        update_records_for_run_update(old_run, new_run)
+    elif new_run:
+        record_run(new_run)
+    else:
+        update_records_for_run_delete(old_run)
+
+
+def process_record(record):
+    """Apply one stream record"""
+    old_run, new_run = parse_record(record)
+    if old_run is None and new_run is None:
+        return  # A tombstone written or expiring - nothing derived changes
+
+    apply_aggregates(record["eventID"], old_run, new_run, change_time(record))
+    update_records(old_run, new_run)
+
+
+def dead_letter(record, error):
+    """Park a record that can't be processed on the dead-letter queue"""
+    print(f"Dead-lettering stream record {record.get('eventID')}: {error}")  # Debug
+
+    queue_url = os.environ.get("STREAM_DLQ_URL")
+    if not queue_url:
+        return
+
+    get_client("sqs").send_message(
+        QueueUrl=queue_url,
+        MessageBody=json.dumps({"error": str(error), "record": record}, default=str),
+    )
+
+
+def process_records(records):
+    """Process stream records in order; returns the batch item failures
+
+    Processing stops at the first failing record, which becomes the
+    checkpoint Lambda retries from.
+    """
+    for record in records:
+        try:
+            process_record(record)
+        except PoisonRecordError as e:
+            dead_letter(record, e)
+        except Exception as e:
+            print(f"Stream record {record.get('eventID')} failed: {e}")  # Debug
+            return [{"itemIdentifier": record["dynamodb"]["SequenceNumber"]}]
+    return []
+
+
+def lambda_handler(event, context):
+    """Stream consumer entry point (ReportBatchItemFailures)"""
+    token = set_deadline(context.get_remaining_time_in_millis()) if context else None
+    try:
+        return {"batchItemFailures": process_records(event.get("Records", []))}
+    finally:
+        if token is not None:
+            reset_deadline(token)
+
+
+def make_stream_record(
+    event_name, old_item=None, new_item=None, sequence_number=1, event_id=None
+):
+    """A Runs table stream record in Lambda's event format (for local runs and tests)"""
+    record = {
+        "eventID": event_id or f"local-{sequence_number}",
+        "eventName": event_name,
+        "eventSource": "aws:dynamodb",
+        "dynamodb": {
+            "SequenceNumber": str(sequence_number),
+            "StreamViewType": "NEW_AND_OLD_IMAGES",
+        },
+    }
+
+    item = new_item or old_item
+    if item:
+        record["dynamodb"]["Keys"] = {
+            "user_id": _serializer.serialize(item["user_id"]),
+            "run_id": _serializer.serialize(item["run_id"]),
+        }
+    for name, image in (("OldImage", old_item), ("NewImage", new_item)):
+        if image:
+            record["dynamodb"][name] = {
+                key: _serializer.serialize(value) for key, value in image.items()
+            }
+
+    return record
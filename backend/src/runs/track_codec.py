@@ -0,0 +1,122 @@
+# src/runs/track_codec.py
+"""Compact binary encoding of GPS tracks
+
+A track is a list of (latitude, longitude, seconds since start) points.
+Stored as JSON a 10k-point run takes ~400 KB; this encoding brings it to
+roughly 20-40 KB:
+
+- coordinates are fixed-point integers of 1e-5 degrees (~1 m), times of
+  0.1 s
+- every value is stored as the delta to the previous point, zigzag-mapped
+  to an unsigned integer and written as a LEB128 varint - consecutive GPS
+  fixes are close, so most deltas fit in one or two bytes
+- the varint stream is zlib-compressed
+
+Layout: b"TRK" + version byte + zlib(flags, point count, deltas...).
+Times are kept only when every point has one (flag bit 0).
+
+encode_polyline() renders the Google encoded polyline format that map
+libraries (Leaflet, Google Maps, Mapbox) decode natively.
+"""
+
+import zlib
+
+MAGIC = b"TRK"
+FORMAT_VERSION = 1
+
+COORDINATE_SCALE = 100_000
+TIME_SCALE = 10
+
+HAS_TIMES = 0x01
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varints(data):
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield value
+        value = shift = 0
+
+
+def encode_track(points):
+    """Encode (latitude, longitude, seconds or None) points as bytes"""
+    has_times = bool(points) and all(point[2] is not None for point in points)
+
+    body = bytearray()
+    _write_varint(body, HAS_TIMES if has_times else 0)
+    _write_varint(body, len(points))
+
+    last_lat = last_lon = last_time = 0
+    for lat, lon, seconds in points:
+        lat = round(lat * COORDINATE_SCALE)
+        lon = round(lon * COORDINATE_SCALE)
+        _write_varint(body, _zigzag(lat - last_lat))
+        _write_varint(body, _zigzag(lon - last_lon))
+        last_lat, last_lon = lat, lon
+
+        if has_times:
+            time = round(seconds * TIME_SCALE)
+            _write_varint(body, _zigzag(time - last_time))
+            last_time = time
+
+    return MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(bytes(body), 6)
+
+
+def decode_track(data):
+    """Decode bytes from encode_track back into (latitude, longitude, seconds) points"""
+    if data[:3] != MAGIC or data[3] != FORMAT_VERSION:
+        raise ValueError("Not an encoded track (or an unsupported version)")
+
+    values = _read_varints(zlib.decompress(data[4:]))
+    has_times = next(values) & HAS_TIMES
+    count = next(values)
+
+    points = []
+    lat = lon = time = 0
+    for _ in range(count):
+        lat += _unzigzag(next(values))
+        lon += _unzigzag(next(values))
+        seconds = None
+        if has_times:
+            time += _unzigzag(next(values))
+            seconds = time / TIME_SCALE
+        points.append((lat / COORDINATE_SCALE, lon / COORDINATE_SCALE, seconds))
+
+    return points
+
+
+def encode_polyline(points, precision=5):
+    """Google encoded polyline of the points' positions"""
+    factor = 10**precision
+    out = []
+    last_lat = last_lon = 0
+
+    for lat, lon, _ in points:
+        lat, lon = round(lat * factor), round(lon * factor)
+        for delta in (lat - last_lat, lon - last_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                out.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            out.append(chr(value + 63))
+        last_lat, last_lon = lat, lon
+
+    return "".join(out)
@@ -0,0 +1,440 @@
+# src/runs/track_import.py
+"""Activity file import - GPX, TCX and FIT files turned into Run models
+
+XML files are read with iterparse and every trackpoint element is dropped
+from the tree as soon as it has been read, so memory depends on the number
+of points kept (a few floats each), not on the size of the document. FIT
+files need the optional fitdecode package.
+
+Several files are parsed in parallel on a process pool (parsing is
+CPU-bound, so threads would just queue on the GIL). Where processes can't
+be started - AWS Lambda has no /dev/shm - files are parsed one by one.
+Parsed runs are written through the DAL in batches (run_dal.save_runs).
+
+Imported runs get a run_id derived from the user and the start time, so
+importing the same file twice overwrites the run instead of duplicating it.
+A run is dated by the day it started where it was run: FIT files record the
+device's local time; for other files the caller can pass the user's time
+zone, and UTC is used otherwise.
+"""
+
+import io
+import math
+import os
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from xml.etree.ElementTree import iterparse
+
+try:
+    import fitdecode
+except ImportError:  # fitdecode is optional - FIT files are rejected without it
+    fitdecode = None
+
+try:
+    from models.run import Run
+    from dal.run_dal import save_runs
+    from dal.records_dal import record_run
+    from dal.leaderboard_dal import refresh_leaderboard_entries
+    from dal.version_dal import bump_version
+    from dal.track_dal import save_track
+    from stream_processor import aggregates_from_stream
+except ImportError:
+    from .models.run import Run
+    from .dal.run_dal import save_runs
+    from .dal.records_dal import record_run
+    from .dal.leaderboard_dal import refresh_leaderboard_entries
+    from .dal.version_dal import bump_version
+    from .dal.track_dal import save_track
+    from .stream_processor import aggregates_from_stream
+
+SUPPORTED_EXTENSIONS = (".gpx", ".tcx", ".fit")
+
+# Namespace for run ids of imported activities
+IMPORT_NAMESPACE = uuid.UUID("6f1d4cbe-5a8e-4d8e-9a59-2f3b7a0c6d41")
+
+EARTH_RADIUS_M = 6371008.8
+
+# FIT positions are stored in semicircles
+SEMICIRCLES_TO_DEGREES = 180 / 2**31
+
+# FIT timestamps count seconds from this instant
+FIT_EPOCH = datetime(1989, 12, 31)
+
+
+class ParsedActivity:
+    """Summary and trackpoints of one activity file"""
+
+    def __init__(
+        self,
+        source,
+        start_time,
+        duration_seconds,
+        distance_m,
+        name="",
+        points=None,
+        utc_offset_seconds=None,
+    ):
+        self.source = source
+        self.start_time = start_time
+        # Device's offset from UTC, where the file records it (FIT)
+        self.utc_offset_seconds = utc_offset_seconds
+        self.duration_seconds = duration_seconds
+        self.distance_m = distance_m
+        self.name = name
+        # (latitude, longitude, seconds since start) per trackpoint
+        self.points = points or []
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres between two positions in degrees"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _parse_time(text):
+    """Parse an ISO 8601 timestamp as an aware UTC datetime"""
+    value = datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class _Track:
+    """Accumulates timed positions into distance, duration and points"""
+
+    def __init__(self):
+        self.start = None
+        self.end = None
+        self.distance_m = 0.0
+        self.points = []
+        self._last = None
+
+    def add(self, lat, lon, time):
+        if time is not None:
+            self.start = self.start or time
+            self.end = time
+        if lat is None or lon is None:
+            return
+
+        if self._last is not None:
+            self.distance_m += haversine_m(self._last[0], self._last[1], lat, lon)
+        self._last = (lat, lon)
+
+        offset = (time - self.start).total_seconds() if time and self.start else None
+        self.points.append((lat, lon, offset))
+
+
+def _iter_elements(source):
+    """Yield (local tag, element, parent) for every element as it is closed
+
+    Callers remove trackpoint elements from their parent once read, which
+    keeps the partial tree small.
+    """
+    parents = []
+    for event, elem in iterparse(source, events=("start", "end")):
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        parent = parents[-1] if parents else None
+        yield tag, elem, parent
+
+
+def _local(elem):
+    return elem.tag.rsplit("}", 1)[-1] if elem is not None else None
+
+
+def parse_gpx(source, name="activity.gpx"):
+    """Parse a GPX file (path or binary file object)"""
+    track = _Track()
+    title = ""
+    time = None
+
+    for tag, elem, parent in _iter_elements(source):
+        parent_tag = _local(parent)
+        if tag == "time" and parent_tag == "trkpt":
+            time = _parse_time(elem.text)
+        elif tag == "name" and parent_tag == "trk" and not title:
+            title = (elem.text or "").strip()
+        elif tag == "trkpt":
+            lat, lon = float(elem.get("lat")), float(elem.get("lon"))
+            track.add(lat, lon, time)
+            time = None
+            parent.remove(elem)
+
+    return _finish(name, track, title)
+
+
+def parse_tcx(source, name="activity.tcx"):
+    """Parse a TCX file (path or binary file object)
+
+    Lap totals recorded by the device take precedence over distance and
+    time derived from the trackpoints.
+    """
+    track = _Track()
+    title = ""
+    lap_seconds = lap_metres = 0.0
+    lat = lon = time = None
+    start = None
+
+    for tag, elem, parent in _iter_elements(source):
+        parent_tag = _local(parent)
+        if tag == "Id" and parent_tag == "Activity":
+            start = _parse_time(elem.text)
+        elif tag == "Notes" and parent_tag == "Activity":
+            title = (elem.text or "").strip()
+        elif tag == "TotalTimeSeconds" and parent_tag == "Lap":
+            lap_seconds += float(elem.text)
+        elif tag == "DistanceMeters" and parent_tag == "Lap":
+            lap_metres += float(elem.text)
+        elif tag == "Time" and parent_tag == "Trackpoint":
+            time = _parse_time(elem.text)
+        elif tag == "LatitudeDegrees":
+            lat = float(elem.text)
+        elif tag == "LongitudeDegrees":
+            lon = float(elem.text)
+        elif tag == "Trackpoint":
+            track.add(lat, lon, time)
+            lat = lon = time = None
+            parent.remove(elem)
+
+    activity = _finish(name, track, title, start)
+    if lap_seconds:
+        activity.duration_seconds = int(round(lap_seconds))
+    if lap_metres:
+        activity.distance_m = lap_metres
+    return activity
+
+
+def parse_fit(data, name="activity.fit"):
+    """Parse a FIT file's records and session summary (needs fitdecode)"""
+    if fitdecode is None:
+        raise ValueError("FIT import requires the fitdecode package")
+
+    track = _Track()
+    session = {}
+    utc_offset_seconds = None
+
+    with fitdecode.FitReader(io.BytesIO(data)) as reader:
+        for frame in reader:
+            if frame.frame_type != fitdecode.FIT_FRAME_DATA:
+                continue
+            if frame.name == "record":
+                lat = frame.get_value("position_lat", fallback=None)
+                lon = frame.get_value("position_long", fallback=None)
+                time = frame.get_value("timestamp", fallback=None)
+                if lat is not None and lon is not None:
+                    lat, lon = lat * SEMICIRCLES_TO_DEGREES, lon * SEMICIRCLES_TO_DEGREES
+                track.add(lat, lon, time.astimezone(timezone.utc) if time else None)
+            elif frame.name == "session":
+                for field in ("start_time", "total_timer_time", "total_distance"):
+                    value = frame.get_value(field, fallback=None)
+                    if value is not None:
+                        session[field] = value
+            elif frame.name == "activity":
+                timestamp = frame.get_value("timestamp", fallback=None)
+                local_timestamp = frame.get_value("local_timestamp", fallback=None)
+                if timestamp is not None and local_timestamp is not None:
+                    utc_offset_seconds = fit_utc_offset(timestamp, local_timestamp)
+
+    start = session.get("start_time")
+    activity = _finish(name, track, "", start.astimezone(timezone.utc) if start else None)
+    if session.get("total_timer_time"):
+        activity.duration_seconds = int(round(session["total_timer_time"]))
+    if session.get("total_distance"):
+        activity.distance_m = float(session["total_distance"])
+    activity.utc_offset_seconds = utc_offset_seconds
+    return activity
+
+
+def fit_utc_offset(timestamp, local_timestamp):
+    """Device's UTC offset in seconds from a FIT activity message, or None
+
+    local_timestamp is the device's wall-clock time encoded like a UTC
+    timestamp; fitdecode returns it as a datetime or as raw seconds since
+    the FIT epoch. Offsets are rounded to a quarter hour, as the two
+    timestamps can be a second apart.
+    """
+    if isinstance(local_timestamp, (int, float)):
+        local = FIT_EPOCH + timedelta(seconds=local_timestamp)
+    else:
+        local = local_timestamp.replace(tzinfo=None)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    quarters = round((local - timestamp).total_seconds() / 900)
+    if abs(quarters) > 14 * 4:  # beyond any real time zone: a bad clock
+        return None
+    return quarters * 900
+
+
+def _finish(name, track, title, start=None):
+    start = start or track.start
+    if start is None:
+        raise ValueError(f"{name}: no timestamps found")
+
+    duration = (track.end - track.start).total_seconds() if track.end else 0
+    return ParsedActivity(
+        source=name,
+        start_time=start,
+        duration_seconds=int(round(duration)),
+        distance_m=track.distance_m,
+        name=title,
+        points=track.points,
+    )
+
+
+def detect_format(filename, data):
+    """Activity format ("gpx", "tcx" or "fit") from the file name or contents"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in SUPPORTED_EXTENSIONS:
+        return extension[1:]
+
+    if data[8:12] == b".FIT":
+        return "fit"
+    head = data[:2048]
+    if b"<gpx" in head:
+        return "gpx"
+    if b"TrainingCenterDatabase" in head:
+        return "tcx"
+    raise ValueError(f"{filename or 'upload'}: unsupported file type, expected GPX, TCX or FIT")
+
+
+def parse_activity(filename, data):
+    """Parse one activity file given as bytes"""
+    file_format = detect_format(filename, data)
+    if file_format == "gpx":
+        return parse_gpx(io.BytesIO(data), filename)
+    if file_format == "tcx":
+        return parse_tcx(io.BytesIO(data), filename)
+    return parse_fit(data, filename)
+
+
+def _parse_entry(entry):
+    """Process-pool task: (filename, bytes) -> (filename, activity, error)"""
+    filename, data = entry
+    try:
+        return filename, parse_activity(filename, data), None
+    except Exception as e:  # Bad files are reported, not fatal to the batch
+        return filename, None, str(e)
+
+
+def parse_files(entries, workers=None):
+    """Parse (filename, bytes) entries, in parallel when there are several
+
+    Returns (filename, ParsedActivity or None, error or None) per entry, in
+    input order.
+    """
+    entries = list(entries)
+    if workers is None:
+        workers = int(os.environ.get("IMPORT_WORKERS", str(os.cpu_count() or 1)))
+    workers = min(workers, len(entries))
+
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(_parse_entry, entries))
+        except (OSError, NotImplementedError) as e:
+            # No multiprocessing primitives (e.g. AWS Lambda) - parse inline
+            print(f"Process pool unavailable, parsing serially: {e}")  # Debug
+
+    return [_parse_entry(entry) for entry in entries]
+
+
+def unpack_upload(filename, data, max_files=100, max_bytes=50 * 1024 * 1024):
+    """Split an upload into (filename, bytes) entries - a zip holds several files"""
+    if not zipfile.is_zipfile(io.BytesIO(data)):
+        return [(filename or "upload", data)]
+
+    entries = []
+    total = 0
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            total += info.file_size
+            if len(entries) >= max_files or total > max_bytes:
+                raise ValueError(
+                    f"Archive too large: at most {max_files} files and {max_bytes} bytes"
+                )
+            entries.append((info.filename, archive.read(info)))
+
+    return entries
+
+
+def format_duration(duration_seconds):
+    hours, remainder = divmod(int(duration_seconds), 3600)
+    return f"{hours:02d}:{remainder // 60:02d}:{remainder % 60:02d}"
+
+
+def local_start_date(activity, tz=None):
+    """Day the activity started, in the device's time or else in `tz` (default UTC)"""
+    if activity.utc_offset_seconds is not None:
+        return (activity.start_time + timedelta(seconds=activity.utc_offset_seconds)).date()
+    if tz is not None:
+        return activity.start_time.astimezone(tz).date()
+    return activity.start_time.date()
+
+
+def activity_to_run(activity, user_id, tz=None):
+    """Turn a parsed activity into a Run with a stable, import-derived run_id
+
+    `tz` (a tzinfo, e.g. the user's ZoneInfo) dates activities whose file
+    doesn't record local time.
+    """
+    if activity.distance_m <= 0 or activity.duration_seconds <= 0:
+        raise ValueError(f"{activity.source}: no distance or duration")
+
+    run = Run(
+        user_id=user_id,
+        date=local_start_date(activity, tz),
+        distance_km=Decimal(str(round(activity.distance_m / 1000, 2))),
+        duration=format_duration(activity.duration_seconds),
+        notes=activity.name,
+    )
+    run.run_id = str(uuid.uuid5(IMPORT_NAMESPACE, f"{user_id}:{activity.start_time.isoformat()}"))
+    return run
+
+
+def save_imported_runs(runs, tracks=None):
+    """Write imported runs in batches, then update versions, records and leaderboards
+
+    `tracks` maps run_id to trackpoints; those go to the track store first,
+    so a run item never references a track that wasn't written. Versions
+    are bumped right after the batch: the bump also stamps the write time
+    the leaderboard refresh checks before reading runs through the indexes.
+    """
+    if not runs:
+        return
+
+    for run in runs:
+        points = (tracks or {}).get(run.run_id)
+        if points:
+            run.track_key = save_track(run.user_id, run.run_id, points)
+            run.track_points = len(points)
+
+    save_runs(runs)
+
+    user_ids = {run.user_id for run in runs}
+    for user_id in user_ids:
+        bump_version(user_id, "runs")
+
+    if not aggregates_from_stream():
+        # Only runs in a distance bucket can set a record
+        for run in runs:
+            record_run(run)
+
+        # A re-import overwrites runs that were counted already, so the
+        # leaderboard entries of the periods touched are recomputed, not added to
+        for user_id in user_ids:
+            refresh_leaderboard_entries(
+                user_id, {run.date for run in runs if run.user_id == user_id}
+            )
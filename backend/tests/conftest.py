@@ -1 +1,202 @@
- 
+# tests/conftest.py
+"""Shared fixtures: JWT auth headers and moto-backed tables, buckets and queues
+
+A test file lists the resources it uses and leaves the rest to `aws`:
+
+    @pytest.fixture
+    def mock_dynamodb(aws):
+        return aws("runs", "records", "versions", buckets={"TRACKS_BUCKET": "test-tracks"})
+
+Table layouts (keys and indexes) follow template.yaml.
+"""
+
+import importlib
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import boto3
+import jwt
+import pytest
+from moto import mock_aws
+
+USER_ID = "test-user-123"
+JWT_SECRET = "test-secret"
+
+# Table kind: environment variable, table name, (hash, range) key, indexes
+TABLES = {
+    "runs": (
+        "RUNS_TABLE",
+        "test-runs",
+        ("user_id", "run_id"),
+        {
+            "user-date-index": ("user_id", "run_date"),
+            "user-pace-index": ("user_id", "pace_key"),
+            "user-updated-index": ("user_id", "updated_at"),
+            "user-year-index": ("user_year", "date"),
+        },
+    ),
+    "records": ("RECORDS_TABLE", "test-records", ("user_id", "bucket"), {}),
+    "targets": ("TARGETS_TABLE", "test-targets", ("user_id", "target_id"), {}),
+    "versions": ("VERSIONS_TABLE", "test-versions", ("user_id",), {}),
+    "users": ("USERS_TABLE", "test-users", ("user_id",), {"email-index": ("email",)}),
+    "exports": ("EXPORTS_TABLE", "test-exports", ("user_id", "export_id"), {}),
+    "groups": (
+        "GROUPS_TABLE",
+        "test-groups",
+        ("group_id", "member_id"),
+        {"user-groups-index": ("user_id", "group_id")},
+    ),
+    "leaderboards": (
+        "LEADERBOARDS_TABLE",
+        "test-leaderboards",
+        ("board", "user_id"),
+        {"board-distance-index": ("board", "distance_km")},
+    ),
+    "rollups": ("ROLLUPS_TABLE", "test-rollups", ("user_id", "period_key"), {}),
+}
+
+# Key attributes that are numbers rather than strings
+NUMBER_ATTRIBUTES = {"distance_km"}
+
+# Modules that hold table handles, clients or settings from import time; they
+# are imported afresh inside each test's mock
+APP_MODULES = [
+    "src.runs.app",
+    "src.runs.export",
+    "src.runs.export_jobs",
+    "src.runs.stream_processor",
+    "src.runs.track_import",
+    "src.runs.models.target",
+    "src.runs.models.user",
+    "src.runs.auth.cognito_service",
+    "src.runs.auth.jwt_middleware",
+    "src.runs.dal.dynamodb",
+    "src.runs.dal.aws_clients",
+    "src.runs.dal.run_dal",
+    "src.runs.dal.version_dal",
+    "src.runs.dal.records_dal",
+    "src.runs.dal.target_dal",
+    "src.runs.dal.user_dal",
+    "src.runs.dal.track_dal",
+    "src.runs.dal.export_job_dal",
+    "src.runs.dal.group_dal",
+    "src.runs.dal.leaderboard_dal",
+    "src.runs.dal.rollup_dal",
+]
+
+
+def _key_schema(keys):
+    return [
+        {"AttributeName": name, "KeyType": key_type}
+        for name, key_type in zip(keys, ("HASH", "RANGE"))
+    ]
+
+
+def create_table(dynamodb, kind, table_name=None):
+    """Create a table of one of the TABLES kinds"""
+    _, default_name, keys, indexes = TABLES[kind]
+
+    attributes = dict.fromkeys(keys)
+    for index_keys in indexes.values():
+        attributes.update(dict.fromkeys(index_keys))
+
+    kwargs = {
+        "TableName": table_name or default_name,
+        "KeySchema": _key_schema(keys),
+        "AttributeDefinitions": [
+            {"AttributeName": name, "AttributeType": "N" if name in NUMBER_ATTRIBUTES else "S"}
+            for name in attributes
+        ],
+        "BillingMode": "PAY_PER_REQUEST",
+    }
+    if indexes:
+        kwargs["GlobalSecondaryIndexes"] = [
+            {
+                "IndexName": index_name,
+                "KeySchema": _key_schema(index_keys),
+                "Projection": {"ProjectionType": "ALL"},
+            }
+            for index_name, index_keys in indexes.items()
+        ]
+    return dynamodb.create_table(**kwargs)
+
+
+def reload_app_modules():
+    for module in APP_MODULES:
+        sys.modules.pop(module, None)
+
+
+def make_auth_headers(user_id=USER_ID):
+    """Authorization header with a valid JWT for a user"""
+    payload = {
+        "sub": user_id,
+        "email": f"{user_id}@example.com",
+        "exp": datetime.utcnow() + timedelta(hours=1),
+    }
+    token = jwt.encode(payload, JWT_SECRET, algorithm="HS256")
+
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def auth_headers():
+    """Create valid JWT token for authentication"""
+    return make_auth_headers()
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """Start moto; returns a function that creates the test's resources
+
+    aws(*table_kinds, buckets={env var: name}, queues={env var: name})
+    creates the tables, buckets and queues, points their environment
+    variables at them, re-imports the app modules and returns the DynamoDB
+    resource.
+    """
+    with mock_aws():
+        monkeypatch.setenv("JWT_SECRET", JWT_SECRET)
+
+        def create(*kinds, buckets=None, queues=None):
+            dynamodb = boto3.resource("dynamodb", region_name="us-east-1")
+            for kind in kinds:
+                monkeypatch.setenv(TABLES[kind][0], TABLES[kind][1])
+                create_table(dynamodb, kind)
+
+            s3 = boto3.client("s3", region_name="us-east-1")
+            for env_var, bucket in (buckets or {}).items():
+                s3.create_bucket(Bucket=bucket)
+                monkeypatch.setenv(env_var, bucket)
+
+            sqs = boto3.client("sqs", region_name="us-east-1")
+            for env_var, queue_name in (queues or {}).items():
+                monkeypatch.setenv(env_var, sqs.create_queue(QueueName=queue_name)["QueueUrl"])
+
+            reload_app_modules()
+            return dynamodb
+
+        yield create
+
+
+@pytest.fixture
+def save_run_with_track():
+    """Save a run of the test user together with its GPS track"""
+
+    def save(points, distance_km="8.2", duration="00:45:00"):
+        from src.runs.models.run import Run
+
+        run_dal = importlib.import_module("src.runs.dal.run_dal")
+        track_dal = importlib.import_module("src.runs.dal.track_dal")
+
+        run = Run(
+            user_id=USER_ID,
+            date=date(2024, 5, 1),
+            distance_km=Decimal(distance_km),
+            duration=duration,
+        )
+        run.track_key = track_dal.save_track(run.user_id, run.run_id, points)
+        run.track_points = len(points)
+        run_dal.save_run(run)
+        return run
+
+    return save
@@ -39,6 +39,8 @@ def mock_dynamodb():
         os.environ["RUNS_TABLE"] = "test-runs-enhanced"
         os.environ["USERS_TABLE"] = "test-users"
         os.environ["TARGETS_TABLE"] = "test-targets"
+        os.environ["RECORDS_TABLE"] = "test-records"
+        os.environ["VERSIONS_TABLE"] = "test-versions"
         os.environ["JWT_SECRET"] = "test-secret"  # CRITICAL: Set this early
 
         # FORCE MODULE RELOAD to pick up new environment variables
@@ -47,6 +49,8 @@ def mock_dynamodb():
             "src.runs.dal.run_dal",
             "src.runs.dal.user_dal",
             "src.runs.dal.target_dal",
+            "src.runs.dal.records_dal",
+            "src.runs.dal.version_dal",
             "src.runs.auth.jwt_middleware",  # Add this too!
         ]
         for module in modules_to_reload:
@@ -80,6 +84,29 @@ def mock_dynamodb():
             BillingMode="PAY_PER_REQUEST",
         )
 
+        # Personal records are maintained on every run write
+        dynamodb.create_table(
+            TableName="test-records",
+            KeySchema=[
+                {"AttributeName": "user_id", "KeyType": "HASH"},
+                {"AttributeName": "bucket", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "user_id", "AttributeType": "S"},
+                {"AttributeName": "bucket", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        dynamodb.create_table(
+            TableName="test-versions",
+            KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "user_id", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
         yield dynamodb
 
 
@@ -125,6 +125,14 @@ class TestAPIJWTAuthentication:
             ],
             BillingMode="PAY_PER_REQUEST",
         )
+        versions_table = dynamodb.create_table(
+            TableName="test-versions",
+            KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "user_id", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
 
         # Create valid JWT token
         payload = {
@@ -0,0 +1,79 @@
+# tests/test_async_dal.py
+"""Test the executor-backed async DAL and async endpoints"""
+
+import asyncio
+import inspect
+import threading
+import time
+
+import pytest
+
+from src.runs.dal.async_dal import call_async
+
+
+def test_call_async_runs_on_dal_thread_pool():
+    """Test that blocking DAL calls run off the event loop thread"""
+
+    def blocking_call(value):
+        return value, threading.current_thread().name
+
+    value, thread_name = asyncio.run(call_async(blocking_call, 42))
+
+    assert value == 42
+    assert thread_name.startswith("dal")
+
+
+def test_call_async_keeps_many_calls_in_flight():
+    """Test that concurrent calls overlap instead of running one at a time"""
+
+    def slow_call(index):
+        time.sleep(0.2)
+        return index
+
+    async def fan_out():
+        return await asyncio.gather(*(call_async(slow_call, i) for i in range(50)))
+
+    started = time.perf_counter()
+    results = asyncio.run(fan_out())
+    elapsed = time.perf_counter() - started
+
+    assert results == list(range(50))
+    assert elapsed < 2.0  # 50 sequential calls would take 10 seconds
+
+
+def test_inline_mode_uses_sync_dal_directly(monkeypatch):
+    """Test the inline fallback calls the sync function on the caller's thread"""
+    monkeypatch.setenv("DAL_EXECUTOR", "inline")
+
+    def blocking_call():
+        return threading.current_thread().name
+
+    assert asyncio.run(call_async(blocking_call)) == threading.current_thread().name
+
+
+def test_call_async_propagates_exceptions():
+    """Test that DAL errors surface to the awaiting endpoint"""
+
+    def failing_call():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(call_async(failing_call))
+
+
+def test_endpoints_are_async():
+    """Test that the API endpoints are coroutines (no threadpool hop)"""
+    from src.runs import app as app_module
+
+    for endpoint in [
+        app_module.get_current_user_id,
+        app_module.create_run,
+        app_module.get_runs,
+        app_module.update_run,
+        app_module.delete_run,
+        app_module.create_target,
+        app_module.get_targets,
+        app_module.update_target,
+        app_module.delete_target,
+    ]:
+        assert inspect.iscoroutinefunction(endpoint), endpoint.__name__
@@ -0,0 +1,114 @@
+# tests/test_compression.py
+"""Test response compression negotiation and thresholds"""
+
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.runs.compression import CompressionMiddleware, choose_encoding
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/small")
+    def small():
+        return {"status": "ok"}
+
+    @app.get("/large")
+    def large():
+        return [{"run_id": str(i), "notes": "easy run"} for i in range(200)]
+
+    @app.get("/text")
+    def text():
+        return PlainTextResponse("x" * 500)
+
+    @app.get("/stream")
+    def stream():
+        def rows():
+            for i in range(100):
+                yield f"{i},row\n"
+
+        return StreamingResponse(rows(), media_type="text/csv")
+
+    return TestClient(app)
+
+
+def _raw_get(client, path, accept_encoding):
+    """GET without letting the client decode the body"""
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+class TestChooseEncoding:
+    def test_prefers_brotli_when_available(self):
+        """Test that br wins ties when brotli is installed"""
+        pytest.importorskip("brotli")
+
+        assert choose_encoding("gzip, deflate, br") == "br"
+
+    def test_respects_q_values(self):
+        """Test that q-values decide between codings"""
+        assert choose_encoding("br;q=0.5, gzip") == "gzip"
+        assert choose_encoding("gzip;q=0") is None
+
+    def test_no_supported_encoding(self):
+        """Test that unsupported or missing codings disable compression"""
+        assert choose_encoding("") is None
+        assert choose_encoding("identity") is None
+        assert choose_encoding("deflate") is None
+
+
+class TestCompressionMiddleware:
+    def test_large_json_is_gzipped(self, client):
+        """Test that bodies above the threshold are compressed"""
+        response, raw = _raw_get(client, "/large", "gzip")
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) == len(raw)
+        assert gzip.decompress(raw).startswith(b'[{"run_id":"0"')
+
+    def test_large_json_is_brotli_encoded(self, client):
+        """Test brotli encoding when the client prefers it"""
+        brotli = pytest.importorskip("brotli")
+
+        response, raw = _raw_get(client, "/large", "br")
+
+        assert response.headers["content-encoding"] == "br"
+        assert brotli.decompress(raw).startswith(b'[{"run_id":"0"')
+
+    def test_small_body_is_not_compressed(self, client):
+        """Test that bodies below the threshold are sent as-is"""
+        response, raw = _raw_get(client, "/small", "gzip")
+
+        assert "content-encoding" not in response.headers
+        assert raw == b'{"status":"ok"}'
+
+    def test_no_accept_encoding(self, client):
+        """Test that clients without Accept-Encoding get identity bodies"""
+        response, raw = _raw_get(client, "/large", "identity")
+
+        assert "content-encoding" not in response.headers
+        assert raw.startswith(b'[{"run_id":"0"')
+
+    def test_text_is_compressed(self, client):
+        """Test that text responses are compressible too"""
+        response, raw = _raw_get(client, "/text", "gzip")
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(raw) == b"x" * 500
+
+    def test_streaming_response_is_compressed_incrementally(self, client):
+        """Test that streamed bodies are compressed chunk by chunk"""
+        response, raw = _raw_get(client, "/stream", "gzip")
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        body = gzip.decompress(raw).decode()
+        assert body.splitlines()[0] == "0,row"
+        assert len(body.splitlines()) == 100
@@ -0,0 +1,61 @@
+# tests/test_cost_report.py
+"""Test the offline cost-per-endpoint report built from EMF log lines"""
+
+import json
+
+from tools.cost_report import format_table, main, parse_records, summarize
+
+
+def _emf_line(route, rcu, wcu, total_ms, prefix="2025-06-01T10:00:00.000Z\tabc-123\t"):
+    record = {
+        "_aws": {"Timestamp": 0, "CloudWatchMetrics": []},
+        "Route": route,
+        "StatusCode": 200,
+        "ConsumedReadCapacity": rcu,
+        "ConsumedWriteCapacity": wcu,
+        "total": total_ms,
+    }
+    return prefix + json.dumps(record) + "\n"
+
+
+LOG = [
+    "START RequestId: abc-123\n",
+    _emf_line("GET /runs", 10.0, 0.0, 40.0),
+    "Retrieved 120 runs from database\n",
+    _emf_line("GET /runs", 12.0, 0.0, 60.0, prefix=""),
+    _emf_line("POST /runs", 0.0, 4.0, 30.0),
+    '{"_aws": truncated\n',
+]
+
+
+def test_parse_records_skips_other_log_lines():
+    """Test that only complete EMF records are read, with or without prefixes"""
+    records = list(parse_records(LOG))
+
+    assert [record["Route"] for record in records] == ["GET /runs", "GET /runs", "POST /runs"]
+
+
+def test_summarize_prices_and_sorts_routes():
+    """Test per-route totals, per-request units and cost ordering"""
+    rows = summarize(parse_records(LOG), read_price=1.0, write_price=10.0)
+
+    assert [row["route"] for row in rows] == ["POST /runs", "GET /runs"]
+    runs = rows[1]
+    assert runs["requests"] == 2
+    assert runs["rcu"] == 22.0
+    assert runs["rcu_per_request"] == 11.0
+    assert runs["cost"] == 22.0 / 1_000_000
+    assert rows[0]["share"] + rows[1]["share"] == 1.0
+
+
+def test_main_prints_table(tmp_path, capsys):
+    """Test the command line entry point"""
+    log_file = tmp_path / "api.log"
+    log_file.write_text("".join(LOG))
+
+    assert main([str(log_file)]) == 0
+
+    output = capsys.readouterr().out
+    assert output.splitlines()[0].startswith("Route")
+    assert "GET /runs" in output
+    assert output == format_table(summarize(parse_records(LOG))) + "\n"
@@ -13,7 +13,12 @@ from src.runs.models.target import Target
 
 # Import DAL functions (we'll create these next)
 from src.runs.dal.user_dal import save_user, get_user_by_id, get_user_by_email
-from src.runs.dal.run_dal import save_run, get_runs_by_user, get_run_by_id
+from src.runs.dal.run_dal import (
+    save_run,
+    get_runs_by_user,
+    get_run_by_id,
+    delete_run_by_id,
+)
 from src.runs.dal.target_dal import save_target, get_targets_by_user
 
 
@@ -24,6 +29,7 @@ def dynamodb_tables():
     os.environ["USERS_TABLE"] = "test-users"
     os.environ["RUNS_TABLE"] = "test-runs"
     os.environ["TARGETS_TABLE"] = "test-targets"
+    os.environ["VERSIONS_TABLE"] = "test-versions"
 
     # FORCE MODULE RELOAD to pick up new environment variables
     dal_modules = [
@@ -107,7 +113,20 @@ def dynamodb_tables():
             BillingMode="PAY_PER_REQUEST",
         )
 
-        yield {"users": users_table, "runs": runs_table, "targets": targets_table}
+        # Create Versions table (run writes bump the runs version)
+        versions_table = dynamodb.create_table(
+            TableName="test-versions",
+            KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "user_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        yield {
+            "users": users_table,
+            "runs": runs_table,
+            "targets": targets_table,
+            "versions": versions_table,
+        }
 
 
 class TestUserDAL:
@@ -263,6 +282,27 @@ class TestRunDAL:
             assert float(retrieved_run.distance_km) == float(original_distance)
             assert retrieved_run.notes == f"Test distance: {original_distance}"
 
+    def test_delete_run_leaves_tombstone(self, dynamodb_tables):
+        """Test that deleting a run hides it but keeps a tombstone for delta sync"""
+        run = Run(
+            user_id="user123",
+            date=date(2024, 1, 15),
+            distance_km=Decimal("5.0"),
+            duration="00:25:00",
+        )
+        save_run(run)
+
+        delete_run_by_id(run.run_id, "user123")
+
+        assert get_run_by_id("user123", run.run_id) is None
+        assert get_runs_by_user("user123") == []
+
+        tombstone = dynamodb_tables["runs"].get_item(
+            Key={"user_id": "user123", "run_id": run.run_id}
+        )["Item"]
+        assert "deleted_at" in tombstone
+        assert "expires_at" in tombstone
+
 
 class TestTargetDAL:
     def test_save_and_get_target(self, dynamodb_tables):
@@ -279,3 +319,17 @@ class TestTargetDAL:
         targets = get_targets_by_user("user123")
         assert len(targets) == 1
         assert targets[0].distance_km == Decimal("100.0")
+
+    def test_get_targets_with_field_projection(self, dynamodb_tables):
+        """Test that a field set limits the attributes read"""
+        target = Target(
+            user_id="user123",
+            target_type="yearly",
+            period="2024",
+            distance_km=Decimal("1000.0"),
+        )
+
+        save_target(target)
+
+        items = get_targets_by_user("user123", fields={"period", "distance_km"})
+        assert items == [{"period": "2024", "distance_km": Decimal("1000.0")}]
@@ -0,0 +1,102 @@
+# tests/test_dashboard.py
+"""Test the combined home-page payload from GET /dashboard"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def mock_dynamodb(aws):
+    return aws("runs", "records", "targets", "versions")
+
+
+def _post_run(client, headers, run_date, distance_km):
+    run_data = {"date": run_date, "distance_km": distance_km, "duration": "00:30:00"}
+    assert client.post("/runs", json=run_data, headers=headers).status_code == 201
+
+
+def _post_target(client, headers, target_type, period, distance_km):
+    target_data = {"target_type": target_type, "period": period, "distance_km": distance_km}
+    assert client.post("/targets", json=target_data, headers=headers).status_code == 201
+
+
+def test_dashboard_returns_runs_targets_and_progress(mock_dynamodb, auth_headers):
+    """Test that the dashboard combines current-year runs, targets and progress"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    _post_run(client, auth_headers, "2024-05-02", 5.0)
+    _post_run(client, auth_headers, "2024-05-20", 10.25)
+    _post_run(client, auth_headers, "2024-02-10", 8.0)
+    _post_run(client, auth_headers, "2023-12-31", 21.1)  # Previous year
+    _post_target(client, auth_headers, "monthly", "2024-05", 100.0)
+    _post_target(client, auth_headers, "yearly", "2024", 20.0)
+    _post_target(client, auth_headers, "monthly", "2024-04", 50.0)  # Not current
+
+    response = client.get("/dashboard?as_of=2024-05-21", headers=auth_headers)
+
+    assert response.status_code == 200
+    dashboard = response.json()
+    assert dashboard["as_of"] == "2024-05-21"
+    assert sorted(run["date"] for run in dashboard["runs"]) == [
+        "2024-02-10",
+        "2024-05-02",
+        "2024-05-20",
+    ]
+    assert len(dashboard["targets"]) == 3
+
+    progress = {item["period"]: item for item in dashboard["progress"]}
+    assert set(progress) == {"2024-05", "2024"}
+    assert progress["2024-05"]["current"] == 15.3
+    assert progress["2024-05"]["percentage"] == 15
+    assert progress["2024-05"]["remaining"] == 84.7
+    assert progress["2024"]["current"] == 23.3
+    assert progress["2024"]["percentage"] == 100  # Capped
+    assert progress["2024"]["remaining"] == 0
+
+
+def test_dashboard_reads_concurrently(mock_dynamodb, auth_headers, monkeypatch):
+    """Test that runs and targets are fetched in parallel, not one after another"""
+    import time
+    from src.runs.app import app
+    from src.runs.dal import run_dal, target_dal
+
+    def slow_runs(user_id, start_date, end_date, consistent=False):
+        time.sleep(0.5)
+        return []
+
+    def slow_targets(user_id, fields=None, consistent=False):
+        time.sleep(0.5)
+        return []
+
+    monkeypatch.setattr(run_dal, "get_runs_by_user_in_range", slow_runs)
+    monkeypatch.setattr(target_dal, "get_targets_by_user", slow_targets)
+
+    client = TestClient(app)
+
+    started = time.perf_counter()
+    response = client.get("/dashboard", headers=auth_headers)
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert elapsed < 0.9  # Sequential reads would take at least 1 second
+
+
+def test_dashboard_rejects_bad_date(mock_dynamodb, auth_headers):
+    """Test that an invalid as_of returns 422"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    response = client.get("/dashboard?as_of=May", headers=auth_headers)
+
+    assert response.status_code == 422
+
+
+def test_dashboard_requires_authentication(mock_dynamodb):
+    """Test that GET /dashboard requires a token"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    assert client.get("/dashboard").status_code == 403
@@ -0,0 +1,100 @@
+# tests/test_dynamodb_retry.py
+"""Test the DynamoDB retry policy, invocation time budget and throttling 503s"""
+
+import importlib
+import pytest
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+
+
+def _throttling_error():
+    return ClientError(
+        {"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow down"}},
+        "Query",
+    )
+
+
+@pytest.fixture
+def dynamodb_module(aws):
+    """Fresh dynamodb module (new resource, zeroed counters) under moto"""
+    aws("versions")
+    return importlib.import_module("src.runs.dal.dynamodb")
+
+
+class TestRetryPolicy:
+    def test_client_uses_adaptive_retries(self, dynamodb_module):
+        """Test that tables share one client with adaptive rate limiting"""
+        table = dynamodb_module.get_table("VERSIONS_TABLE", "test-versions")
+        other = dynamodb_module.get_table("RUNS_TABLE", "test-runs")
+
+        assert table.meta.client is other.meta.client
+        assert table.meta.client.meta.config.retries["mode"] == "adaptive"
+
+    def test_counts_calls_retries_and_throttles(self, dynamodb_module):
+        """Test the counters fed by the client's event hooks"""
+        table = dynamodb_module.get_table("VERSIONS_TABLE", "test-versions")
+        table.get_item(Key={"user_id": "u1"})
+
+        throttled = (None, {"Error": {"Code": "ThrottlingException"}})
+        dynamodb_module._record_response(response=throttled)
+        dynamodb_module._record_call(parsed={"ResponseMetadata": {"RetryAttempts": 2}})
+
+        stats = dynamodb_module.dynamodb_stats()
+        assert stats["calls"] == 2
+        assert stats["retries"] == 2
+        assert stats["throttles"] == 1
+
+    def test_exhausted_budget_fails_fast(self, dynamodb_module):
+        """Test that no attempt starts once the invocation is nearly over"""
+        table = dynamodb_module.get_table("VERSIONS_TABLE", "test-versions")
+
+        token = dynamodb_module.set_deadline(remaining_ms=50)
+        try:
+            with pytest.raises(dynamodb_module.DeadlineExceededError):
+                table.get_item(Key={"user_id": "u1"})
+        finally:
+            dynamodb_module.reset_deadline(token)
+
+        assert dynamodb_module.dynamodb_stats()["deadline_exceeded"] == 1
+        table.get_item(Key={"user_id": "u1"})  # no deadline outside Lambda
+
+    def test_consumed_capacity_accounting(self, dynamodb_module, monkeypatch):
+        """Test that capacity is requested on every call unless configured off"""
+        table = dynamodb_module.get_table("VERSIONS_TABLE", "test-versions")
+
+        table.put_item(Item={"user_id": "u1"})
+        table.get_item(Key={"user_id": "u1"})
+        stats = dynamodb_module.dynamodb_stats()
+        assert stats["read_capacity"] > 0
+        assert stats["write_capacity"] > 0
+
+        monkeypatch.setenv("DYNAMODB_RETURN_CONSUMED_CAPACITY", "NONE")
+        response = table.get_item(Key={"user_id": "u1"})
+        assert "ConsumedCapacity" not in response
+        assert dynamodb_module.dynamodb_stats()["read_capacity"] == stats["read_capacity"]
+
+    def test_is_throttling_error(self, dynamodb_module):
+        """Test which errors are reported as throttling"""
+        assert dynamodb_module.is_throttling_error(_throttling_error())
+        assert dynamodb_module.is_throttling_error(dynamodb_module.DeadlineExceededError())
+        assert not dynamodb_module.is_throttling_error(ValueError("bad input"))
+        assert not dynamodb_module.is_throttling_error(None)
+
+
+def test_throttled_endpoint_returns_503(dynamodb_module, auth_headers, monkeypatch):
+    """Test that throttling surfaces as a retryable 503, not a 500"""
+    app_module = importlib.import_module("src.runs.app")
+
+    def throttled(*args, **kwargs):
+        raise _throttling_error()
+
+    monkeypatch.setattr(app_module, "get_version", throttled)
+
+    client = TestClient(app_module.app)
+    response = client.get("/runs", headers=auth_headers)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+    # Other failures keep their status codes
+    assert client.get("/runs").status_code in (401, 403)
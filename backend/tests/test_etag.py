@@ -0,0 +1,155 @@
+# tests/test_etag.py
+"""Test ETag / If-None-Match support on GET /runs and GET /targets"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def mock_dynamodb(aws):
+    return aws("runs", "records", "targets", "versions")
+
+
+RUN_DATA = {"date": "2024-03-10", "distance_km": 5.0, "duration": "00:25:00"}
+
+
+def test_get_runs_returns_strong_etag(mock_dynamodb, auth_headers):
+    """Test that GET /runs returns a strong ETag"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    response = client.get("/runs", headers=auth_headers)
+
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+
+def test_unchanged_runs_return_304_without_query(mock_dynamodb, auth_headers):
+    """Test that a matching If-None-Match returns 304 and skips the runs query"""
+    import src.runs.app as app_module
+
+    client = TestClient(app_module.app)
+    client.post("/runs", json=RUN_DATA, headers=auth_headers)
+
+    etag = client.get("/runs", headers=auth_headers).headers["etag"]
+
+    def fail_query(user_id):
+        raise AssertionError("runs should not be queried for a 304")
+
+    original_query = app_module.get_runs_by_user
+    app_module.get_runs_by_user = fail_query
+    try:
+        response = client.get(
+            "/runs", headers={**auth_headers, "If-None-Match": etag}
+        )
+    finally:
+        app_module.get_runs_by_user = original_query
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+
+def test_run_writes_change_etag(mock_dynamodb, auth_headers):
+    """Test that creating, updating and deleting runs changes the ETag"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    etags = [client.get("/runs", headers=auth_headers).headers["etag"]]
+
+    run_id = client.post("/runs", json=RUN_DATA, headers=auth_headers).json()["run_id"]
+    etags.append(client.get("/runs", headers=auth_headers).headers["etag"])
+
+    client.put(f"/runs/{run_id}", json={**RUN_DATA, "notes": "x"}, headers=auth_headers)
+    etags.append(client.get("/runs", headers=auth_headers).headers["etag"])
+
+    client.delete(f"/runs/{run_id}", headers=auth_headers)
+    etags.append(client.get("/runs", headers=auth_headers).headers["etag"])
+
+    assert len(set(etags)) == 4
+
+    # The stale ETag now gets a full response
+    response = client.get("/runs", headers={**auth_headers, "If-None-Match": etags[0]})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_version_moves_with_the_write_even_if_later_steps_fail(
+    mock_dynamodb, auth_headers, monkeypatch
+):
+    """Test that a failure after the write can't leave an ETag that hides it"""
+    import src.runs.app as app_module
+    import src.runs.dal.records_dal as records_dal
+
+    def throttled(*args):
+        raise RuntimeError("throttled")
+
+    client = TestClient(app_module.app, raise_server_exceptions=False)
+    before = client.get("/runs", headers=auth_headers).headers["etag"]
+
+    monkeypatch.setattr(app_module, "record_run", throttled)
+    assert client.post("/runs", json=RUN_DATA, headers=auth_headers).status_code == 500
+
+    response = client.get("/runs", headers={**auth_headers, "If-None-Match": before})
+    assert response.status_code == 200
+    [run] = response.json()
+
+    before = response.headers["etag"]
+    monkeypatch.setattr(records_dal, "update_records_for_run_delete", throttled)
+    assert client.delete(f"/runs/{run['run_id']}", headers=auth_headers).status_code == 500
+
+    response = client.get("/runs", headers={**auth_headers, "If-None-Match": before})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_targets_etag_and_304(mock_dynamodb, auth_headers):
+    """Test that GET /targets honors If-None-Match and target writes bump it"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    first = client.get("/targets", headers=auth_headers)
+    etag = first.headers["etag"]
+
+    response = client.get("/targets", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    target_data = {"target_type": "monthly", "period": "2024-03", "distance_km": 100.0}
+    client.post("/targets", json=target_data, headers=auth_headers)
+
+    response = client.get("/targets", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert response.headers["etag"] != etag
+
+
+def test_etag_is_per_user(mock_dynamodb, auth_headers):
+    """Test that two users with the same version get different ETags"""
+    from src.runs.app import collection_etag
+
+    assert collection_etag("user-a", "runs", 1) != collection_etag("user-b", "runs", 1)
+    assert collection_etag("user-a", "runs", 1) != collection_etag("user-a", "targets", 1)
+
+
+def test_version_reads_are_strongly_consistent(mock_dynamodb, monkeypatch):
+    """Test that version items are read with ConsistentRead, so ETags never lag a write"""
+    import src.runs.dal.version_dal as version_dal
+
+    table = mock_dynamodb.Table("test-versions")
+    calls = []
+
+    class RecordingTable:
+        def get_item(self, **kwargs):
+            calls.append(kwargs)
+            return table.get_item(**kwargs)
+
+    monkeypatch.setattr(version_dal, "_get_table", lambda: RecordingTable())
+
+    version_dal.get_version("user-a", "runs")
+    version_dal.get_versions("user-a", ["runs", "targets"])
+
+    assert [call.get("ConsistentRead") for call in calls] == [True, True]
@@ -0,0 +1,167 @@
+# tests/test_export.py
+"""Test streamed run history export via GET /runs/export"""
+
+import pytest
+from fastapi.testclient import TestClient
+import csv
+import importlib
+import io
+import json
+from datetime import datetime
+
+
+@pytest.fixture
+def mock_dynamodb(aws):
+    return aws("runs", "records", "versions")
+
+
+def _save_runs(count, user_id="test-user-123"):
+    from src.runs.models.run import Run
+
+    run_dal = importlib.import_module("src.runs.dal.run_dal")
+    runs = []
+    for day in range(count):
+        run = Run(
+            user_id=user_id,
+            date=datetime(2024, 1, 1 + day % 28).date(),
+            distance_km=5 + day,
+            duration="00:30:00",
+            notes=f"run {day}, easy",
+        )
+        run_dal.save_run(run)
+        runs.append(run)
+    return runs
+
+
+def test_iter_runs_reads_page_by_page(mock_dynamodb, monkeypatch):
+    """Test that the generator follows LastEvaluatedKey one page at a time"""
+    run_dal = importlib.import_module("src.runs.dal.run_dal")
+    saved = _save_runs(7)
+
+    table = run_dal._get_table()
+    pages = []
+    query = table.query
+
+    def counting_query(**kwargs):
+        response = query(**kwargs)
+        pages.append(len(response["Items"]))
+        return response
+
+    table.query = counting_query
+    monkeypatch.setattr(run_dal, "_get_table", lambda: table)
+
+    runs = run_dal.iter_runs_by_user("test-user-123", page_size=3)
+    first = next(runs)
+    assert pages == [3]  # Only the first page has been read
+
+    exported = [first, *runs]
+    assert pages == [3, 3, 1]
+    assert {run.run_id for run in exported} == {run.run_id for run in saved}
+
+
+def test_iter_runs_skips_tombstones(mock_dynamodb):
+    """Test that deleted runs are not exported"""
+    run_dal = importlib.import_module("src.runs.dal.run_dal")
+    kept, deleted = _save_runs(2)
+
+    run_dal.delete_run_by_id(deleted.run_id, deleted.user_id)
+
+    assert [run.run_id for run in run_dal.iter_runs_by_user("test-user-123")] == [kept.run_id]
+
+
+def test_export_csv(mock_dynamodb, auth_headers, monkeypatch):
+    """Test that CSV export streams every run across several pages"""
+    monkeypatch.setenv("RUNS_EXPORT_PAGE_SIZE", "2")
+    monkeypatch.setenv("RUNS_EXPORT_CHUNK_BYTES", "100")
+    from src.runs.app import app
+
+    saved = _save_runs(5)
+    _save_runs(1, user_id="someone-else")
+
+    client = TestClient(app)
+    response = client.get("/runs/export", params={"format": "csv"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="runs.csv"' in response.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert {row["run_id"] for row in rows} == {run.run_id for run in saved}
+    row = next(row for row in rows if row["run_id"] == saved[0].run_id)
+    assert row["date"] == "2024-01-01"
+    assert row["distance_km"] == "5.0"
+    assert row["duration"] == "00:30:00"
+    assert row["duration_seconds"] == "1800"
+    assert row["pace"] == "06:00"
+    assert row["notes"] == "run 0, easy"
+
+
+def test_export_ndjson(mock_dynamodb, auth_headers):
+    """Test that NDJSON export has one JSON object per line"""
+    from src.runs.app import app
+
+    saved = _save_runs(3)
+
+    client = TestClient(app)
+    response = client.get("/runs/export", params={"format": "ndjson"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = response.text.splitlines()
+    assert len(lines) == 3
+    exported = [json.loads(line) for line in lines]
+    assert {run["run_id"] for run in exported} == {run.run_id for run in saved}
+    assert exported[0]["duration_seconds"] == 1800
+
+
+def test_export_is_gzip_streamed_when_accepted(mock_dynamodb, auth_headers):
+    """Test that the export stream is compressed when the client accepts gzip"""
+    from src.runs.app import app
+
+    _save_runs(20)
+
+    client = TestClient(app)
+    response = client.get(
+        "/runs/export",
+        params={"format": "ndjson"},
+        headers={**auth_headers, "Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert len(response.text.splitlines()) == 20
+
+
+def test_export_of_empty_history(mock_dynamodb, auth_headers):
+    """Test that a user without runs gets just the CSV header"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    response = client.get("/runs/export", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.text.strip() == (
+        "run_id,date,distance_km,duration,duration_seconds,pace,notes,created_at"
+    )
+
+
+def test_export_rejects_unknown_format(mock_dynamodb, auth_headers):
+    """Test that an unsupported format is a 400"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    response = client.get("/runs/export", params={"format": "xml"}, headers=auth_headers)
+
+    assert response.status_code == 400
+
+
+def test_export_requires_auth(mock_dynamodb):
+    """Test that export needs a token"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    response = client.get("/runs/export")
+
+    assert response.status_code == 403
@@ -0,0 +1,240 @@
+# tests/test_export_jobs.py
+"""Test asynchronous export jobs written to S3 (POST /exports, export worker)"""
+
+import pytest
+from fastapi.testclient import TestClient
+import boto3
+import csv
+import importlib
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+
+@pytest.fixture
+def mock_aws_services(aws, monkeypatch):
+    monkeypatch.setenv("EXPORT_JOB_PAGE_SIZE", "2")
+    monkeypatch.delenv("EXPORT_QUEUE_URL", raising=False)
+    return aws(
+        "runs",
+        "targets",
+        "records",
+        "exports",
+        "versions",
+        buckets={"EXPORTS_BUCKET": "test-exports-bucket"},
+    )
+
+
+class FakeContext:
+    """Lambda context whose remaining time drops by `step_ms` per call"""
+
+    def __init__(self, remaining_ms, step_ms=0):
+        self.remaining_ms = remaining_ms
+        self.step_ms = step_ms
+
+    def get_remaining_time_in_millis(self):
+        remaining = self.remaining_ms
+        self.remaining_ms -= self.step_ms
+        return remaining
+
+
+def _save_history(run_count, user_id="test-user-123"):
+    from src.runs.models.run import Run
+    from src.runs.models.target import Target
+
+    run_dal = importlib.import_module("src.runs.dal.run_dal")
+    target_dal = importlib.import_module("src.runs.dal.target_dal")
+
+    runs = []
+    for day in range(run_count):
+        run = Run(
+            user_id=user_id,
+            date=datetime(2024, 2, 1 + day).date(),
+            distance_km=Decimal("10"),
+            duration="00:50:00",
+        )
+        run_dal.save_run(run)
+        runs.append(run)
+
+    target_dal.save_target(
+        Target(user_id=user_id, target_type="yearly", period="2024", distance_km=Decimal("1000"))
+    )
+    return runs
+
+
+def _read_csv(key):
+    body = boto3.client("s3").get_object(Bucket="test-exports-bucket", Key=key)["Body"].read()
+    return list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+
+
+def test_export_job_runs_and_returns_presigned_urls(mock_aws_services, auth_headers):
+    """Test that without a queue the API runs the job and lists download URLs"""
+    from src.runs.app import app
+
+    runs = _save_history(5)
+
+    client = TestClient(app)
+    response = client.post("/exports", json={"format": "csv"}, headers=auth_headers)
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+    assert job["files"] == []
+
+    response = client.get(f"/exports/{job['export_id']}", headers=auth_headers)
+    assert response.status_code == 200
+    job = response.json()
+
+    assert job["status"] == "completed"
+    assert [file["name"] for file in job["files"]] == [
+        "runs/part-00000.csv",
+        "runs/part-00001.csv",
+        "runs/part-00002.csv",
+        "targets/part-00000.csv",
+    ]
+    assert all("Signature" in file["url"] or "X-Amz-" in file["url"] for file in job["files"])
+
+    prefix = f"exports/test-user-123/{job['export_id']}/"
+    exported = [
+        row for part in range(3) for row in _read_csv(f"{prefix}runs/part-{part:05d}.csv")
+    ]
+    assert sorted(row["run_id"] for row in exported) == sorted(run.run_id for run in runs)
+    assert _read_csv(f"{prefix}targets/part-00000.csv")[0]["period"] == "2024"
+
+
+def test_export_job_resumes_from_checkpoint(mock_aws_services):
+    """Test that a job stopped at the deadline continues without redoing pages"""
+    export_job_dal = importlib.import_module("src.runs.dal.export_job_dal")
+    export_jobs = importlib.import_module("src.runs.export_jobs")
+
+    runs = _save_history(5)
+    job = export_job_dal.create_export_job("test-user-123", "ndjson")
+
+    # Time for two pages, then the invocation is nearly over
+    time_left = iter([100, 100, 1])
+    finished = export_jobs.run_export_job(
+        "test-user-123", job["export_id"], time_left=lambda: next(time_left)
+    )
+
+    assert finished is False
+    paused = export_job_dal.get_export_job("test-user-123", job["export_id"])
+    assert paused["status"] == "running"
+    assert paused["cursor"]["collection"] == "runs"
+    assert paused["cursor"]["part"] == 2
+    assert len(paused["files"]) == 2
+
+    assert export_jobs.run_export_job("test-user-123", job["export_id"]) is True
+
+    done = export_job_dal.get_export_job("test-user-123", job["export_id"])
+    assert done["status"] == "completed"
+    assert int(done["attempts"]) == 2
+    assert "cursor" not in done
+    assert len(done["files"]) == 4
+
+    s3 = boto3.client("s3")
+    run_ids = []
+    for key in done["files"]:
+        if "/runs/" in key:
+            body = s3.get_object(Bucket="test-exports-bucket", Key=key)["Body"].read()
+            run_ids += [json.loads(line)["run_id"] for line in body.splitlines()]
+    assert sorted(run_ids) == sorted(run.run_id for run in runs)
+
+
+def test_worker_requeues_job_when_out_of_time(mock_aws_services, auth_headers, monkeypatch):
+    """Test that the SQS worker hands an unfinished job to the next invocation"""
+    sqs = boto3.client("sqs", region_name="us-east-1")
+    queue_url = sqs.create_queue(QueueName="exports")["QueueUrl"]
+    monkeypatch.setenv("EXPORT_QUEUE_URL", queue_url)
+
+    from src.runs.app import app
+
+    export_jobs = importlib.import_module("src.runs.export_jobs")
+    export_job_dal = importlib.import_module("src.runs.dal.export_job_dal")
+    _save_history(5)
+
+    client = TestClient(app)
+    job = client.post("/exports", json={"format": "csv"}, headers=auth_headers).json()
+
+    # The API only queued the job
+    assert export_job_dal.get_export_job("test-user-123", job["export_id"])["status"] == "queued"
+    messages = sqs.receive_message(QueueUrl=queue_url)["Messages"]
+    assert json.loads(messages[0]["Body"]) == {
+        "user_id": "test-user-123",
+        "export_id": job["export_id"],
+    }
+
+    event = {"Records": [{"messageId": "1", "body": messages[0]["Body"], "attributes": {}}]}
+
+    # 5 s left is below EXPORT_MIN_TIME_SECONDS: pause straight away
+    result = export_jobs.lambda_handler(event, FakeContext(5000))
+
+    assert result == {"batchItemFailures": []}
+    sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=messages[0]["ReceiptHandle"])
+    requeued = sqs.receive_message(QueueUrl=queue_url)["Messages"]
+    assert requeued[0]["Body"] == messages[0]["Body"]
+
+    result = export_jobs.lambda_handler(event, FakeContext(600000))
+
+    assert result == {"batchItemFailures": []}
+    assert export_job_dal.get_export_job("test-user-123", job["export_id"])["status"] == "completed"
+
+
+def test_worker_reports_failures_then_marks_job_failed(mock_aws_services, monkeypatch):
+    """Test that errors are retried through SQS before the job is marked failed"""
+    export_job_dal = importlib.import_module("src.runs.dal.export_job_dal")
+    export_jobs = importlib.import_module("src.runs.export_jobs")
+
+    job = export_job_dal.create_export_job("test-user-123", "csv")
+    monkeypatch.setenv("EXPORTS_BUCKET", "missing-bucket")
+    _save_history(1)
+
+    body = json.dumps({"user_id": "test-user-123", "export_id": job["export_id"]})
+    record = {"messageId": "m-1", "body": body, "attributes": {"ApproximateReceiveCount": "1"}}
+
+    result = export_jobs.lambda_handler({"Records": [record]}, FakeContext(600000))
+    assert result == {"batchItemFailures": [{"itemIdentifier": "m-1"}]}
+    assert export_job_dal.get_export_job("test-user-123", job["export_id"])["status"] == "running"
+
+    record["attributes"]["ApproximateReceiveCount"] = "3"
+    result = export_jobs.lambda_handler({"Records": [record]}, FakeContext(600000))
+
+    assert result == {"batchItemFailures": []}
+    failed = export_job_dal.get_export_job("test-user-123", job["export_id"])
+    assert failed["status"] == "failed"
+    assert "error" in failed
+
+
+def test_finished_job_is_not_rerun(mock_aws_services):
+    """Test that a redelivered message for a completed job is a no-op"""
+    export_job_dal = importlib.import_module("src.runs.dal.export_job_dal")
+    export_jobs = importlib.import_module("src.runs.export_jobs")
+
+    job = export_job_dal.create_export_job("test-user-123", "csv")
+    assert export_jobs.run_export_job("test-user-123", job["export_id"]) is True
+    assert export_jobs.run_export_job("test-user-123", job["export_id"]) is True
+
+    assert int(export_job_dal.get_export_job("test-user-123", job["export_id"])["attempts"]) == 1
+
+
+def test_export_rejects_unknown_format(mock_aws_services, auth_headers):
+    """Test that an unsupported file format is a 400"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    response = client.post("/exports", json={"format": "xlsx"}, headers=auth_headers)
+
+    assert response.status_code == 400
+
+
+def test_export_of_other_user_is_not_found(mock_aws_services, auth_headers):
+    """Test that users can only see their own export jobs"""
+    from src.runs.app import app
+
+    export_job_dal = importlib.import_module("src.runs.dal.export_job_dal")
+    job = export_job_dal.create_export_job("someone-else", "csv")
+
+    client = TestClient(app)
+    response = client.get(f"/exports/{job['export_id']}", headers=auth_headers)
+
+    assert response.status_code == 404
@@ -0,0 +1,103 @@
+# tests/test_instrumentation.py
+"""Test per-request phase timings, Server-Timing headers and EMF log lines"""
+
+import pytest
+from fastapi.testclient import TestClient
+import json
+
+from src.runs.instrumentation import (
+    RequestTimings,
+    capacity_units,
+    current_timings,
+    endpoint_capacity,
+    timed,
+)
+
+
+@pytest.fixture
+def mock_dynamodb(aws, monkeypatch):
+    monkeypatch.setenv("PERF_INSTRUMENTATION", "true")
+    return aws("runs", "records", "targets", "versions")
+
+
+def _emf_lines(output):
+    return [json.loads(line) for line in output.splitlines() if line.startswith('{"_aws"')]
+
+
+class TestRequestTimings:
+    def test_timed_is_a_no_op_outside_requests(self):
+        """Test that uninstrumented code pays almost nothing"""
+        with timed("convert"):
+            pass
+
+        assert current_timings() is None
+
+    def test_server_timing_header(self):
+        """Test phase aggregation and header formatting"""
+        timings = RequestTimings()
+        timings.add("auth", 0.42)
+        timings.add("dal.get_version", 2.0)
+        timings.add("dal.get_version", 3.0)
+        timings.add_capacity(*capacity_units("Query", {"TableName": "runs", "CapacityUnits": 1.5}))
+        timings.add_capacity(
+            *capacity_units("TransactWriteItems", [{"CapacityUnits": 2.0}, {"CapacityUnits": 2.0}])
+        )
+
+        header = timings.server_timing(total_ms=12.34)
+
+        assert header == (
+            'auth;dur=0.4, dal.get_version;dur=5.0;desc="2 calls", '
+            'capacity;desc="RCU 1.5 WCU 4", total;dur=12.3'
+        )
+
+    def test_emf_record(self):
+        """Test the Embedded Metric Format structure"""
+        timings = RequestTimings()
+        timings.add("serialize", 1.25)
+
+        record = timings.emf("GET /runs", 200, total_ms=4.0)
+
+        directive = record["_aws"]["CloudWatchMetrics"][0]
+        assert directive["Dimensions"] == [["Route"]]
+        assert {"Name": "serialize", "Unit": "Milliseconds"} in directive["Metrics"]
+        assert record["Route"] == "GET /runs"
+        assert record["serialize"] == 1.25
+        assert record["total"] == 4.0
+
+
+def test_run_list_reports_phases(mock_dynamodb, auth_headers, capsys):
+    """Test that an instrumented request reports auth, DAL and rendering phases"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    run_data = {"date": "2024-05-02", "distance_km": 5.0, "duration": "00:30:00"}
+    assert client.post("/runs", json=run_data, headers=auth_headers).status_code == 201
+    capsys.readouterr()
+
+    response = client.get("/runs", headers=auth_headers)
+
+    assert response.status_code == 200
+    server_timing = response.headers["server-timing"]
+    for phase in ["auth", "dal.get_version", "dal.get_runs_by_user", "convert", "serialize", "total"]:
+        assert f"{phase};dur=" in server_timing
+
+    emf = _emf_lines(capsys.readouterr().out)
+    assert len(emf) == 1
+    assert emf[0]["Route"] == "GET /runs"
+    assert emf[0]["StatusCode"] == 200
+    assert emf[0]["dal.get_runs_by_user"] > 0
+    assert emf[0]["ConsumedReadCapacity"] > 0
+    assert "capacity;desc=" in server_timing
+    assert endpoint_capacity.stats()["GET /runs"]["read_capacity"] > 0
+
+
+def test_route_template_is_the_dimension(mock_dynamodb, auth_headers, capsys):
+    """Test that path parameters don't create a metric series per id"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    client.delete("/runs/does-not-exist", headers=auth_headers)
+
+    emf = _emf_lines(capsys.readouterr().out)
+    assert emf[-1]["Route"] == "DELETE /runs/{run_id}"
+    assert emf[-1]["StatusCode"] == 404
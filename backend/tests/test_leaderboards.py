@@ -0,0 +1,335 @@
+# tests/test_leaderboards.py
+"""Test groups and their precomputed weekly/monthly leaderboards"""
+
+import pytest
+from fastapi.testclient import TestClient
+import importlib
+from datetime import date, datetime, timedelta
+
+from tests.conftest import make_auth_headers
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def mock_aws_services(aws):
+    return aws(
+        "runs",
+        "records",
+        "versions",
+        "users",
+        "groups",
+        "leaderboards",
+        buckets={"TRACKS_BUCKET": "test-tracks"},
+    )
+
+
+@pytest.fixture
+def client(mock_aws_services):
+    from src.runs.app import app
+
+    return TestClient(app)
+
+
+def _create_group(client, owner="alice"):
+    response = client.post(
+        "/groups",
+        json={"name": "Tuesday club", "display_name": owner.title()},
+        headers=make_auth_headers(owner),
+    )
+    assert response.status_code == 201
+    return response.json()["group_id"]
+
+
+def _join(client, group_id, user_id):
+    response = client.post(
+        f"/groups/{group_id}/members",
+        json={"display_name": user_id.title()},
+        headers=make_auth_headers(user_id),
+    )
+    assert response.status_code == 201
+    return response
+
+
+def _log_run(client, user_id, distance_km, day=TODAY):
+    response = client.post(
+        "/runs",
+        json={"date": day.isoformat(), "distance_km": distance_km, "duration": "00:30:00"},
+        headers=make_auth_headers(user_id),
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def _board(client, group_id, user_id="alice", **params):
+    response = client.get(
+        f"/groups/{group_id}/leaderboard", params=params, headers=make_auth_headers(user_id)
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_period_keys():
+    """Test ISO week and calendar month keys and ranges"""
+    from src.runs.dal.leaderboard_dal import period_key, period_range
+
+    day = date(2024, 12, 30)  # Monday of ISO week 1 of 2025
+
+    assert period_key("week", day) == "week#2025-W01"
+    assert period_key("month", day) == "month#2024-12"
+    assert period_range("week", date(2024, 5, 1)) == (date(2024, 4, 29), date(2024, 5, 5))
+    assert period_range("month", date(2024, 2, 10)) == (date(2024, 2, 1), date(2024, 2, 29))
+    with pytest.raises(ValueError):
+        period_key("year", day)
+
+
+def test_create_join_and_list_groups(client):
+    """Test that creating and joining a group make the user a member"""
+    group_id = _create_group(client)
+
+    group = _join(client, group_id, "bob").json()
+    assert group["member_count"] == 2
+
+    response = client.post(f"/groups/{group_id}/members", headers=make_auth_headers("bob"))
+    assert response.status_code == 409
+
+    groups = client.get("/groups", headers=make_auth_headers("bob")).json()
+    assert [g["group_id"] for g in groups] == [group_id]
+    assert groups[0]["name"] == "Tuesday club"
+
+    assert client.post("/groups/unknown/members", headers=make_auth_headers("bob")).status_code == 404
+
+
+def test_leaderboard_ranks_members_by_distance(client):
+    """Test that runs logged by members rank them on the week and month boards"""
+    group_id = _create_group(client)
+    _join(client, group_id, "bob")
+    _join(client, group_id, "carol")
+
+    _log_run(client, "alice", 5)
+    _log_run(client, "bob", 10)
+    _log_run(client, "bob", 3.5)
+    _log_run(client, "carol", 8)
+    _log_run(client, "dave", 42)  # Not a member
+
+    for period in ("week", "month"):
+        board = _board(client, group_id, period=period)
+        assert [(e["rank"], e["display_name"], e["distance_km"]) for e in board["entries"]] == [
+            (1, "Bob", 13.5),
+            (2, "Carol", 8.0),
+            (3, "Alice", 5.0),
+        ]
+        assert board["entries"][0]["run_count"] == 2
+
+    board = _board(client, group_id, period="week")
+    assert board["start_date"] <= TODAY.isoformat() <= board["end_date"]
+
+
+def test_leaderboard_follows_run_updates_and_deletes(client):
+    """Test that edits move distance between periods and deletes remove it"""
+    group_id = _create_group(client)
+    # Distances outside the personal-best buckets (no pace index here)
+    run = _log_run(client, "alice", 4)
+    other = _log_run(client, "alice", 7)
+
+    last_month = TODAY.replace(day=1) - timedelta(days=1)
+    response = client.put(
+        f"/runs/{run['run_id']}",
+        json={"date": last_month.isoformat(), "distance_km": 6, "duration": "00:30:00"},
+        headers=make_auth_headers("alice"),
+    )
+    assert response.status_code == 200
+
+    assert _board(client, group_id, period="month")["entries"][0]["distance_km"] == 7.0
+    old_board = _board(client, group_id, period="month", on=last_month.isoformat())
+    assert old_board["entries"][0]["distance_km"] == 6.0
+
+    client.delete(f"/runs/{other['run_id']}", headers=make_auth_headers("alice"))
+    assert _board(client, group_id, period="month")["entries"] == []
+
+
+def test_joining_counts_runs_of_the_current_period(client):
+    """Test that a new member's earlier runs this week show up at once"""
+    group_id = _create_group(client)
+    _log_run(client, "bob", 12)
+
+    _join(client, group_id, "bob")
+
+    entries = _board(client, group_id)["entries"]
+    assert [(e["user_id"], e["distance_km"]) for e in entries] == [("bob", 12.0)]
+
+
+@pytest.mark.parametrize("year_buckets", ["false", "true"])
+def test_refresh_reads_runs_consistently(client, monkeypatch, year_buckets):
+    """Test that totals recomputed right after a runs write come from the base table"""
+    run_dal = importlib.import_module("src.runs.dal.run_dal")
+    monkeypatch.setenv("RUNS_YEAR_BUCKETS", year_buckets)
+    group_id = _create_group(client)
+    _log_run(client, "bob", 12)
+
+    table = run_dal._get_table()
+    queries = []
+
+    class RecordingTable:
+        def query(self, **kwargs):
+            queries.append(kwargs)
+            return table.query(**kwargs)
+
+        def __getattr__(self, name):
+            return getattr(table, name)
+
+    monkeypatch.setattr(run_dal, "_get_table", lambda: RecordingTable())
+
+    _join(client, group_id, "bob")
+
+    assert queries
+    assert all(query.get("ConsistentRead") for query in queries)
+    assert not any("IndexName" in query for query in queries)
+    entries = _board(client, group_id)["entries"]
+    assert [(e["user_id"], e["distance_km"]) for e in entries] == [("bob", 12.0)]
+
+
+@pytest.mark.parametrize(
+    "year_buckets, index", [("false", "user-date-index"), ("true", "user-year-index")]
+)
+def test_settled_refresh_reads_runs_through_the_index(client, monkeypatch, year_buckets, index):
+    """Test that once the last runs write settled, totals come from the range index"""
+    run_dal = importlib.import_module("src.runs.dal.run_dal")
+    monkeypatch.setenv("RUNS_YEAR_BUCKETS", year_buckets)
+    monkeypatch.setenv("RUNS_INDEX_LAG_SECONDS", "0")
+    group_id = _create_group(client)
+    _log_run(client, "bob", 12)
+
+    table = run_dal._get_table()
+    queries = []
+
+    class RecordingTable:
+        def query(self, **kwargs):
+            queries.append(kwargs)
+            return table.query(**kwargs)
+
+        def __getattr__(self, name):
+            return getattr(table, name)
+
+    monkeypatch.setattr(run_dal, "_get_table", lambda: RecordingTable())
+
+    _join(client, group_id, "bob")
+
+    assert queries
+    assert all(query.get("IndexName") == index for query in queries)
+    entries = _board(client, group_id)["entries"]
+    assert [(e["user_id"], e["distance_km"]) for e in entries] == [("bob", 12.0)]
+
+
+def test_leaving_removes_current_entries(client):
+    group_id = _create_group(client)
+    _join(client, group_id, "bob")
+    _log_run(client, "bob", 12)
+
+    response = client.delete(f"/groups/{group_id}/members/me", headers=make_auth_headers("bob"))
+    assert response.status_code == 200
+
+    assert _board(client, group_id)["entries"] == []
+    assert client.get("/groups", headers=make_auth_headers("bob")).json() == []
+    assert client.delete(
+        f"/groups/{group_id}/members/me", headers=make_auth_headers("bob")
+    ).status_code == 404
+
+
+def test_leaderboard_is_members_only(client):
+    group_id = _create_group(client)
+
+    response = client.get(f"/groups/{group_id}/leaderboard", headers=make_auth_headers("mallory"))
+
+    assert response.status_code == 403
+
+
+def test_leaderboard_pagination_is_one_query_per_page(client, mock_aws_services, monkeypatch):
+    """Test paging through a large board with cursors, without touching runs"""
+    group_dal = importlib.import_module("src.runs.dal.group_dal")
+    leaderboard_dal = importlib.import_module("src.runs.dal.leaderboard_dal")
+    run_dal = importlib.import_module("src.runs.dal.run_dal")
+
+    group_id = _create_group(client)
+    group = group_dal.get_group(group_id)
+    key = leaderboard_dal.period_key("week", TODAY)
+    table = mock_aws_services.Table("test-leaderboards")
+    with table.batch_writer() as batch:
+        for i in range(120):
+            batch.put_item(
+                Item={
+                    "board": leaderboard_dal.board_id(group_id, key),
+                    "user_id": f"user-{i:03d}",
+                    "distance_km": i,
+                    "run_count": 1,
+                    "display_name": f"Runner {i}",
+                }
+            )
+    assert group["member_count"] == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("runs read")
+
+    monkeypatch.setattr(run_dal, "get_runs_by_user_in_range", fail)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 50}
+        if cursor:
+            params["cursor"] = cursor
+        board = _board(client, group_id, **params)
+        seen.extend((e["rank"], e["distance_km"]) for e in board["entries"])
+        cursor = board["next_cursor"]
+        if not cursor:
+            break
+
+    assert [rank for rank, _ in seen] == list(range(1, 121))
+    assert [distance for _, distance in seen] == [float(i) for i in range(119, -1, -1)]
+
+    response = client.get(
+        f"/groups/{group_id}/leaderboard", params={"cursor": "%%%"}, headers=make_auth_headers("alice")
+    )
+    assert response.status_code == 400
+
+
+def test_reimport_does_not_double_count(client):
+    """Test that importing the same activity twice counts it once"""
+    group_id = _create_group(client)
+    start = datetime.combine(TODAY, datetime.min.time()).replace(hour=7)
+    gpx = (
+        '<gpx xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg>'
+        + "".join(
+            f'<trkpt lat="{52.37 + i * 0.0009:.6f}" lon="4.89">'
+            f"<time>{(start + timedelta(seconds=30 * i)).isoformat()}Z</time></trkpt>"
+            for i in range(50)
+        )
+        + "</trkseg></trk></gpx>"
+    ).encode()
+
+    for _ in range(2):
+        response = client.post(
+            "/runs/import",
+            params={"filename": "morning.gpx"},
+            content=gpx,
+            headers=make_auth_headers("alice"),
+        )
+        assert response.status_code == 201
+
+    entries = _board(client, group_id)["entries"]
+    assert len(entries) == 1
+    assert entries[0]["run_count"] == 1
+    assert entries[0]["distance_km"] == pytest.approx(4.9, abs=0.2)
+
+
+def test_writes_skip_leaderboards_without_groups_table(client, monkeypatch):
+    """Test that run writes work when groups aren't deployed"""
+    monkeypatch.delenv("GROUPS_TABLE")
+    leaderboard_dal = importlib.import_module("src.runs.dal.leaderboard_dal")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("groups read")
+
+    monkeypatch.setattr(leaderboard_dal, "get_groups_for_user", fail)
+
+    _log_run(client, "alice", 5)
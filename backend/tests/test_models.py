@@ -147,3 +147,35 @@ class TestTargetModel:
 
         assert target.target_type == "yearly"
         assert target.period == "2024"
+
+
+class TestRunDistanceBucket:
+    def test_run_in_bucket_range(self):
+        """Test that runs are assigned to personal-best distance buckets"""
+        test_cases = [
+            (Decimal("5.0"), "5k"),
+            (Decimal("5.2"), "5k"),
+            (Decimal("10.05"), "10k"),
+            (Decimal("21.1"), "half"),
+            (Decimal("42.2"), "marathon"),
+        ]
+
+        for distance, expected_bucket in test_cases:
+            run = Run(
+                user_id="user123",
+                date=date(2024, 1, 15),
+                distance_km=distance,
+                duration="00:30:00",
+            )
+            assert run.distance_bucket == expected_bucket
+
+    def test_run_outside_buckets(self):
+        """Test that runs between buckets have no bucket"""
+        for distance in [Decimal("3.0"), Decimal("4.99"), Decimal("7.5")]:
+            run = Run(
+                user_id="user123",
+                date=date(2024, 1, 15),
+                distance_km=distance,
+                duration="00:30:00",
+            )
+            assert run.distance_bucket is None
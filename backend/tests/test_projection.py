@@ -0,0 +1,112 @@
+# tests/test_projection.py
+"""Test field projection on run and target list reads"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def mock_dynamodb(aws):
+    return aws("runs", "records", "versions")
+
+
+RUN_DATA = {
+    "date": "2024-03-10",
+    "distance_km": 5.0,
+    "duration": "00:25:00",
+    "notes": "Tempo",
+}
+
+
+def test_get_runs_with_fields_returns_only_those_fields(mock_dynamodb, auth_headers):
+    """Test that GET /runs?fields= returns just the requested fields"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    client.post("/runs", json=RUN_DATA, headers=auth_headers)
+
+    response = client.get("/runs?fields=date,pace", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json() == [{"date": "2024-03-10", "pace": "05:00"}]
+
+
+def test_get_runs_without_fields_is_unchanged(mock_dynamodb, auth_headers):
+    """Test that the full representation is still the default"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    client.post("/runs", json=RUN_DATA, headers=auth_headers)
+
+    run = client.get("/runs", headers=auth_headers).json()[0]
+
+    assert set(run) == {"run_id", "date", "distance_km", "duration", "pace", "notes"}
+
+
+def test_get_runs_with_unknown_field_returns_400(mock_dynamodb, auth_headers):
+    """Test that unknown field names are rejected"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    response = client.get("/runs?fields=date,user_id", headers=auth_headers)
+
+    assert response.status_code == 400
+    assert "user_id" in response.json()["detail"]
+
+
+def test_field_selection_has_its_own_etag(mock_dynamodb, auth_headers):
+    """Test that a projected response is cached separately from the full one"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    client.post("/runs", json=RUN_DATA, headers=auth_headers)
+
+    full_etag = client.get("/runs", headers=auth_headers).headers["etag"]
+    response = client.get(
+        "/runs?fields=date",
+        headers={**auth_headers, "If-None-Match": full_etag},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != full_etag
+
+
+def test_calendar_returns_date_and_distance(mock_dynamodb, auth_headers):
+    """Test that GET /runs/calendar returns only date and distance"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    client.post("/runs", json=RUN_DATA, headers=auth_headers)
+    client.post("/runs", json={**RUN_DATA, "date": "2024-03-12"}, headers=auth_headers)
+
+    response = client.get("/runs/calendar", headers=auth_headers)
+
+    assert response.status_code == 200
+    days = sorted(response.json(), key=lambda day: day["date"])
+    assert days == [
+        {"date": "2024-03-10", "distance_km": 5.0},
+        {"date": "2024-03-12", "distance_km": 5.0},
+    ]
+
+
+def test_dal_projection_reads_only_requested_attributes(mock_dynamodb):
+    """Test that the DAL turns a field set into a ProjectionExpression"""
+    from datetime import date
+    from decimal import Decimal
+    from src.runs.models.run import Run
+    from src.runs.dal.run_dal import save_run, get_runs_by_user
+
+    save_run(
+        Run(
+            user_id="user123",
+            date=date(2024, 3, 10),
+            distance_km=Decimal("5.0"),
+            duration="00:25:00",
+            notes="Tempo",
+        )
+    )
+
+    items = get_runs_by_user("user123", fields={"date", "distance_km"})
+
+    assert items == [{"date": "2024-03-10", "distance_km": Decimal("5.0")}]
@@ -0,0 +1,138 @@
+# tests/test_records.py
+"""Test the personal-best index and GET /records"""
+
+import pytest
+from fastapi.testclient import TestClient
+import sys
+
+
+@pytest.fixture
+def mock_dynamodb(aws):
+    return aws("runs", "records", "versions")
+
+
+def _post_run(client, headers, distance_km, duration):
+    run_data = {"date": "2024-03-10", "distance_km": distance_km, "duration": duration}
+    response = client.post("/runs", json=run_data, headers=headers)
+    assert response.status_code == 201
+    return response.json()["run_id"]
+
+
+def _records_by_bucket(client, headers):
+    response = client.get("/records", headers=headers)
+    assert response.status_code == 200
+    return {record["bucket"]: record for record in response.json()}
+
+
+def test_records_track_fastest_run_per_bucket(mock_dynamodb, auth_headers):
+    """Test that GET /records returns the fastest run in each bucket"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    _post_run(client, auth_headers, 5.0, "00:27:30")
+    fastest_5k = _post_run(client, auth_headers, 5.1, "00:25:30")
+    _post_run(client, auth_headers, 5.0, "00:26:00")
+    ten_k = _post_run(client, auth_headers, 10.0, "00:55:00")
+    _post_run(client, auth_headers, 7.5, "00:30:00")  # No bucket
+
+    records = _records_by_bucket(client, auth_headers)
+
+    assert set(records) == {"5k", "10k"}
+    assert records["5k"]["run_id"] == fastest_5k
+    assert records["5k"]["pace"] == "05:00"
+    assert records["5k"]["duration"] == "00:25:30"
+    assert records["10k"]["run_id"] == ten_k
+
+
+def test_deleting_record_falls_back_to_next_best(mock_dynamodb, auth_headers):
+    """Test that deleting the record holder promotes the next best run"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    second_best = _post_run(client, auth_headers, 5.0, "00:26:00")
+    best = _post_run(client, auth_headers, 5.0, "00:24:00")
+
+    assert _records_by_bucket(client, auth_headers)["5k"]["run_id"] == best
+
+    response = client.delete(f"/runs/{best}", headers=auth_headers)
+    assert response.status_code == 200
+
+    assert _records_by_bucket(client, auth_headers)["5k"]["run_id"] == second_best
+
+    response = client.delete(f"/runs/{second_best}", headers=auth_headers)
+    assert response.status_code == 200
+
+    assert _records_by_bucket(client, auth_headers) == {}
+
+
+def test_updating_record_holder_recomputes_record(mock_dynamodb, auth_headers):
+    """Test that slowing down or moving the record holder updates the records"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    other = _post_run(client, auth_headers, 5.0, "00:26:00")
+    best = _post_run(client, auth_headers, 5.0, "00:24:00")
+
+    # Move the record holder into the 10k bucket
+    update_data = {"date": "2024-03-10", "distance_km": 10.0, "duration": "00:50:00"}
+    response = client.put(f"/runs/{best}", json=update_data, headers=auth_headers)
+    assert response.status_code == 200
+
+    records = _records_by_bucket(client, auth_headers)
+    assert records["5k"]["run_id"] == other
+    assert records["10k"]["run_id"] == best
+
+
+class _LaggingPaceIndex:
+    """Runs table whose pace index still lists some runs as they were before a change"""
+
+    def __init__(self, table, stale_items):
+        self._table = table
+        self._stale_items = stale_items
+
+    def __getattr__(self, name):
+        return getattr(self._table, name)
+
+    def query(self, **kwargs):
+        response = self._table.query(**kwargs)
+        if kwargs.get("IndexName") == "user-pace-index":
+            items = self._stale_items + response.get("Items", [])
+            response["Items"] = sorted(items, key=lambda item: item["pace_key"])
+        return response
+
+
+def test_refresh_skips_runs_the_pace_index_still_lists(mock_dynamodb, auth_headers, monkeypatch):
+    """Test that a deleted run the lagging index still lists is not made the record again"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    run_dal = sys.modules["src.runs.dal.run_dal"]
+
+    best = _post_run(client, auth_headers, 5.0, "00:24:00")
+    deleted = _post_run(client, auth_headers, 5.0, "00:25:00")
+    third = _post_run(client, auth_headers, 5.0, "00:26:00")
+
+    table = mock_dynamodb.Table("test-runs")
+    deleted_item = table.get_item(Key={"user_id": "test-user-123", "run_id": deleted})["Item"]
+    assert client.delete(f"/runs/{deleted}", headers=auth_headers).status_code == 200
+
+    monkeypatch.setattr(
+        run_dal, "_get_table", lambda: _LaggingPaceIndex(table, [deleted_item])
+    )
+    assert client.delete(f"/runs/{best}", headers=auth_headers).status_code == 200
+
+    assert _records_by_bucket(client, auth_headers)["5k"]["run_id"] == third
+
+
+def test_records_require_authentication(mock_dynamodb):
+    """Test that GET /records requires a token"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    response = client.get("/records")
+
+    assert response.status_code == 403
@@ -0,0 +1,132 @@
+# tests/test_run_changes.py
+"""Test delta sync of runs via GET /runs/changes"""
+
+import pytest
+from fastapi.testclient import TestClient
+from datetime import datetime, timedelta
+
+
+@pytest.fixture
+def mock_dynamodb(aws):
+    return aws("runs", "records", "versions")
+
+
+RUN_DATA = {"date": "2024-03-10", "distance_km": 5.0, "duration": "00:25:00"}
+
+
+def _changes(client, headers, since=None):
+    params = {"since": since} if since else {}
+    response = client.get("/runs/changes", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _shift(token, seconds):
+    """Move a sync token in time (stands in for waiting between syncs)"""
+    from src.runs.app import decode_sync_token, encode_sync_token
+
+    timestamp = datetime.fromisoformat(decode_sync_token(token))
+    return encode_sync_token(
+        (timestamp + timedelta(seconds=seconds)).isoformat(timespec="microseconds")
+    )
+
+
+def test_initial_sync_returns_all_runs(mock_dynamodb, auth_headers):
+    """Test that a sync without a token returns the full list and a token"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    client.post("/runs", json=RUN_DATA, headers=auth_headers)
+    client.post("/runs", json=RUN_DATA, headers=auth_headers)
+
+    changes = _changes(client, auth_headers)
+
+    assert len(changes["runs"]) == 2
+    assert changes["deleted"] == []
+    assert changes["next_since"]
+
+
+def test_sync_returns_created_updated_and_deleted_runs(mock_dynamodb, auth_headers):
+    """Test that changes after a watermark include creates, updates and deletes"""
+    from src.runs.app import app, encode_sync_token
+
+    client = TestClient(app)
+    unchanged = client.post("/runs", json=RUN_DATA, headers=auth_headers).json()
+    updated = client.post("/runs", json=RUN_DATA, headers=auth_headers).json()
+    deleted = client.post("/runs", json=RUN_DATA, headers=auth_headers).json()
+
+    # Pretend the existing runs were written long before the last sync
+    table = mock_dynamodb.Table("test-runs")
+    for item in table.scan()["Items"]:
+        table.update_item(
+            Key={"user_id": item["user_id"], "run_id": item["run_id"]},
+            UpdateExpression="SET updated_at = :old",
+            ExpressionAttributeValues={":old": "2024-01-01T00:00:00.000000"},
+        )
+    since = encode_sync_token(
+        (datetime.utcnow() - timedelta(days=1)).isoformat(timespec="microseconds")
+    )
+
+    client.put(
+        f"/runs/{updated['run_id']}",
+        json={**RUN_DATA, "notes": "edited"},
+        headers=auth_headers,
+    )
+    client.delete(f"/runs/{deleted['run_id']}", headers=auth_headers)
+    created = client.post("/runs", json=RUN_DATA, headers=auth_headers).json()
+
+    changes = _changes(client, auth_headers, since)
+
+    changed_ids = {run["run_id"] for run in changes["runs"]}
+    assert changed_ids == {updated["run_id"], created["run_id"]}
+    assert unchanged["run_id"] not in changed_ids
+    assert changes["deleted"] == [deleted["run_id"]]
+
+
+def test_deleted_runs_are_hidden_from_run_list(mock_dynamodb, auth_headers):
+    """Test that tombstones do not show up in GET /runs"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    run = client.post("/runs", json=RUN_DATA, headers=auth_headers).json()
+
+    client.delete(f"/runs/{run['run_id']}", headers=auth_headers)
+
+    assert client.get("/runs", headers=auth_headers).json() == []
+
+    # The tombstone expires through TTL
+    items = mock_dynamodb.Table("test-runs").scan()["Items"]
+    assert len(items) == 1
+    assert "deleted_at" in items[0]
+    assert items[0]["expires_at"] > int(datetime.utcnow().timestamp())
+
+
+def test_no_changes_keeps_watermark(mock_dynamodb, auth_headers):
+    """Test that syncing with nothing new returns an empty change set"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    client.post("/runs", json=RUN_DATA, headers=auth_headers)
+
+    since = _shift(_changes(client, auth_headers)["next_since"], 60)
+    changes = _changes(client, auth_headers, since)
+
+    assert changes == {"runs": [], "deleted": [], "next_since": since}
+
+
+def test_invalid_and_expired_tokens(mock_dynamodb, auth_headers):
+    """Test that bad tokens get 400 and tokens beyond retention get 410"""
+    from src.runs.app import app, encode_sync_token
+
+    client = TestClient(app)
+
+    response = client.get(
+        "/runs/changes", params={"since": "not-a-token"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    expired = encode_sync_token("2000-01-01T00:00:00.000000")
+    response = client.get(
+        "/runs/changes", params={"since": expired}, headers=auth_headers
+    )
+    assert response.status_code == 410
@@ -0,0 +1,247 @@
+# tests/test_shared_cache.py
+"""Test the shared cache tier: backends, versioned keys and endpoint caching"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.runs import shared_cache
+
+
+class FakeRedis:
+    """Minimal in-process stand-in for a Redis client (GET/SET with EX)"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = bytes(value)
+        self.expiry[key] = ex
+        return True
+
+
+class BrokenRedis:
+    def get(self, key):
+        raise ConnectionError("connection refused")
+
+    def set(self, key, value, ex=None):
+        raise ConnectionError("connection refused")
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Route the app's shared cache to a fake Redis server"""
+    client = FakeRedis()
+    monkeypatch.setattr(shared_cache, "_backend", shared_cache.RedisBackend(client, 300))
+    monkeypatch.setattr(shared_cache, "_backend_loaded", True)
+    return client
+
+
+@pytest.fixture
+def mock_dynamodb(aws):
+    return aws("runs", "records", "targets", "versions")
+
+
+def _post_run(client, headers, run_date, distance_km):
+    run_data = {"date": run_date, "distance_km": distance_km, "duration": "00:30:00"}
+    assert client.post("/runs", json=run_data, headers=headers).status_code == 201
+
+
+def _record_queries(monkeypatch, *dal_modules):
+    """Record the Query calls the given DAL modules make"""
+    queries = []
+
+    def recording(get_table):
+        table = get_table()
+
+        class RecordingTable:
+            def query(self, **kwargs):
+                queries.append(kwargs)
+                return table.query(**kwargs)
+
+            def __getattr__(self, name):
+                return getattr(table, name)
+
+        return lambda: RecordingTable()
+
+    for module in dal_modules:
+        monkeypatch.setattr(module, "_get_table", recording(module._get_table))
+
+    return queries
+
+
+class TestCacheKeys:
+    def test_key_embeds_versions_in_stable_order(self):
+        """Test that keys change with any collection version"""
+        key = shared_cache.cache_key("user-1", "dashboard", {"targets": 2, "runs": 7}, "2024-05-21")
+
+        assert key == "runlog:v1:user-1:dashboard:runs=7,targets=2:2024-05-21"
+        assert key != shared_cache.cache_key(
+            "user-1", "dashboard", {"targets": 2, "runs": 8}, "2024-05-21"
+        )
+
+
+class TestBackends:
+    def test_create_backend_from_configuration(self, monkeypatch):
+        """Test that the backend is chosen by CACHE_BACKEND alone"""
+        monkeypatch.setattr(shared_cache, "_connect_redis", lambda url: FakeRedis())
+
+        monkeypatch.setenv("CACHE_BACKEND", "none")
+        assert shared_cache.create_backend() is None
+
+        monkeypatch.setenv("CACHE_BACKEND", "memory")
+        assert isinstance(shared_cache.create_backend(), shared_cache.MemoryBackend)
+
+        monkeypatch.setenv("CACHE_BACKEND", "redis")
+        assert isinstance(shared_cache.create_backend(), shared_cache.RedisBackend)
+
+        monkeypatch.setenv("CACHE_BACKEND", "memcached")
+        with pytest.raises(ValueError):
+            shared_cache.create_backend()
+
+    @pytest.mark.parametrize("make_backend", ["memory", "redis"])
+    def test_round_trip(self, make_backend):
+        """Test that both backends store and return bytes"""
+        if make_backend == "memory":
+            backend = shared_cache.MemoryBackend(ttl_seconds=60)
+        else:
+            backend = shared_cache.RedisBackend(FakeRedis(), ttl_seconds=60)
+
+        assert backend.get("k") is None
+        backend.set("k", b'{"a":1}')
+        assert backend.get("k") == b'{"a":1}'
+        assert backend.stats()["hits"] == 1
+
+    def test_redis_sets_ttl(self):
+        """Test that entries are written with the configured expiry"""
+        client = FakeRedis()
+        shared_cache.RedisBackend(client, ttl_seconds=120).set("k", b"v")
+
+        assert client.expiry["k"] == 120
+
+    def test_redis_errors_are_misses(self):
+        """Test that an unreachable server degrades to a miss"""
+        backend = shared_cache.RedisBackend(BrokenRedis(), ttl_seconds=60)
+
+        backend.set("k", b"v")
+        assert backend.get("k") is None
+        assert backend.stats()["errors"] == 2
+
+
+class TestEndpointCaching:
+    def test_run_list_hit_skips_dynamodb(self, mock_dynamodb, auth_headers, fake_redis, monkeypatch):
+        """Test that a cached run list is served without querying runs"""
+        from src.runs import app as app_module
+
+        client = TestClient(app_module.app)
+        _post_run(client, auth_headers, "2024-05-02", 5.0)
+
+        first = client.get("/runs", headers=auth_headers)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("runs table should not be queried")
+
+        monkeypatch.setattr(app_module, "get_runs_by_user", fail)
+        second = client.get("/runs", headers=auth_headers)
+
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["etag"] == first.headers["etag"]
+
+    def test_write_moves_readers_to_new_key(self, mock_dynamodb, auth_headers, fake_redis):
+        """Test that a write invalidates cached payloads via the version bump"""
+        from src.runs.app import app
+
+        client = TestClient(app)
+        _post_run(client, auth_headers, "2024-05-02", 5.0)
+        assert len(client.get("/runs", headers=auth_headers).json()) == 1
+
+        _post_run(client, auth_headers, "2024-05-03", 8.0)
+
+        assert len(client.get("/runs", headers=auth_headers).json()) == 2
+        assert len(fake_redis.data) == 2
+
+    def test_dashboard_is_cached_per_day(self, mock_dynamodb, auth_headers, fake_redis, monkeypatch):
+        """Test that dashboard payloads are keyed by both versions and the day"""
+        from src.runs.app import app
+
+        monkeypatch.setenv("RUNS_INDEX_LAG_SECONDS", "0")
+        client = TestClient(app)
+        _post_run(client, auth_headers, "2024-05-02", 5.0)
+        target = {"target_type": "monthly", "period": "2024-05", "distance_km": 50.0}
+        assert client.post("/targets", json=target, headers=auth_headers).status_code == 201
+
+        first = client.get("/dashboard?as_of=2024-05-21", headers=auth_headers).json()
+        second = client.get("/dashboard?as_of=2024-05-21", headers=auth_headers).json()
+        client.get("/dashboard?as_of=2024-05-22", headers=auth_headers)
+
+        assert first == second
+        assert first["progress"][0]["current"] == 5.0
+        dashboard_keys = [key for key in fake_redis.data if ":dashboard:" in key]
+        assert len(dashboard_keys) == 2
+        assert all("runs=1,targets=1" in key for key in dashboard_keys)
+
+    def test_dashboard_is_not_shared_until_the_index_settles(
+        self, mock_dynamodb, auth_headers, fake_redis, monkeypatch
+    ):
+        """Test that a dashboard built right after a runs write is served but not stored"""
+        from src.runs.app import app
+
+        client = TestClient(app)
+        _post_run(client, auth_headers, "2024-05-02", 5.0)
+
+        response = client.get("/dashboard?as_of=2024-05-21", headers=auth_headers)
+        assert response.status_code == 200
+        assert not any(":dashboard:" in key for key in fake_redis.data)
+
+        monkeypatch.setenv("RUNS_INDEX_LAG_SECONDS", "0")
+        client.get("/dashboard?as_of=2024-05-21", headers=auth_headers)
+        assert any(":dashboard:" in key for key in fake_redis.data)
+
+    def test_cached_builds_read_consistently(self, mock_dynamodb, auth_headers, fake_redis, monkeypatch):
+        """Test that payloads stored under a version come from consistent base-table reads"""
+        from src.runs.app import app
+        import src.runs.dal.run_dal as run_dal
+        import src.runs.dal.target_dal as target_dal
+
+        client = TestClient(app)
+        _post_run(client, auth_headers, "2024-05-02", 5.0)
+        target = {"target_type": "monthly", "period": "2024-05", "distance_km": 50.0}
+        assert client.post("/targets", json=target, headers=auth_headers).status_code == 201
+
+        queries = _record_queries(monkeypatch, run_dal, target_dal)
+
+        assert client.get("/runs", headers=auth_headers).status_code == 200
+        assert client.get("/runs?fields=date,distance_km", headers=auth_headers).status_code == 200
+        assert client.get("/targets", headers=auth_headers).status_code == 200
+
+        assert len(queries) == 3
+        assert all(query.get("ConsistentRead") for query in queries)
+        assert not any("IndexName" in query for query in queries)
+
+    @pytest.mark.parametrize(
+        "year_buckets, index", [("false", "user-date-index"), ("true", "user-year-index")]
+    )
+    def test_dashboard_reads_runs_through_the_index(
+        self, mock_dynamodb, auth_headers, fake_redis, monkeypatch, year_buckets, index
+    ):
+        """Test that the dashboard reads only the year's runs, not the user's history"""
+        from src.runs.app import app
+        import src.runs.dal.run_dal as run_dal
+
+        monkeypatch.setenv("RUNS_YEAR_BUCKETS", year_buckets)
+        client = TestClient(app)
+        _post_run(client, auth_headers, "2023-12-31", 9.0)
+        _post_run(client, auth_headers, "2024-05-02", 5.0)
+        target = {"target_type": "monthly", "period": "2024-05", "distance_km": 50.0}
+        assert client.post("/targets", json=target, headers=auth_headers).status_code == 201
+
+        queries = _record_queries(monkeypatch, run_dal)
+        dashboard = client.get("/dashboard?as_of=2024-05-21", headers=auth_headers).json()
+
+        assert [run["date"] for run in dashboard["runs"]] == ["2024-05-02"]
+        assert dashboard["progress"][0]["current"] == 5.0
+        assert [query.get("IndexName") for query in queries] == [index]
@@ -0,0 +1,112 @@
+# tests/test_simplify.py
+"""Test track simplification (Ramer-Douglas-Peucker and Visvalingam-Whyatt)"""
+
+import math
+
+import pytest
+
+from src.runs.simplify import (
+    DETAIL_LEVELS,
+    _distance_to_segment,
+    _project,
+    rdp,
+    simplify,
+    visvalingam,
+)
+
+METHODS = [rdp, visvalingam]
+
+
+def _wiggly_loop(count=10_000):
+    """A loop around a park with ~1 m GPS jitter, one fix per second"""
+    return [
+        (
+            52.370216 + 0.004 * math.sin(i / 300) + 0.00001 * (i % 7),
+            4.895168 + 0.006 * math.cos(i / 300),
+            float(i),
+        )
+        for i in range(count)
+    ]
+
+
+def _max_deviation_m(points, simplified):
+    """Largest distance from an original point to the simplified line"""
+    xy = _project(points)
+    kept = _project(simplified)
+    # Points are matched to the simplified segment spanning their index
+    indexes = [points.index(point) for point in simplified]
+    worst = 0.0
+    for (a, b), (start, end) in zip(zip(kept, kept[1:]), zip(indexes, indexes[1:])):
+        for i in range(start, end + 1):
+            worst = max(worst, _distance_to_segment(xy[i], a, b))
+    return worst
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_straight_line_collapses_to_endpoints(method):
+    """Test that collinear points are all dropped"""
+    points = [(52.0 + i * 0.0001, 4.9, float(i)) for i in range(100)]
+
+    assert method(points, 1.0) == [points[0], points[-1]]
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_short_tracks_are_unchanged(method):
+    """Test that tracks with fewer than 3 points come back as they are"""
+    assert method([], 5.0) == []
+    assert method([(1.0, 2.0, 0.0), (1.1, 2.1, 1.0)], 5.0) == [(1.0, 2.0, 0.0), (1.1, 2.1, 1.0)]
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_corner_is_kept(method):
+    """Test that a sharp turn survives simplification"""
+    leg_a = [(52.0 + i * 0.0001, 4.9, float(i)) for i in range(50)]
+    leg_b = [(52.0049, 4.9 + i * 0.0001, float(50 + i)) for i in range(1, 50)]
+
+    simplified = method(leg_a + leg_b, 5.0)
+
+    assert leg_a[-1] in simplified
+    assert simplified[0] == leg_a[0] and simplified[-1] == leg_b[-1]
+
+
+def test_rdp_stays_within_tolerance():
+    """Test that no original point is further than the tolerance from the result"""
+    points = _wiggly_loop(3000)
+
+    for detail, tolerance in DETAIL_LEVELS.items():
+        simplified = simplify(points, detail)
+        assert _max_deviation_m(points, simplified) <= tolerance + 1e-6
+
+
+@pytest.mark.parametrize("method", ["rdp", "visvalingam"])
+def test_detail_levels_shrink_the_track(method):
+    """Test that each level keeps fewer points than the next, low a few percent"""
+    points = _wiggly_loop()
+
+    sizes = {detail: len(simplify(points, detail, method)) for detail in DETAIL_LEVELS}
+
+    assert sizes["low"] < sizes["medium"] < sizes["high"] < len(points)
+    assert sizes["low"] < len(points) / 20
+
+
+def test_simplify_keeps_timestamps():
+    """Test that kept points are the original (lat, lon, seconds) tuples"""
+    points = _wiggly_loop(1000)
+
+    simplified = simplify(points, "medium")
+
+    assert set(simplified) <= set(points)
+    assert [p[2] for p in simplified] == sorted(p[2] for p in simplified)
+
+
+def test_simplify_method_from_environment(monkeypatch):
+    """Test TRACK_SIMPLIFY_METHOD selects Visvalingam-Whyatt"""
+    points = _wiggly_loop(2000)
+    monkeypatch.setenv("TRACK_SIMPLIFY_METHOD", "visvalingam")
+
+    assert simplify(points, "low") == visvalingam(points, DETAIL_LEVELS["low"])
+
+
+def test_unknown_detail_is_rejected():
+    with pytest.raises(ValueError):
+        simplify(_wiggly_loop(10), "ultra")
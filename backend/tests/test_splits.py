@@ -0,0 +1,176 @@
+# tests/test_splits.py
+"""Test the split analysis engine and GET /runs/{run_id}/splits"""
+
+import pytest
+from fastapi.testclient import TestClient
+import importlib
+import time
+
+# Metres per degree of latitude for the engine's earth radius
+METRES_PER_DEGREE = 6371008.8 * 3.141592653589793 / 180
+
+
+def _track(paces, step_m=10.0):
+    """Trackpoints due north; paces[i] is the pace (s/km) during km i+1"""
+    points = [(50.0, 8.0, 0.0)]
+    distance = seconds = 0.0
+    for pace in paces:
+        for _ in range(int(1000 / step_m)):
+            distance += step_m
+            seconds += pace * step_m / 1000
+            points.append((50.0 + distance / METRES_PER_DEGREE, 8.0, seconds))
+    return points
+
+
+ENGINES = [
+    pytest.param(False, id="python"),
+    pytest.param(True, id="numpy", marks=pytest.mark.skipif(
+        importlib.util.find_spec("numpy") is None, reason="numpy not installed"
+    )),
+]
+
+
+@pytest.mark.parametrize("use_numpy", ENGINES)
+def test_per_km_splits(use_numpy):
+    """Test one split per km with the pace run in that km"""
+    from src.runs.splits import compute_splits
+
+    analysis = compute_splits(_track([300, 290, 310]), use_numpy=use_numpy)
+
+    assert analysis["distance_m"] == pytest.approx(3000, abs=1)
+    assert analysis["duration_s"] == pytest.approx(900, abs=0.1)
+    assert [split["split"] for split in analysis["splits"]] == [1, 2, 3]
+    assert [split["duration_s"] for split in analysis["splits"]] == pytest.approx(
+        [300, 290, 310], abs=0.5
+    )
+
+
+@pytest.mark.parametrize("use_numpy", ENGINES)
+def test_partial_last_split(use_numpy):
+    """Test that the distance after the last full km is its own split"""
+    from src.runs.splits import compute_splits
+
+    points = _track([300, 300])
+    points = points[: 150 + 1]  # 1.5 km
+
+    splits = compute_splits(points, use_numpy=use_numpy)["splits"]
+
+    assert len(splits) == 2
+    assert splits[1]["distance_m"] == pytest.approx(500, abs=1)
+    assert splits[1]["pace_s_per_km"] == pytest.approx(300, abs=1)
+
+
+@pytest.mark.parametrize("use_numpy", ENGINES)
+def test_fastest_segments_and_negative_split(use_numpy):
+    """Test the fastest windows and split type of a progression run"""
+    from src.runs.splits import compute_splits
+
+    analysis = compute_splits(_track([330, 320, 310, 300, 290, 280]), use_numpy=use_numpy)
+
+    fastest = {segment["segment"]: segment for segment in analysis["fastest_segments"]}
+    assert set(fastest) == {"1k", "5k"}
+    assert fastest["1k"]["duration_s"] == pytest.approx(280, abs=0.5)
+    assert fastest["1k"]["start_m"] == pytest.approx(5000, abs=10)
+    assert fastest["5k"]["duration_s"] == pytest.approx(1500, abs=0.5)
+    assert analysis["split_type"] == "negative"
+    assert analysis["first_half_s"] > analysis["second_half_s"]
+
+
+@pytest.mark.parametrize("use_numpy", ENGINES)
+def test_positive_and_even_splits(use_numpy):
+    """Test that slowing down is a positive split and steady running is even"""
+    from src.runs.splits import compute_splits
+
+    assert compute_splits(_track([280, 320]), use_numpy=use_numpy)["split_type"] == "positive"
+    assert compute_splits(_track([300, 300]), use_numpy=use_numpy)["split_type"] == "even"
+
+
+def test_untimed_or_short_tracks_are_rejected():
+    """Test that tracks that can't be analysed raise ValueError"""
+    from src.runs.splits import compute_splits
+
+    with pytest.raises(ValueError):
+        compute_splits([(50.0, 8.0, 0.0)])
+    with pytest.raises(ValueError):
+        compute_splits([(50.0, 8.0, None), (50.1, 8.0, None)])
+    with pytest.raises(ValueError):
+        compute_splits([(50.0, 8.0, 0.0), (50.0, 8.0, 10.0)])
+
+
+def test_python_engine_handles_10k_points_quickly():
+    """Test that even the fallback engine stays well under a request budget"""
+    from src.runs.splits import compute_splits
+
+    points = _track([300] * 10, step_m=1.0)
+    assert len(points) == 10_001
+
+    start = time.perf_counter()
+    compute_splits(points, use_numpy=False)
+
+    assert time.perf_counter() - start < 2.0
+
+
+@pytest.fixture
+def mock_aws_services(aws):
+    return aws("runs", "versions", buckets={"TRACKS_BUCKET": "test-tracks"})
+
+
+def test_get_splits(mock_aws_services, auth_headers, save_run_with_track):
+    """Test the endpoint renders splits with formatted paces, and honors ETags"""
+    from src.runs.app import app
+
+    run = save_run_with_track(_track([310, 300, 290]), distance_km="3", duration="00:15:00")
+    client = TestClient(app)
+
+    response = client.get(f"/runs/{run.run_id}/splits", headers=auth_headers)
+
+    assert response.status_code == 200
+    analysis = response.json()
+    assert analysis["run_id"] == run.run_id
+    assert [split["pace"] for split in analysis["splits"]] == ["05:10", "05:00", "04:50"]
+    assert analysis["fastest_segments"][0]["segment"] == "1k"
+    assert analysis["fastest_segments"][0]["duration"] == "00:04:50"
+    assert analysis["split_type"] == "negative"
+
+    etag = response.headers["etag"]
+    response = client.get(
+        f"/runs/{run.run_id}/splits", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+
+def test_splits_decode_off_the_event_loop(
+    mock_aws_services, auth_headers, save_run_with_track, monkeypatch
+):
+    """Test that the track is decoded on the executor, not on the event loop"""
+    import asyncio
+    from src.runs import track_codec
+    from src.runs.app import app
+
+    run = save_run_with_track(_track([300, 300]), distance_km="2", duration="00:10:00")
+    real_decode = track_codec.decode_track
+    on_loop = []
+
+    def decode(data):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return real_decode(data)
+
+    monkeypatch.setattr(track_codec, "decode_track", decode)
+
+    response = TestClient(app).get(f"/runs/{run.run_id}/splits", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert on_loop == [False]
+
+
+def test_splits_of_run_without_track_is_404(mock_aws_services, auth_headers):
+    """Test that hand-logged runs have no splits"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+
+    assert client.get("/runs/unknown/splits", headers=auth_headers).status_code == 404
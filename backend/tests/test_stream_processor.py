@@ -0,0 +1,343 @@
+# tests/test_stream_processor.py
+"""Test the Runs table stream consumer against fake stream records"""
+
+import pytest
+from fastapi.testclient import TestClient
+import boto3
+import importlib
+import json
+import sys
+from datetime import date
+from decimal import Decimal
+
+from tests.conftest import make_auth_headers
+
+USER_ID = "test-user-123"
+
+
+@pytest.fixture
+def mock_aws_services(aws):
+    return aws(
+        "runs",
+        "records",
+        "rollups",
+        "versions",
+        "groups",
+        "leaderboards",
+        queues={"STREAM_DLQ_URL": "stream-dlq"},
+    )
+
+
+@pytest.fixture
+def processor(mock_aws_services):
+    return importlib.import_module("src.runs.stream_processor")
+
+
+def _item(run_id, day, distance_km, duration_seconds=1800):
+    return {
+        "user_id": USER_ID,
+        "run_id": run_id,
+        "date": day,
+        "distance_km": Decimal(str(distance_km)),
+        "duration_seconds": duration_seconds,
+        "notes": "",
+        "created_at": "2024-05-01T07:00:00",
+        "updated_at": "2024-05-01T07:00:00",
+    }
+
+
+def _tombstone(run_id):
+    return {
+        "user_id": USER_ID,
+        "run_id": run_id,
+        "deleted_at": "2024-05-02T07:00:00",
+        "updated_at": "2024-05-02T07:00:00",
+        "expires_at": 1893456000,
+    }
+
+
+def _rollups(mock_aws_services):
+    items = mock_aws_services.Table("test-rollups").scan()["Items"]
+    return {
+        item["period_key"]: (float(item["distance_km"]), int(item["run_count"]))
+        for item in items
+        if not item["period_key"].startswith("event#")
+    }
+
+
+def _records(mock_aws_services):
+    items = mock_aws_services.Table("test-records").scan()["Items"]
+    return {item["bucket"]: item["run_id"] for item in items}
+
+
+def test_insert_updates_rollups_and_records(processor, mock_aws_services):
+    """Test that a new run is counted in week, month and year rollups and records"""
+    record = processor.make_stream_record("INSERT", new_item=_item("r1", "2024-05-01", 5.2))
+
+    assert processor.lambda_handler({"Records": [record]}, None) == {"batchItemFailures": []}
+
+    assert _rollups(mock_aws_services) == {
+        "week#2024-W18": (5.2, 1),
+        "month#2024-05": (5.2, 1),
+        "year#2024": (5.2, 1),
+    }
+    assert _records(mock_aws_services) == {"5k": "r1"}
+
+
+def test_redelivered_record_is_applied_once(processor, mock_aws_services):
+    """Test that replaying the same stream record doesn't double count"""
+    record = processor.make_stream_record("INSERT", new_item=_item("r1", "2024-05-01", 8))
+
+    processor.process_records([record])
+    processor.process_records([record])
+
+    assert _rollups(mock_aws_services)["year#2024"] == (8.0, 1)
+
+
+def test_modify_moves_run_between_periods(processor, mock_aws_services):
+    """Test that an edit moves its distance and drops emptied periods"""
+    old = _item("r1", "2024-04-30", 8)
+    new = _item("r1", "2024-05-20", 9)
+    processor.process_records(
+        [
+            processor.make_stream_record("INSERT", new_item=old, sequence_number=1),
+            processor.make_stream_record("MODIFY", old, new, sequence_number=2),
+        ]
+    )
+
+    assert _rollups(mock_aws_services) == {
+        "week#2024-W21": (9.0, 1),
+        "month#2024-05": (9.0, 1),
+        "year#2024": (9.0, 1),
+    }
+
+
+def test_tombstone_removes_run_and_its_expiry_is_ignored(processor, mock_aws_services):
+    """Test deletes (run replaced by a tombstone) and the later TTL removal"""
+    run = _item("r1", "2024-05-01", 10.5, 3000)
+    processor.process_records(
+        [
+            processor.make_stream_record("INSERT", new_item=run, sequence_number=1),
+            processor.make_stream_record("MODIFY", run, _tombstone("r1"), sequence_number=2),
+            processor.make_stream_record("REMOVE", old_item=_tombstone("r1"), sequence_number=3),
+        ]
+    )
+
+    assert _rollups(mock_aws_services) == {}
+    assert _records(mock_aws_services) == {}
+
+
+def test_leaderboards_follow_stream(processor, mock_aws_services):
+    """Test that a group member's runs reach the group's boards"""
+    group_dal = importlib.import_module("src.runs.dal.group_dal")
+    leaderboard_dal = importlib.import_module("src.runs.dal.leaderboard_dal")
+    group = group_dal.create_group("Club", USER_ID, "Alice")
+
+    processor.process_records(
+        [processor.make_stream_record("INSERT", new_item=_item("r1", "2024-05-01", 6.5))]
+    )
+
+    entries, _ = leaderboard_dal.get_leaderboard_page(group["group_id"], "month#2024-05")
+    assert [(e["user_id"], float(e["distance_km"])) for e in entries] == [(USER_ID, 6.5)]
+
+
+def test_redelivery_with_changed_groups_applies_each_update_once(
+    processor, mock_aws_services, monkeypatch
+):
+    """Test that a record retried after its groups changed skips only what was applied"""
+    leaderboard_dal = importlib.import_module("src.runs.dal.leaderboard_dal")
+    record = processor.make_stream_record("INSERT", new_item=_item("r1", "2024-05-01", 4))
+    groups = ["g1", "g2", "g3"]
+    monkeypatch.setattr(
+        processor,
+        "get_groups_for_user",
+        lambda user_id: [
+            {"group_id": group_id, "user_id": user_id, "display_name": "Alice"}
+            for group_id in groups
+        ],
+    )
+    # Rollups and g1 fit the first transaction, g2 and g3 the second
+    monkeypatch.setattr(processor, "MAX_ACTIONS", 7)
+
+    real_commit = processor.Transaction.commit
+    commits = {"count": 0}
+
+    def flaky_commit(transaction):
+        commits["count"] += 1
+        if commits["count"] == 2:
+            raise RuntimeError("throttled")
+        real_commit(transaction)
+
+    monkeypatch.setattr(processor.Transaction, "commit", flaky_commit)
+    assert processor.process_records([record]) == [{"itemIdentifier": "1"}]
+
+    # By the retry the user left g1 and joined g4
+    groups[:] = ["g2", "g3", "g4"]
+    assert processor.process_records([record]) == []
+
+    assert _rollups(mock_aws_services)["year#2024"] == (4.0, 1)
+    for group_id in ["g1", "g2", "g3", "g4"]:
+        entries, _ = leaderboard_dal.get_leaderboard_page(group_id, "month#2024-05")
+        assert [(e["user_id"], float(e["distance_km"])) for e in entries] == [(USER_ID, 4.0)]
+
+
+def test_poison_record_is_dead_lettered(processor, mock_aws_services):
+    """Test that a record that isn't a run goes to the DLQ without blocking the batch"""
+    poison = processor.make_stream_record(
+        "INSERT", new_item={"user_id": USER_ID, "run_id": "bad"}, sequence_number=1
+    )
+    good = processor.make_stream_record(
+        "INSERT", new_item=_item("r2", "2024-05-01", 7), sequence_number=2
+    )
+
+    assert processor.process_records([poison, good]) == []
+
+    assert _rollups(mock_aws_services)["year#2024"] == (7.0, 1)
+    messages = boto3.client("sqs").receive_message(
+        QueueUrl=processor.os.environ["STREAM_DLQ_URL"]
+    )["Messages"]
+    assert json.loads(messages[0]["Body"])["record"]["eventID"] == "local-1"
+
+
+def test_failure_checkpoints_at_the_failed_record(processor, mock_aws_services, monkeypatch):
+    """Test that a transient failure reports its sequence number and resumes cleanly"""
+    records = [
+        processor.make_stream_record(
+            "INSERT", new_item=_item(f"r{i}", "2024-05-01", 1), sequence_number=i
+        )
+        for i in range(1, 4)
+    ]
+    real_update_records = processor.update_records
+    calls = {"count": 0}
+
+    def flaky(old_run, new_run):
+        calls["count"] += 1
+        if calls["count"] == 2:
+            raise RuntimeError("throttled")
+        real_update_records(old_run, new_run)
+
+    monkeypatch.setattr(processor, "update_records", flaky)
+
+    assert processor.process_records(records) == [{"itemIdentifier": "2"}]
+    assert _rollups(mock_aws_services)["year#2024"] == (2.0, 2)
+
+    # Lambda retries from the checkpoint: record 2's aggregates were already
+    # committed before the failure and must not be counted again
+    assert processor.process_records(records[1:]) == []
+    assert _rollups(mock_aws_services)["year#2024"] == (3.0, 3)
+
+
+def test_request_path_leaves_aggregates_to_stream(
+    mock_aws_services, auth_headers, monkeypatch
+):
+    """Test that with AGGREGATES_FROM_STREAM the API only writes the run"""
+    monkeypatch.setenv("AGGREGATES_FROM_STREAM", "true")
+    from src.runs.app import app
+
+    client = TestClient(app)
+    response = client.post(
+        "/runs",
+        json={"date": "2024-05-01", "distance_km": 5.1, "duration": "00:25:00"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    assert _records(mock_aws_services) == {}
+
+    # The stream delivers the write
+    processor = importlib.import_module("src.runs.stream_processor")
+    item = mock_aws_services.Table("test-runs").get_item(
+        Key={"user_id": USER_ID, "run_id": response.json()["run_id"]}
+    )["Item"]
+    processor.process_records([processor.make_stream_record("INSERT", new_item=item)])
+
+    assert set(_records(mock_aws_services)) == {"5k"}
+    rollups = client.get("/rollups", params={"period": "month"}, headers=auth_headers).json()
+    assert rollups == [
+        {
+            "period_key": "month#2024-05",
+            "distance_km": 5.1,
+            "duration": "00:25:00",
+            "run_count": 1,
+        }
+    ]
+    response = client.get("/rollups", params={"period": "day"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_group_refresh_and_stream_count_each_run_once(mock_aws_services, monkeypatch):
+    """Test create -> join -> process stream: runs the joins counted aren't added again"""
+    monkeypatch.setenv("AGGREGATES_FROM_STREAM", "true")
+    from src.runs.app import app
+
+    client = TestClient(app)
+    runs_table = mock_aws_services.Table("test-runs")
+    today = date.today().isoformat()
+
+    def log_run(user_id, distance_km):
+        response = client.post(
+            "/runs",
+            json={"date": today, "distance_km": distance_km, "duration": "00:30:00"},
+            headers=make_auth_headers(user_id),
+        )
+        assert response.status_code == 201
+        key = {"user_id": user_id, "run_id": response.json()["run_id"]}
+        return runs_table.get_item(Key=key)["Item"]
+
+    # Both runs are written before the groups exist or are joined, and their
+    # stream records are still queued when the refreshes count them
+    queued = [log_run("alice", 5), log_run("bob", 12)]
+
+    response = client.post(
+        "/groups", json={"name": "Club", "display_name": "Alice"}, headers=make_auth_headers("alice")
+    )
+    group_id = response.json()["group_id"]
+    response = client.post(
+        f"/groups/{group_id}/members", json={"display_name": "Bob"}, headers=make_auth_headers("bob")
+    )
+    assert response.status_code == 201
+
+    processor = importlib.import_module("src.runs.stream_processor")
+    leaderboard_dal = importlib.import_module("src.runs.dal.leaderboard_dal")
+    records = [
+        processor.make_stream_record("INSERT", new_item=item, sequence_number=number)
+        for number, item in enumerate(queued, 1)
+    ]
+    assert processor.process_records(records) == []
+
+    # A run after the join is still counted through the stream
+    later = log_run("bob", 3)
+    processor.process_records(
+        [processor.make_stream_record("INSERT", new_item=later, sequence_number=3)]
+    )
+
+    key = leaderboard_dal.period_key("month", date.today())
+    entries, _ = leaderboard_dal.get_leaderboard_page(group_id, key)
+    assert [(e["user_id"], float(e["distance_km"]), int(e["run_count"])) for e in entries] == [
+        ("bob", 15.0, 2),
+        ("alice", 5.0, 1),
+    ]
+
+
+def test_replay_tool_reads_ndjson(mock_aws_services, tmp_path):
+    """Test the local replay tool against a file of fake change events"""
+    sys.path.insert(0, "tools")
+    try:
+        replay_stream = importlib.import_module("replay_stream")
+    finally:
+        sys.path.remove("tools")
+
+    old = {**_item("r1", "2024-05-01", 4), "distance_km": 4}
+    new = {**old, "distance_km": 6.5}
+    events = tmp_path / "events.ndjson"
+    events.write_text(
+        "\n".join(
+            json.dumps(event)
+            for event in [
+                {"eventName": "INSERT", "NewImage": old},
+                {"eventName": "MODIFY", "OldImage": old, "NewImage": new},
+            ]
+        )
+    )
+
+    assert replay_stream.main([str(events)]) == 0
+    assert _rollups(mock_aws_services)["month#2024-05"] == (6.5, 1)
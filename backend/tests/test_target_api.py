@@ -32,6 +32,7 @@ def mock_dynamodb():
         os.environ["RUNS_TABLE"] = "test-runs"
         os.environ["USERS_TABLE"] = "test-users"
         os.environ["TARGETS_TABLE"] = "test-targets-enhanced"
+        os.environ["VERSIONS_TABLE"] = "test-versions"
         os.environ["JWT_SECRET"] = "test-secret"  # CRITICAL: Set this early
 
         # FORCE MODULE RELOAD to pick up new environment variables
@@ -39,6 +40,7 @@ def mock_dynamodb():
             "src.runs.app",
             "src.runs.dal.target_dal",
             "src.runs.models.target",
+            "src.runs.dal.version_dal",
             "src.runs.auth.jwt_middleware",
         ]
 
@@ -74,6 +76,15 @@ def mock_dynamodb():
             BillingMode="PAY_PER_REQUEST",
         )
 
+        dynamodb.create_table(
+            TableName="test-versions",
+            KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "user_id", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
         yield dynamodb
 
 
@@ -0,0 +1,185 @@
+# tests/test_target_cache.py
+"""Test the per-container targets cache and its write invalidation"""
+
+import importlib
+import pytest
+from decimal import Decimal
+
+from src.runs.dal.cache import LocalCache
+from src.runs.models.target import Target
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLocalCache:
+    def test_get_after_set_is_a_hit(self):
+        """Test that a stored value is returned until it expires"""
+        clock = FakeClock()
+        cache = LocalCache(max_entries=10, max_bytes=1000, ttl_seconds=30, clock=clock)
+
+        cache.set("user-1", ["a"], size=10)
+        assert cache.get("user-1") == ["a"]
+
+        clock.now = 30
+        assert cache.get("user-1") is None
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["expirations"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_evicts_least_recently_used_entry(self):
+        """Test that the entry bound evicts the LRU key"""
+        cache = LocalCache(max_entries=2, max_bytes=1000, ttl_seconds=30)
+
+        cache.set("a", 1, size=1)
+        cache.set("b", 2, size=1)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3, size=1)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_bound(self):
+        """Test that total size stays within max_bytes"""
+        cache = LocalCache(max_entries=10, max_bytes=100, ttl_seconds=30)
+
+        cache.set("a", 1, size=60)
+        cache.set("b", 2, size=60)
+        cache.set("huge", 3, size=500)  # larger than the whole cache
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("huge") is None
+        assert cache.stats()["bytes"] == 60
+
+    def test_invalidate_during_load_drops_stale_value(self):
+        """Test that a load racing a write doesn't cache the pre-write value"""
+        cache = LocalCache(max_entries=10, max_bytes=1000, ttl_seconds=30)
+
+        generation = cache.generation("user-1")
+        cache.invalidate("user-1")  # a write lands while the read is in flight
+        cache.set("user-1", ["stale"], size=10, generation=generation)
+
+        assert cache.get("user-1") is None
+
+    def test_zero_ttl_disables_cache(self):
+        """Test that TTL 0 turns caching off"""
+        cache = LocalCache(max_entries=10, max_bytes=1000, ttl_seconds=0)
+
+        cache.set("user-1", ["a"], size=10)
+        assert cache.get("user-1") is None
+
+
+@pytest.fixture
+def target_dal(aws):
+    """Fresh target DAL module backed by a mock targets table"""
+    aws("targets", "versions")
+    return importlib.import_module("src.runs.dal.target_dal")
+
+
+def _count_queries(monkeypatch, target_dal):
+    calls = []
+    original = target_dal._query_targets
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(target_dal, "_query_targets", counting)
+    return calls
+
+
+def _target(target_type="monthly", distance_km="100"):
+    return Target(
+        user_id="user-1",
+        target_type=target_type,
+        period="2025-06" if target_type == "monthly" else "2025",
+        distance_km=Decimal(distance_km),
+    )
+
+
+class TestTargetDalCache:
+    def test_second_read_is_served_from_cache(self, target_dal, monkeypatch):
+        """Test that repeated reads don't hit DynamoDB"""
+        target_dal.save_target(_target())
+        queries = _count_queries(monkeypatch, target_dal)
+
+        first = target_dal.get_targets_by_user("user-1")
+        second = target_dal.get_targets_by_user("user-1")
+
+        assert len(queries) == 1
+        assert [t.target_id for t in first] == [t.target_id for t in second]
+        assert first[0] is not second[0]  # callers get their own models
+        assert target_dal.targets_cache_stats()["hits"] == 1
+
+    def test_projected_read_uses_cached_items(self, target_dal, monkeypatch):
+        """Test that projected reads are served from a warm cache"""
+        target_dal.save_target(_target())
+        target_dal.get_targets_by_user("user-1")
+        queries = _count_queries(monkeypatch, target_dal)
+
+        items = target_dal.get_targets_by_user("user-1", fields=["target_type", "distance_km"])
+
+        assert queries == []
+        assert items == [{"target_type": "monthly", "distance_km": Decimal("100")}]
+
+    @pytest.mark.parametrize("write", ["save", "upsert", "delete"])
+    def test_writes_invalidate(self, target_dal, write):
+        """Test that every write path invalidates the user's entry"""
+        target = _target()
+        target_dal.save_target(target)
+        assert len(target_dal.get_targets_by_user("user-1")) == 1
+
+        if write == "save":
+            target_dal.save_target(_target("yearly", "1200"))
+            expected = 2
+        elif write == "upsert":
+            target_dal.upsert_target(_target("monthly", "150"))
+            expected = 1
+        else:
+            target_dal.delete_target_by_id(target.target_id, "user-1")
+            expected = 0
+
+        targets = target_dal.get_targets_by_user("user-1")
+        assert len(targets) == expected
+        if write == "upsert":
+            assert targets[0].distance_km == Decimal("150")
+
+    def test_version_labelled_reads_skip_cache(self, target_dal, monkeypatch):
+        """Test that consistent reads and upserts see writes from other containers"""
+        target_dal.get_targets_by_user("user-1")  # caches the empty list
+
+        # Another container writes; this container's entry is now stale
+        other = _target()
+        target_dal._get_table().put_item(
+            Item={
+                "user_id": other.user_id,
+                "target_id": other.target_id,
+                "target_type": other.target_type,
+                "period": other.period,
+                "distance_km": other.distance_km,
+                "created_at": other.created_at.isoformat(),
+            }
+        )
+        assert target_dal.get_targets_by_user("user-1") == []
+
+        queries = _count_queries(monkeypatch, target_dal)
+        consistent = target_dal.get_targets_by_user("user-1", consistent=True)
+        assert [t.target_id for t in consistent] == [other.target_id]
+        assert queries[0] == ("user-1", None)
+
+        # The upsert finds the other container's target and replaces it
+        replacement = _target("monthly", "150")
+        target_dal.upsert_target(replacement)
+        targets = target_dal.get_targets_by_user("user-1", consistent=True)
+        assert [t.target_id for t in targets] == [replacement.target_id]
@@ -0,0 +1,294 @@
+# tests/test_track_import.py
+"""Test GPX/TCX activity import (parsers, POST /runs/import and the CLI)"""
+
+import pytest
+from fastapi.testclient import TestClient
+import io
+import zipfile
+from datetime import date, datetime, timedelta
+
+
+def _gpx(start="2024-03-10T07:00:00Z", points=11, name="Morning Run"):
+    """A straight track due north: 0.009 degrees (~1 km) and 5 minutes per step"""
+    begin = datetime.fromisoformat(start.replace("Z", "+00:00"))
+    trkpts = "".join(
+        f'<trkpt lat="{52.0 + i * 0.009:.6f}" lon="4.000000"><ele>1.0</ele>'
+        f"<time>{(begin + timedelta(minutes=5 * i)).strftime('%Y-%m-%dT%H:%M:%SZ')}</time></trkpt>"
+        for i in range(points)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1">'
+        f"<metadata><time>{start}</time></metadata>"
+        f"<trk><name>{name}</name><trkseg>{trkpts}</trkseg></trk></gpx>"
+    ).encode("utf-8")
+
+
+TCX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">
+  <Activities>
+    <Activity Sport="Running">
+      <Id>2024-04-01T18:30:00Z</Id>
+      <Lap StartTime="2024-04-01T18:30:00Z">
+        <TotalTimeSeconds>1500</TotalTimeSeconds>
+        <DistanceMeters>5000</DistanceMeters>
+        <Track>
+          <Trackpoint>
+            <Time>2024-04-01T18:30:00Z</Time>
+            <Position><LatitudeDegrees>52.0</LatitudeDegrees><LongitudeDegrees>4.0</LongitudeDegrees></Position>
+            <DistanceMeters>0</DistanceMeters>
+          </Trackpoint>
+          <Trackpoint>
+            <Time>2024-04-01T18:55:30Z</Time>
+            <Position><LatitudeDegrees>52.04</LatitudeDegrees><LongitudeDegrees>4.0</LongitudeDegrees></Position>
+            <DistanceMeters>4400</DistanceMeters>
+          </Trackpoint>
+        </Track>
+      </Lap>
+      <Notes>Tempo</Notes>
+    </Activity>
+  </Activities>
+</TrainingCenterDatabase>"""
+
+
+def _zip(files):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return out.getvalue()
+
+
+def test_parse_gpx_derives_distance_duration_and_date():
+    """Test that GPX trackpoints give distance, elapsed time and start date"""
+    from src.runs.track_import import parse_gpx
+
+    activity = parse_gpx(io.BytesIO(_gpx()), "morning.gpx")
+
+    assert activity.start_time.date() == date(2024, 3, 10)
+    assert activity.duration_seconds == 3000
+    assert activity.distance_m == pytest.approx(10008, rel=0.001)
+    assert activity.name == "Morning Run"
+    assert len(activity.points) == 11
+    assert activity.points[-1][2] == 3000
+
+
+def test_parse_tcx_prefers_lap_totals():
+    """Test that TCX lap totals win over the trackpoint-derived values"""
+    from src.runs.track_import import parse_tcx
+
+    activity = parse_tcx(io.BytesIO(TCX), "tempo.tcx")
+
+    assert activity.start_time.isoformat() == "2024-04-01T18:30:00+00:00"
+    assert activity.duration_seconds == 1500
+    assert activity.distance_m == 5000
+    assert activity.name == "Tempo"
+    assert len(activity.points) == 2
+
+
+def test_detect_format_sniffs_contents():
+    """Test that the format comes from the extension, else from the contents"""
+    from src.runs.track_import import detect_format
+
+    assert detect_format("run.GPX", b"") == "gpx"
+    assert detect_format(None, _gpx()) == "gpx"
+    assert detect_format("upload", TCX) == "tcx"
+    assert detect_format(None, b"\x0e\x10\x00\x00\x00\x00\x00\x00.FIT") == "fit"
+    with pytest.raises(ValueError):
+        detect_format("notes.txt", b"hello")
+
+
+def test_activity_to_run_has_stable_run_id():
+    """Test that the same activity always maps to the same run_id"""
+    from src.runs.track_import import activity_to_run, parse_activity
+
+    first = activity_to_run(parse_activity("a.gpx", _gpx()), "user-1")
+    second = activity_to_run(parse_activity("b.gpx", _gpx()), "user-1")
+    other_user = activity_to_run(parse_activity("a.gpx", _gpx()), "user-2")
+
+    assert first.run_id == second.run_id
+    assert first.run_id != other_user.run_id
+    assert first.duration_formatted == "00:50:00"
+    assert float(first.distance_km) == 10.01
+
+
+def test_activity_is_dated_by_its_local_start():
+    """Test that a late-evening run keeps its local day rather than the UTC one"""
+    from zoneinfo import ZoneInfo
+    from src.runs.track_import import activity_to_run, fit_utc_offset, parse_activity
+
+    # 23:30 UTC is already the next day in Amsterdam (UTC+1 in March)
+    activity = parse_activity("late.gpx", _gpx(start="2024-03-10T23:30:00Z"))
+    assert activity_to_run(activity, "user-1").date == date(2024, 3, 10)
+    assert activity_to_run(activity, "user-1", ZoneInfo("Europe/Amsterdam")).date == date(2024, 3, 11)
+
+    # A FIT file's local time wins over the caller's zone: 18:30 in New York
+    activity.utc_offset_seconds = fit_utc_offset(
+        datetime(2024, 3, 10, 23, 30, 1), datetime(2024, 3, 10, 18, 30)
+    )
+    assert activity.utc_offset_seconds == -5 * 3600
+    run = activity_to_run(activity, "user-1", ZoneInfo("Europe/Amsterdam"))
+    assert run.date == date(2024, 3, 10)
+
+    # The run_id comes from the UTC start, so re-imports still overwrite
+    assert run.run_id == activity_to_run(activity, "user-1").run_id
+
+
+def test_fit_utc_offset_accepts_raw_local_timestamps():
+    """Test offsets from raw FIT local_timestamp values and implausible clocks"""
+    from datetime import timezone
+    from src.runs.track_import import FIT_EPOCH, fit_utc_offset
+
+    utc = datetime(2024, 6, 1, 6, 0, tzinfo=timezone.utc)
+    local_seconds = int((datetime(2024, 6, 1, 11, 30) - FIT_EPOCH).total_seconds())
+
+    assert fit_utc_offset(utc, local_seconds) == 5 * 3600 + 1800
+    assert fit_utc_offset(utc, datetime(2024, 6, 3, 6, 0)) is None
+
+
+def test_parse_files_in_process_pool_keeps_order_and_reports_errors():
+    """Test parallel parsing returns one result per file, in input order"""
+    from src.runs.track_import import parse_files
+
+    entries = [
+        ("one.gpx", _gpx(start="2024-03-10T07:00:00Z")),
+        ("broken.gpx", b"<gpx><trk>"),
+        ("two.tcx", TCX),
+    ]
+
+    results = parse_files(entries, workers=2)
+
+    assert [name for name, _, _ in results] == ["one.gpx", "broken.gpx", "two.tcx"]
+    assert results[0][1].duration_seconds == 3000
+    assert results[1][1] is None and results[1][2]
+    assert results[2][1].distance_m == 5000
+
+
+def test_unpack_upload_limits_archives():
+    """Test that zip uploads are unpacked, ignoring other files, within limits"""
+    from src.runs.track_import import unpack_upload
+
+    archive = _zip({"a.gpx": _gpx(), "b.tcx": TCX, "readme.txt": b"hi"})
+
+    assert [name for name, _ in unpack_upload("runs.zip", archive)] == ["a.gpx", "b.tcx"]
+    assert unpack_upload("a.gpx", _gpx()) == [("a.gpx", _gpx())]
+    with pytest.raises(ValueError):
+        unpack_upload("runs.zip", archive, max_files=1)
+
+
+@pytest.fixture
+def mock_dynamodb(aws, monkeypatch):
+    # Parse inline - the API path is the same with or without the pool
+    monkeypatch.setenv("IMPORT_WORKERS", "1")
+    return aws("runs", "records", "versions", buckets={"TRACKS_BUCKET": "test-tracks"})
+
+
+def test_import_single_file(mock_dynamodb, auth_headers):
+    """Test that a raw GPX body becomes a run, a record and a new runs version"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    response = client.post(
+        "/runs/import",
+        params={"filename": "morning.gpx"},
+        content=_gpx(),
+        headers={**auth_headers, "Content-Type": "application/gpx+xml"},
+    )
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["errors"] == []
+    assert len(body["imported"]) == 1
+    run = body["imported"][0]
+    assert run["date"] == "2024-03-10"
+    assert run["distance_km"] == 10.01
+    assert run["duration"] == "00:50:00"
+    assert run["notes"] == "Morning Run"
+
+    assert [r["run_id"] for r in client.get("/runs", headers=auth_headers).json()] == [
+        run["run_id"]
+    ]
+    assert client.get("/records", headers=auth_headers).json()[0]["bucket"] == "10k"
+
+    track = client.get(f"/runs/{run['run_id']}/track", headers=auth_headers).json()
+    assert track["point_count"] == 11
+
+
+def test_import_dates_runs_in_the_given_time_zone(mock_dynamodb, auth_headers):
+    """Test the timezone parameter for files without local time"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    upload = {
+        "content": _gpx(start="2024-03-10T23:30:00Z"),
+        "headers": {**auth_headers, "Content-Type": "application/gpx+xml"},
+    }
+
+    response = client.post(
+        "/runs/import", params={"filename": "late.gpx", "timezone": "Europe/Amsterdam"}, **upload
+    )
+    assert response.status_code == 201
+    assert response.json()["imported"][0]["date"] == "2024-03-11"
+
+    response = client.post(
+        "/runs/import", params={"filename": "late.gpx", "timezone": "Mars/Olympus"}, **upload
+    )
+    assert response.status_code == 422
+
+
+def test_import_zip_reports_bad_files_and_is_idempotent(mock_dynamodb, auth_headers):
+    """Test a multi-file archive: good files imported, bad ones listed, re-import overwrites"""
+    from src.runs.app import app
+
+    archive = _zip(
+        {
+            "march/morning.gpx": _gpx(),
+            "april/tempo.tcx": TCX,
+            "broken.gpx": b"<gpx><trk>",
+        }
+    )
+
+    client = TestClient(app)
+    for _ in range(2):
+        response = client.post(
+            "/runs/import",
+            content=archive,
+            headers={**auth_headers, "Content-Type": "application/zip"},
+        )
+
+        assert response.status_code == 201
+        body = response.json()
+        assert len(body["imported"]) == 2
+        assert [error["file"] for error in body["errors"]] == ["broken.gpx"]
+
+    assert len(client.get("/runs", headers=auth_headers).json()) == 2
+
+
+def test_import_rejects_empty_body(mock_dynamodb, auth_headers):
+    """Test that an upload without content is a 400"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    response = client.post("/runs/import", content=b"", headers=auth_headers)
+
+    assert response.status_code == 400
+
+
+def test_cli_dry_run(tmp_path, capsys):
+    """Test the offline importer parses directories and archives without writing"""
+    from tools.import_activities import main
+
+    (tmp_path / "runs").mkdir()
+    (tmp_path / "runs" / "morning.gpx").write_bytes(_gpx())
+    (tmp_path / "runs" / "notes.txt").write_text("not an activity")
+    (tmp_path / "more.zip").write_bytes(_zip({"tempo.tcx": TCX}))
+
+    exit_code = main(
+        [str(tmp_path / "runs"), str(tmp_path / "more.zip"), "--user-id", "u1", "--dry-run"]
+    )
+
+    output = capsys.readouterr().out
+    assert exit_code == 0
+    assert "10.01 km 00:50:00" in output
+    assert "5.00 km 00:25:00" in output
+    assert "Parsed 2 runs, 0 files failed" in output
@@ -0,0 +1,256 @@
+# tests/test_tracks.py
+"""Test the compact track encoding and GET /runs/{run_id}/track"""
+
+import pytest
+from fastapi.testclient import TestClient
+import boto3
+import importlib
+import json
+import math
+
+
+def _points(count=10_000):
+    """A wiggly loop around a park, one fix per second"""
+    return [
+        (
+            52.370216 + 0.004 * math.sin(i / 300) + 0.00001 * (i % 7),
+            4.895168 + 0.006 * math.cos(i / 300),
+            float(i),
+        )
+        for i in range(count)
+    ]
+
+
+def test_track_round_trip_within_precision():
+    """Test that decoding returns the points to 1e-5 degrees and 0.1 s"""
+    from src.runs.track_codec import decode_track, encode_track
+
+    points = _points()
+    decoded = decode_track(encode_track(points))
+
+    assert len(decoded) == len(points)
+    for (lat, lon, t), (dlat, dlon, dt) in zip(points, decoded):
+        assert dlat == pytest.approx(lat, abs=0.000005)
+        assert dlon == pytest.approx(lon, abs=0.000005)
+        assert dt == pytest.approx(t, abs=0.05)
+
+
+def test_track_encoding_is_compact():
+    """Test that a 10k point track is a small fraction of its JSON size"""
+    from src.runs.track_codec import encode_track
+
+    points = _points()
+    encoded = encode_track(points)
+
+    assert len(encoded) < len(json.dumps(points)) / 10
+    assert len(encoded) < 100_000
+
+
+def test_track_without_times():
+    """Test that tracks with missing timestamps keep positions only"""
+    from src.runs.track_codec import decode_track, encode_track
+
+    decoded = decode_track(encode_track([(1.0, 2.0, 0.0), (1.5, -2.5, None)]))
+
+    assert decoded == [(1.0, 2.0, None), (1.5, -2.5, None)]
+    assert decode_track(encode_track([])) == []
+
+
+def test_decode_rejects_foreign_data():
+    """Test that bytes that are not an encoded track are refused"""
+    from src.runs.track_codec import decode_track
+
+    with pytest.raises(ValueError):
+        decode_track(b"{}")
+
+
+def test_encode_polyline_matches_reference():
+    """Test the encoding against Google's documented example"""
+    from src.runs.track_codec import encode_polyline
+
+    points = [(38.5, -120.2, None), (40.7, -120.95, None), (43.252, -126.453, None)]
+
+    assert encode_polyline(points) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+@pytest.fixture
+def mock_aws_services(aws):
+    return aws("runs", "records", "versions", buckets={"TRACKS_BUCKET": "test-tracks"})
+
+
+def test_run_item_references_track(mock_aws_services, save_run_with_track):
+    """Test that the run item holds the track reference, not the points"""
+    run = save_run_with_track(_points(500))
+
+    item = mock_aws_services.Table("test-runs").get_item(
+        Key={"user_id": run.user_id, "run_id": run.run_id}
+    )["Item"]
+
+    assert item["track_key"] == f"tracks/test-user-123/{run.run_id}.trk"
+    assert item["track_points"] == 500
+    assert len(json.dumps(item, default=str)) < 1000
+
+
+def test_get_track_points_and_polyline(mock_aws_services, auth_headers, save_run_with_track):
+    """Test both representations of a stored track"""
+    from src.runs.app import app
+
+    run = save_run_with_track(_points(1000))
+    client = TestClient(app)
+
+    response = client.get(f"/runs/{run.run_id}/track", headers=auth_headers)
+    assert response.status_code == 200
+    track = response.json()
+    assert track["point_count"] == 1000
+    assert track["points"][10] == pytest.approx(list(_points(11)[10]), abs=0.00001)
+    assert track["polyline"] is None
+
+    response = client.get(
+        f"/runs/{run.run_id}/track", params={"format": "polyline"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["points"] is None
+    assert len(response.json()["polyline"]) > 0
+
+
+def test_get_track_honors_etag(mock_aws_services, auth_headers, save_run_with_track):
+    """Test that an unchanged track is answered with 304"""
+    from src.runs.app import app
+
+    run = save_run_with_track(_points(100))
+    client = TestClient(app)
+
+    etag = client.get(f"/runs/{run.run_id}/track", headers=auth_headers).headers["etag"]
+    response = client.get(
+        f"/runs/{run.run_id}/track", headers={**auth_headers, "If-None-Match": etag}
+    )
+
+    assert response.status_code == 304
+
+
+def test_run_list_does_not_read_tracks(
+    mock_aws_services, auth_headers, monkeypatch, save_run_with_track
+):
+    """Test that run lists never touch the track store"""
+    from src.runs.app import app
+
+    track_dal = importlib.import_module("src.runs.dal.track_dal")
+    save_run_with_track(_points(100))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("track read")
+
+    monkeypatch.setattr(track_dal, "get_track_data", fail)
+    client = TestClient(app)
+
+    assert len(client.get("/runs", headers=auth_headers).json()) == 1
+
+
+def test_run_without_track_is_404(mock_aws_services, auth_headers):
+    """Test 404 for hand-logged runs and for unknown runs"""
+    from src.runs.app import app
+
+    client = TestClient(app)
+    run = client.post(
+        "/runs",
+        json={"date": "2024-05-01", "distance_km": 5, "duration": "00:25:00"},
+        headers=auth_headers,
+    ).json()
+
+    assert client.get(f"/runs/{run['run_id']}/track", headers=auth_headers).status_code == 404
+    assert client.get("/runs/unknown/track", headers=auth_headers).status_code == 404
+
+
+def test_update_keeps_track_and_delete_removes_it(
+    mock_aws_services, auth_headers, save_run_with_track
+):
+    """Test that editing a run keeps its track and deleting it removes the object"""
+    from src.runs.app import app
+
+    run = save_run_with_track(_points(100))
+    client = TestClient(app)
+
+    response = client.put(
+        f"/runs/{run.run_id}",
+        json={"date": "2024-05-01", "distance_km": 8.3, "duration": "00:45:00", "notes": "x"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert client.get(f"/runs/{run.run_id}/track", headers=auth_headers).status_code == 200
+
+    client.delete(f"/runs/{run.run_id}", headers=auth_headers)
+
+    objects = boto3.client("s3").list_objects_v2(Bucket="test-tracks")
+    assert objects.get("KeyCount", 0) == 0
+
+
+def test_save_track_precomputes_detail_levels(mock_aws_services, save_run_with_track):
+    """Test that storing a track also stores each simplified level"""
+    run = save_run_with_track(_points(2000))
+
+    objects = boto3.client("s3").list_objects_v2(Bucket="test-tracks")
+    keys = {item["Key"]: item["Size"] for item in objects["Contents"]}
+
+    base = f"tracks/test-user-123/{run.run_id}"
+    assert set(keys) == {f"{base}.trk", f"{base}.low.trk", f"{base}.medium.trk", f"{base}.high.trk"}
+    assert keys[f"{base}.low.trk"] < keys[f"{base}.medium.trk"] < keys[f"{base}.trk"]
+
+
+def test_get_track_detail_is_a_fraction_of_full(
+    mock_aws_services, auth_headers, save_run_with_track
+):
+    """Test that ?detail=low returns a much smaller payload with its own ETag"""
+    from src.runs.app import app
+
+    run = save_run_with_track(_points())
+    client = TestClient(app)
+
+    full = client.get(f"/runs/{run.run_id}/track", headers=auth_headers)
+    low = client.get(
+        f"/runs/{run.run_id}/track", params={"detail": "low"}, headers=auth_headers
+    )
+
+    assert low.status_code == 200
+    assert low.json()["detail"] == "low"
+    assert low.json()["point_count"] < full.json()["point_count"] / 20
+    assert len(low.content) < len(full.content) / 20
+    assert low.headers["etag"] != full.headers["etag"]
+
+    response = client.get(
+        f"/runs/{run.run_id}/track",
+        params={"detail": "low"},
+        headers={**auth_headers, "If-None-Match": low.headers["etag"]},
+    )
+    assert response.status_code == 304
+
+
+def test_get_track_detail_backfills_old_tracks(
+    mock_aws_services, auth_headers, save_run_with_track
+):
+    """Test that tracks stored without detail levels get them on first request"""
+    from src.runs.app import app
+
+    run = save_run_with_track(_points(2000))
+    s3 = boto3.client("s3")
+    s3.delete_object(Bucket="test-tracks", Key=f"tracks/test-user-123/{run.run_id}.medium.trk")
+    client = TestClient(app)
+
+    response = client.get(
+        f"/runs/{run.run_id}/track", params={"detail": "medium"}, headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    assert 2 < response.json()["point_count"] < 2000
+    s3.head_object(Bucket="test-tracks", Key=f"tracks/test-user-123/{run.run_id}.medium.trk")
+
+
+def test_get_track_invalid_detail(mock_aws_services, auth_headers, save_run_with_track):
+    from src.runs.app import app
+
+    run = save_run_with_track(_points(100))
+    client = TestClient(app)
+
+    response = client.get(
+        f"/runs/{run.run_id}/track", params={"detail": "ultra"}, headers=auth_headers
+    )
+    assert response.status_code == 400
@@ -0,0 +1,75 @@
+# tests/test_transaction.py
+"""Test the TransactWriteItems builder and the compound writes that use it"""
+
+import importlib
+import pytest
+from decimal import Decimal
+
+from src.runs.dal.transaction import MAX_ACTIONS, Transaction, TransactionCancelledError
+from src.runs.models.target import Target
+
+
+@pytest.fixture
+def tables(aws):
+    dynamodb = aws("targets", "versions")
+    return {"targets": dynamodb.Table("test-targets"), "versions": dynamodb.Table("test-versions")}
+
+
+class TestTransaction:
+    def test_actions_apply_together(self, tables):
+        """Test that puts, updates and deletes across tables commit as one"""
+        tables["targets"].put_item(Item={"user_id": "u1", "target_id": "old"})
+
+        transaction = Transaction()
+        transaction.delete(tables["targets"], {"user_id": "u1", "target_id": "old"})
+        transaction.put(tables["targets"], {"user_id": "u1", "target_id": "new", "distance_km": Decimal("10.5")})
+        transaction.update(tables["versions"], {"user_id": "u1"}, "ADD targets_version :one", values={":one": 1})
+        transaction.commit()
+
+        items = tables["targets"].scan()["Items"]
+        assert [item["target_id"] for item in items] == ["new"]
+        assert items[0]["distance_km"] == Decimal("10.5")
+        assert tables["versions"].get_item(Key={"user_id": "u1"})["Item"]["targets_version"] == 1
+
+    def test_failed_condition_applies_nothing(self, tables):
+        """Test atomicity: one failed condition cancels every action"""
+        transaction = Transaction()
+        transaction.put(tables["targets"], {"user_id": "u1", "target_id": "t1"})
+        transaction.condition_check(
+            tables["versions"], {"user_id": "u1"}, "attribute_exists(user_id)"
+        )
+
+        with pytest.raises(TransactionCancelledError) as error:
+            transaction.commit()
+
+        assert error.value.reasons == ["None", "ConditionalCheckFailed"]
+        assert tables["targets"].scan()["Items"] == []
+
+    def test_idempotency_token(self):
+        """Test that each transaction gets a token unless one is supplied"""
+        assert Transaction().client_request_token != Transaction().client_request_token
+        assert Transaction("retry-1").client_request_token == "retry-1"
+
+    def test_action_limit(self, tables):
+        """Test that the DynamoDB action limit is enforced when building"""
+        transaction = Transaction()
+        for i in range(MAX_ACTIONS):
+            transaction.put(tables["targets"], {"user_id": "u1", "target_id": str(i)})
+
+        with pytest.raises(ValueError):
+            transaction.put(tables["targets"], {"user_id": "u1", "target_id": "one-too-many"})
+
+
+def test_upsert_replaces_target_and_bumps_version_atomically(tables):
+    """Test that the target upsert is one transaction including the version bump"""
+    target_dal = importlib.import_module("src.runs.dal.target_dal")
+    version_dal = importlib.import_module("src.runs.dal.version_dal")
+
+    first = Target(user_id="u1", target_type="monthly", period="2025-06", distance_km=Decimal("100"))
+    target_dal.upsert_target(first)
+    second = Target(user_id="u1", target_type="monthly", period="2025-06", distance_km=Decimal("120"))
+    target_dal.upsert_target(second)
+
+    items = tables["targets"].scan()["Items"]
+    assert [item["target_id"] for item in items] == [second.target_id]
+    assert version_dal.get_version("u1", "targets") == 2
@@ -0,0 +1,120 @@
+# tests/test_unit_of_work.py
+"""Test request-scoped memoization of DAL reads"""
+
+import asyncio
+import importlib
+import pytest
+from decimal import Decimal
+
+from src.runs.dal.async_dal import call_async, gather_async
+from src.runs.dal.unit_of_work import (
+    current_scope,
+    invalidates,
+    memoized,
+    request_scope,
+)
+from src.runs.models.target import Target
+
+calls = []
+
+
+@memoized("things")
+def read_things(user_id, fields=None):
+    calls.append((user_id, fields))
+    return [user_id, fields]
+
+
+@invalidates("things")
+def write_thing(user_id):
+    return None
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+class TestMemoization:
+    def test_no_scope_is_pass_through(self):
+        """Test that reads outside a request are never memoized"""
+        read_things("user-1")
+        read_things("user-1")
+
+        assert len(calls) == 2
+
+    def test_repeated_read_in_scope_runs_once(self):
+        """Test that identical reads share one result within a request"""
+        with request_scope() as scope:
+            first = read_things("user-1", fields=["date"])
+            second = read_things("user-1", fields=["date"])
+            read_things("user-1")  # different arguments, separate entry
+
+        assert first is second
+        assert len(calls) == 2
+        assert scope.hits == 1
+
+    def test_scopes_are_not_shared(self):
+        """Test that a new request starts with an empty identity map"""
+        with request_scope():
+            read_things("user-1")
+        with request_scope():
+            read_things("user-1")
+
+        assert len(calls) == 2
+        assert current_scope() is None
+
+    def test_write_invalidates_namespace(self):
+        """Test that reads after a write go back to the table"""
+        with request_scope():
+            read_things("user-1")
+            write_thing("user-1")
+            read_things("user-1")
+
+        assert len(calls) == 2
+
+    def test_scope_reaches_dal_threads(self):
+        """Test that call_async and gather_async run inside the request scope"""
+
+        async def handler():
+            with request_scope():
+                await call_async(read_things, "user-1")
+                await gather_async((read_things, "user-1"), (read_things, "user-1"))
+
+        asyncio.run(handler())
+
+        assert len(calls) == 1
+
+
+@pytest.fixture
+def target_dal(aws, monkeypatch):
+    """Target DAL with its container cache disabled, backed by moto"""
+    monkeypatch.setenv("TARGETS_CACHE_TTL_SECONDS", "0")
+    aws("targets", "versions")
+    return importlib.import_module("src.runs.dal.target_dal")
+
+
+def test_update_target_flow_reads_targets_once(target_dal, monkeypatch):
+    """Test the PUT /targets/{id} pattern: ownership read, then upsert"""
+    target = Target(user_id="user-1", target_type="monthly", period="2025-06", distance_km=Decimal("100"))
+    target_dal.save_target(target)
+
+    queries = []
+    original = target_dal._query_targets
+
+    def counting(*args, **kwargs):
+        queries.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(target_dal, "_query_targets", counting)
+
+    with request_scope():
+        existing = target_dal.get_targets_by_user("user-1", consistent=True)  # ownership check
+        updated = Target(user_id="user-1", target_type="monthly", period="2025-06", distance_km=Decimal("150"))
+        updated.target_id = existing[0].target_id
+        target_dal.upsert_target(updated)  # reads targets again internally
+        assert len(queries) == 1
+
+        after = target_dal.get_targets_by_user("user-1")
+
+    assert len(queries) == 2
+    assert [t.distance_km for t in after] == [Decimal("150")]
@@ -0,0 +1,164 @@
+# tests/test_user_cache.py
+"""Test the write-through user item cache in front of user_dal lookups"""
+
+import importlib
+import pytest
+
+from src.runs import shared_cache
+from src.runs.models.user import User
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = bytes(value)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def user_dal(aws):
+    """Fresh user DAL module (empty cache) backed by a mock users table"""
+    dynamodb = aws("users")
+    user_dal = importlib.import_module("src.runs.dal.user_dal")
+
+    user_dal.table = dynamodb.Table("test-users")
+    return user_dal
+
+
+def _user(email="runner@example.com"):
+    return User(
+        email=email,
+        password_hash="hashed",
+        first_name="Jane",
+        last_name="Runner",
+        user_id="user-1",
+    )
+
+
+def _item(user):
+    return {
+        "user_id": user.user_id,
+        "email": user.email,
+        "password_hash": user.password_hash,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "created_at": user.created_at.isoformat(),
+    }
+
+
+class TestUserItemCache:
+    def test_repeat_lookups_skip_dynamodb(self, user_dal):
+        """Test that lookups after a save are served from the cache"""
+        user_dal.save_user(_user())
+
+        # Remove the item behind the cache's back - cached lookups still work
+        user_dal.table.delete_item(Key={"user_id": "user-1"})
+
+        assert user_dal.get_user_by_id("user-1").email == "runner@example.com"
+        assert user_dal.get_user_by_email("runner@example.com").user_id == "user-1"
+        assert user_dal.users_cache_stats()["hits"] == 2
+
+    def test_read_through_populates_cache(self, user_dal):
+        """Test that a lookup miss loads from DynamoDB once"""
+        user_dal.table.put_item(Item=_item(_user()))
+
+        first = user_dal.get_user_by_email("runner@example.com")
+        user_dal.table.delete_item(Key={"user_id": "user-1"})
+        second = user_dal.get_user_by_email("runner@example.com")
+
+        assert first.user_id == second.user_id == "user-1"
+        assert first is not second
+
+    def test_misses_are_cached_briefly(self, user_dal):
+        """Test negative caching and its short TTL"""
+        clock = FakeClock()
+        user_dal._users_cache._clock = clock
+
+        assert user_dal.get_user_by_id("user-1") is None
+
+        # Created elsewhere (e.g. another container) - still hidden until expiry
+        user_dal.table.put_item(Item=_item(_user()))
+        assert user_dal.get_user_by_id("user-1") is None
+
+        clock.now = user_dal.NEGATIVE_TTL_SECONDS
+        assert user_dal.get_user_by_id("user-1") is not None
+
+    def test_save_overwrites_negative_entry(self, user_dal):
+        """Test that writes through this module replace cached misses"""
+        assert user_dal.get_user_by_email("runner@example.com") is None
+
+        user_dal.save_user(_user())
+
+        assert user_dal.get_user_by_email("runner@example.com").user_id == "user-1"
+
+    def test_email_change_drops_old_email_key(self, user_dal):
+        """Test that a changed email is no longer resolvable from the cache"""
+        user_dal.save_user(_user("old@example.com"))
+        user_dal.save_user(_user("new@example.com"))
+
+        assert user_dal.get_user_by_email("old@example.com") is None
+        assert user_dal.get_user_by_email("new@example.com").user_id == "user-1"
+
+    def test_shared_tier_serves_other_containers(self, user_dal, monkeypatch):
+        """Test that a container with a cold local cache reads the shared tier"""
+        client = FakeRedis()
+        monkeypatch.setenv("USERS_CACHE_SHARED", "true")
+        monkeypatch.setattr(shared_cache, "_backend", shared_cache.RedisBackend(client, 300))
+        monkeypatch.setattr(shared_cache, "_backend_loaded", True)
+
+        user_dal.save_user(_user())
+        user_dal.table.delete_item(Key={"user_id": "user-1"})
+        user_dal._users_cache.clear()  # as seen from a fresh container
+
+        assert user_dal.get_user_by_id("user-1").email == "runner@example.com"
+        assert user_dal.get_user_by_email("runner@example.com").user_id == "user-1"
+        assert shared_cache.item_key("user-id", "user-1") in client.data
+
+    def test_shared_tier_holds_no_credentials(self, user_dal, monkeypatch):
+        """Test that password hashes stay out of the shared tier"""
+        client = FakeRedis()
+        monkeypatch.setenv("USERS_CACHE_SHARED", "true")
+        monkeypatch.setattr(shared_cache, "_backend", shared_cache.RedisBackend(client, 300))
+        monkeypatch.setattr(shared_cache, "_backend_loaded", True)
+
+        user_dal.save_user(_user())
+        user_dal._users_cache.clear()
+        user_dal.get_user_by_email("runner@example.com")  # read-through path
+
+        assert client.data
+        assert not any(b"password_hash" in body for body in client.data.values())
+        assert not any(b"hashed" in body for body in client.data.values())
+
+        user = user_dal.get_user_by_id("user-1")
+        assert user.first_name == "Jane"
+        assert user.password_hash is None
+
+    def test_email_change_drops_old_shared_key(self, user_dal, monkeypatch):
+        """Test that the old address stops resolving in every container"""
+        client = FakeRedis()
+        monkeypatch.setenv("USERS_CACHE_SHARED", "true")
+        monkeypatch.setattr(shared_cache, "_backend", shared_cache.RedisBackend(client, 300))
+        monkeypatch.setattr(shared_cache, "_backend_loaded", True)
+
+        user_dal.save_user(_user("old@example.com"))
+        user_dal._users_cache.clear()  # the change is saved by a cold container
+        user_dal.save_user(_user("new@example.com"))
+
+        assert shared_cache.item_key("user-email", "old@example.com") not in client.data
+        assert user_dal.get_user_by_email("old@example.com") is None
+        assert user_dal.get_user_by_email("new@example.com").user_id == "user-1"
@@ -0,0 +1,134 @@
+# tests/test_warmup.py
+"""Test the init-phase warmup and keep-alive pings of the API function"""
+
+import asyncio
+import importlib
+import sys
+
+import pytest
+from moto import mock_aws
+
+app_module = importlib.import_module("src.runs.app")
+
+
+@pytest.fixture
+def fresh_container(monkeypatch):
+    """Module state as in a container that has not been invoked yet"""
+    # Other tests re-import modules, so look up the ones app.py uses now
+    cognito_service = importlib.import_module("src.runs.auth.cognito_service")
+    # Mangum runs the app on the thread's event loop
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    with mock_aws():
+        monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+        monkeypatch.setattr(app_module, "_handler", None)
+        monkeypatch.setattr(
+            app_module, "_container", {"invocations": 0, "warmed": False, "warmup_ms": None}
+        )
+        monkeypatch.setattr(cognito_service, "_clients", {})
+        yield cognito_service
+
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+def test_warmup_only_on_by_default_inside_lambda(monkeypatch):
+    monkeypatch.delenv("WARMUP_ON_INIT", raising=False)
+    monkeypatch.delenv("AWS_LAMBDA_FUNCTION_NAME", raising=False)
+    assert not app_module.warmup_on_init()
+
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "RunsFunction")
+    assert app_module.warmup_on_init()
+
+    monkeypatch.setenv("WARMUP_ON_INIT", "false")
+    assert not app_module.warmup_on_init()
+
+
+def test_warm_up_creates_clients_and_handler(fresh_container):
+    cognito_service = fresh_container
+    assert app_module.warm_up() >= 0
+
+    assert app_module._handler is not None
+    assert "us-east-1" in cognito_service._clients
+    # Services share the client created during init
+    service = cognito_service.CognitoService()
+    assert service.cognito_client is cognito_service._clients["us-east-1"]
+
+
+def test_warm_up_primes_request_under_provisioned_concurrency(fresh_container, monkeypatch):
+    calls = []
+
+    def handler(event, context):
+        calls.append(event)
+
+    monkeypatch.setattr(app_module, "get_handler", lambda: handler)
+
+    monkeypatch.setenv("AWS_LAMBDA_INITIALIZATION_TYPE", "on-demand")
+    app_module.warm_up()
+    assert calls == []
+
+    monkeypatch.setenv("AWS_LAMBDA_INITIALIZATION_TYPE", "provisioned-concurrency")
+    app_module.warm_up()
+    assert [event["path"] for event in calls] == ["/Prod/"]
+
+
+def test_heavy_modules_only_load_off_the_request_path(fresh_container, monkeypatch):
+    imported = []
+    monkeypatch.setattr(app_module, "_import_lazy_modules", imported.extend)
+
+    monkeypatch.setenv("AWS_LAMBDA_INITIALIZATION_TYPE", "on-demand")
+    app_module.warm_up()
+    assert imported == app_module.LAZY_MODULES
+    assert "splits" not in imported
+
+    imported.clear()
+    monkeypatch.setenv("AWS_LAMBDA_INITIALIZATION_TYPE", "snap-start")
+    app_module.warm_up(prime_request=False)
+    assert imported == app_module.LAZY_MODULES + app_module.HEAVY_LAZY_MODULES
+
+
+def test_failed_warmup_does_not_fail_init(fresh_container, monkeypatch):
+    cognito_service = fresh_container
+
+    def unavailable(region):
+        raise RuntimeError("no credentials")
+
+    monkeypatch.setattr(cognito_service, "get_cognito_client", unavailable)
+    monkeypatch.setenv("WARMUP_ON_INIT", "true")
+    monkeypatch.delitem(sys.modules, "src.runs.app", raising=False)
+
+    fresh_app = importlib.import_module("src.runs.app")
+
+    assert fresh_app._container["warmed"] is False
+    assert fresh_app.get_handler() is not None
+
+
+def test_warmup_event_skips_the_api_stack(fresh_container, monkeypatch):
+    def no_api(*args):
+        raise AssertionError("API stack used for a warmup ping")
+
+    app_module.warm_up()
+    monkeypatch.setattr(app_module, "get_handler", no_api)
+
+    first = app_module.lambda_handler({"warmup": True}, None)
+    second = app_module.lambda_handler({"warmup": True}, None)
+
+    assert first["warmup"] is True and first["cold"] is True
+    assert second["cold"] is False and second["invocations"] == 2
+
+
+def test_warmup_event_warms_a_container_that_skipped_init(fresh_container):
+    result = app_module.lambda_handler({"warmup": True}, None)
+
+    assert result["warmup_ms"] is not None
+    assert app_module._handler is not None
+
+
+def test_api_requests_go_through_the_shared_handler(fresh_container):
+    response = app_module.lambda_handler(app_module.api_gateway_event("GET", "/"), None)
+    handler = app_module._handler
+
+    assert response["statusCode"] == 200
+    app_module.lambda_handler(app_module.api_gateway_event("GET", "/"), None)
+    assert app_module._handler is handler
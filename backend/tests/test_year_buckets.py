@@ -0,0 +1,173 @@
+# tests/test_year_buckets.py
+"""Test the date-sorted indexes behind date-range reads and their migration"""
+
+import pytest
+import importlib
+import sys
+from datetime import date
+from decimal import Decimal
+
+USER_ID = "heavy-user"
+
+
+@pytest.fixture
+def mock_dynamodb(aws):
+    return aws("runs", "versions")
+
+
+@pytest.fixture
+def run_dal(mock_dynamodb):
+    return importlib.import_module("src.runs.dal.run_dal")
+
+
+def _save_runs(run_dal, days):
+    from src.runs.models.run import Run
+
+    runs = [
+        Run(user_id=USER_ID, date=day, distance_km=Decimal("5"), duration="00:25:00")
+        for day in days
+    ]
+    run_dal.save_runs(runs)
+    return runs
+
+
+DAYS = [
+    date(2021, 12, 30),
+    date(2022, 6, 1),
+    date(2023, 1, 2),
+    date(2023, 12, 31),
+    date(2024, 3, 3),
+]
+
+
+def test_runs_carry_their_year_bucket(run_dal, mock_dynamodb):
+    run = _save_runs(run_dal, [date(2023, 7, 14)])[0]
+
+    item = mock_dynamodb.Table("test-runs").get_item(
+        Key={"user_id": USER_ID, "run_id": run.run_id}
+    )["Item"]
+
+    assert item["user_year"] == "heavy-user#2023"
+
+
+def test_range_reads_match_the_partition_layout(run_dal, monkeypatch):
+    """Test that both layouts return the same runs for ranges within and across years"""
+    _save_runs(run_dal, DAYS)
+    ranges = [
+        (date(2023, 1, 1), date(2023, 12, 31)),
+        (date(2021, 12, 1), date(2023, 1, 2)),
+        (date(2020, 1, 1), date(2030, 1, 1)),
+        (date(2025, 1, 1), date(2025, 12, 31)),
+    ]
+
+    def read_all():
+        return [
+            sorted(run.date for run in run_dal.get_runs_by_user_in_range(USER_ID, *bounds))
+            for bounds in ranges
+        ]
+
+    legacy = read_all()
+    monkeypatch.setenv("RUNS_YEAR_BUCKETS", "true")
+    bucketed = read_all()
+
+    assert bucketed == legacy
+    assert bucketed[1] == [date(2021, 12, 30), date(2022, 6, 1), date(2023, 1, 2)]
+
+
+def test_range_read_is_a_key_condition_on_the_date_index(run_dal, mock_dynamodb, monkeypatch):
+    """Test that the default range read queries the range, not the whole partition"""
+    runs = _save_runs(run_dal, DAYS)
+    run_dal.delete_run_by_id(runs[2].run_id, USER_ID)
+
+    calls = []
+    table = mock_dynamodb.Table("test-runs")
+
+    class RecordingTable:
+        def query(self, **kwargs):
+            calls.append(kwargs)
+            return table.query(**kwargs)
+
+    monkeypatch.setattr(run_dal, "_get_table", lambda: RecordingTable())
+
+    found = run_dal.get_runs_by_user_in_range(USER_ID, date(2022, 1, 1), date(2023, 12, 31))
+
+    assert sorted(run.date for run in found) == [date(2022, 6, 1), date(2023, 12, 31)]
+    assert [call["IndexName"] for call in calls] == ["user-date-index"]
+    assert "run_date BETWEEN" in calls[0]["KeyConditionExpression"]
+    assert "FilterExpression" not in calls[0]
+
+
+def test_fan_out_queries_only_the_needed_buckets(run_dal, monkeypatch):
+    """Test one index query per year in the range, none for the user's other years"""
+    _save_runs(run_dal, DAYS)
+    monkeypatch.setenv("RUNS_YEAR_BUCKETS", "true")
+
+    queried = []
+    real_query = run_dal._query_year_bucket
+
+    def spy(user_id, year, start, end):
+        queried.append((year, start, end))
+        return real_query(user_id, year, start, end)
+
+    monkeypatch.setattr(run_dal, "_query_year_bucket", spy)
+
+    runs = run_dal.get_runs_by_user_in_range(USER_ID, date(2022, 3, 1), date(2023, 6, 30))
+
+    assert sorted(queried) == [
+        (2022, date(2022, 3, 1), date(2022, 12, 31)),
+        (2023, date(2023, 1, 1), date(2023, 6, 30)),
+    ]
+    assert sorted(run.date for run in runs) == [date(2022, 6, 1), date(2023, 1, 2)]
+
+
+def test_deleted_runs_leave_the_index(run_dal, monkeypatch):
+    monkeypatch.setenv("RUNS_YEAR_BUCKETS", "true")
+    run = _save_runs(run_dal, [date(2023, 5, 5)])[0]
+
+    run_dal.delete_run_by_id(run.run_id, USER_ID)
+
+    assert run_dal.get_runs_by_user_in_range(USER_ID, date(2023, 1, 1), date(2023, 12, 31)) == []
+
+
+def test_migration_backfills_legacy_items(run_dal, mock_dynamodb, monkeypatch):
+    """Test that runs written before the index existed become visible to it"""
+    table = mock_dynamodb.Table("test-runs")
+    for i, day in enumerate(DAYS):
+        table.put_item(
+            Item={
+                "user_id": USER_ID,
+                "run_id": f"legacy-{i}",
+                "date": day.isoformat(),
+                "distance_km": Decimal("10"),
+                "duration_seconds": 3000,
+                "created_at": "2020-01-01T00:00:00",
+                "updated_at": "2020-01-01T00:00:00",
+            }
+        )
+    table.put_item(
+        Item={"user_id": USER_ID, "run_id": "gone", "deleted_at": "2024-01-01T00:00:00"}
+    )
+    assert run_dal.get_runs_by_user_in_range(USER_ID, date(2020, 1, 1), date(2030, 1, 1)) == []
+    monkeypatch.setenv("RUNS_YEAR_BUCKETS", "true")
+    assert run_dal.get_runs_by_user_in_range(USER_ID, date(2020, 1, 1), date(2030, 1, 1)) == []
+
+    sys.path.insert(0, "tools")
+    try:
+        migrate = importlib.import_module("migrate_year_buckets")
+    finally:
+        sys.path.remove("tools")
+
+    assert migrate.main(["--segments", "3", "--dry-run"]) == 0
+    assert migrate.main(["--segments", "3"]) == 0
+
+    runs = run_dal.get_runs_by_user_in_range(USER_ID, date(2020, 1, 1), date(2030, 1, 1))
+    assert sorted(run.date for run in runs) == DAYS
+    monkeypatch.setenv("RUNS_YEAR_BUCKETS", "false")
+    runs = run_dal.get_runs_by_user_in_range(USER_ID, date(2020, 1, 1), date(2030, 1, 1))
+    assert sorted(run.date for run in runs) == DAYS
+    item = table.get_item(Key={"user_id": USER_ID, "run_id": "legacy-0"})["Item"]
+    assert item["updated_at"] == "2020-01-01T00:00:00"
+    assert "user_year" not in table.get_item(Key={"user_id": USER_ID, "run_id": "gone"})["Item"]
+
+    # Nothing left on a second pass
+    assert [migrate.migrate_segment(segment, 3) for segment in range(3)] == [(0, 0)] * 3
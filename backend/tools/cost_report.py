@@ -0,0 +1,140 @@
+# tools/cost_report.py
+"""Cost-per-endpoint report from the API's EMF request log lines.
+
+Every instrumented request logs one Embedded Metric Format line with its
+route, latency and consumed DynamoDB capacity (see src/runs/instrumentation.py).
+This tool totals those lines per route and prices them at on-demand request
+unit rates, sorted by cost, to show which access patterns to optimize first.
+
+Input is any text containing the EMF JSON objects - a CloudWatch Logs export,
+`sam logs` output or `aws logs tail` output - as files or on stdin.
+
+Usage (from backend/):
+    aws logs tail /aws/lambda/<function> --since 7d > api.log
+    python tools/cost_report.py api.log [--read-price 0.125] [--write-price 0.625]
+"""
+
+import argparse
+import json
+import sys
+
+# On-demand prices in USD per million request units (us-east-1)
+DEFAULT_READ_PRICE = 0.125
+DEFAULT_WRITE_PRICE = 0.625
+
+
+def parse_records(lines):
+    """Yield the EMF records found in log lines (prefixes such as timestamps are skipped)"""
+    for line in lines:
+        start = line.find('{"_aws"')
+        if start == -1:
+            continue
+        try:
+            record = json.loads(line[start:])
+        except ValueError:
+            continue
+        if "Route" in record:
+            yield record
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(records, read_price=DEFAULT_READ_PRICE, write_price=DEFAULT_WRITE_PRICE):
+    """Per-route totals, most expensive first"""
+    routes = {}
+    for record in records:
+        totals = routes.setdefault(
+            record["Route"], {"requests": 0, "rcu": 0.0, "wcu": 0.0, "latencies": []}
+        )
+        totals["requests"] += 1
+        totals["rcu"] += float(record.get("ConsumedReadCapacity", 0))
+        totals["wcu"] += float(record.get("ConsumedWriteCapacity", 0))
+        if "total" in record:
+            totals["latencies"].append(float(record["total"]))
+
+    rows = []
+    for route, totals in routes.items():
+        cost = (totals["rcu"] * read_price + totals["wcu"] * write_price) / 1_000_000
+        latencies = totals["latencies"]
+        rows.append(
+            {
+                "route": route,
+                "requests": totals["requests"],
+                "rcu": totals["rcu"],
+                "wcu": totals["wcu"],
+                "rcu_per_request": totals["rcu"] / totals["requests"],
+                "wcu_per_request": totals["wcu"] / totals["requests"],
+                "p50_ms": _percentile(latencies, 0.5) if latencies else None,
+                "p95_ms": _percentile(latencies, 0.95) if latencies else None,
+                "cost": cost,
+            }
+        )
+
+    total_cost = sum(row["cost"] for row in rows)
+    for row in rows:
+        row["share"] = row["cost"] / total_cost if total_cost else 0.0
+
+    return sorted(rows, key=lambda row: (-row["cost"], row["route"]))
+
+
+def format_table(rows):
+    """Render summary rows as a fixed-width text table"""
+    header = (
+        f"{'Route':<34} {'Requests':>9} {'RCU':>10} {'WCU':>10} {'RCU/req':>8} "
+        f"{'WCU/req':>8} {'p50 ms':>8} {'p95 ms':>8} {'Cost USD':>10} {'Share':>6}"
+    )
+    lines = [header, "-" * len(header)]
+
+    for row in rows:
+        p50 = f"{row['p50_ms']:.1f}" if row["p50_ms"] is not None else "-"
+        p95 = f"{row['p95_ms']:.1f}" if row["p95_ms"] is not None else "-"
+        lines.append(
+            f"{row['route']:<34} {row['requests']:>9} {row['rcu']:>10.1f} {row['wcu']:>10.1f} "
+            f"{row['rcu_per_request']:>8.2f} {row['wcu_per_request']:>8.2f} {p50:>8} {p95:>8} "
+            f"{row['cost']:>10.4f} {row['share']:>6.1%}"
+        )
+
+    requests = sum(row["requests"] for row in rows)
+    rcu = sum(row["rcu"] for row in rows)
+    wcu = sum(row["wcu"] for row in rows)
+    cost = sum(row["cost"] for row in rows)
+    lines.append("-" * len(header))
+    lines.append(f"{'Total':<34} {requests:>9} {rcu:>10.1f} {wcu:>10.1f} {'':>35} {cost:>10.4f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="*", help="Log files (default: stdin)")
+    parser.add_argument(
+        "--read-price", type=float, default=DEFAULT_READ_PRICE,
+        help="USD per million read request units",
+    )
+    parser.add_argument(
+        "--write-price", type=float, default=DEFAULT_WRITE_PRICE,
+        help="USD per million write request units",
+    )
+    args = parser.parse_args(argv)
+
+    records = []
+    if args.logs:
+        for path in args.logs:
+            with open(path) as log:
+                records.extend(parse_records(log))
+    else:
+        records.extend(parse_records(sys.stdin))
+
+    if not records:
+        print("No EMF request records found")
+        return 1
+
+    print(format_table(summarize(records, args.read_price, args.write_price)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
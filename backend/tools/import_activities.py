@@ -0,0 +1,109 @@
+# tools/import_activities.py
+"""Bulk import of GPX/TCX/FIT activity files as runs, from a local machine.
+
+Takes files, directories (searched recursively) and zip archives, parses
+them in parallel on a process pool and writes the runs to DynamoDB in
+batches through the DAL - the same code path as POST /runs/import.
+Re-running an import overwrites the runs it created before.
+
+Usage (from backend/, with RUNS_TABLE, RECORDS_TABLE, VERSIONS_TABLE and
+TRACKS_BUCKET set):
+    python tools/import_activities.py --user-id <user_id> ~/Garmin/*.fit exports/
+    python tools/import_activities.py --user-id <user_id> --dry-run archive.zip
+"""
+
+import argparse
+import os
+import sys
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.runs.track_import import (  # noqa: E402
+    SUPPORTED_EXTENSIONS,
+    activity_to_run,
+    parse_files,
+    save_imported_runs,
+    unpack_upload,
+)
+
+
+def find_files(paths):
+    """Activity files and zip archives under the given paths"""
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS + (".zip",)):
+                        yield os.path.join(directory, name)
+        else:
+            yield path
+
+
+def read_entries(paths):
+    """(filename, bytes) for every activity, with zip archives unpacked"""
+    for path in find_files(paths):
+        with open(path, "rb") as f:
+            data = f.read()
+        yield from unpack_upload(path, data, max_files=100_000, max_bytes=2**40)
+
+
+def batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="Activity files, directories or zip archives")
+    parser.add_argument("--user-id", required=True, help="Owner of the imported runs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parser processes")
+    parser.add_argument(
+        "--batch-size", type=int, default=200, help="Files parsed and written per batch"
+    )
+    parser.add_argument(
+        "--timezone",
+        type=ZoneInfo,
+        help="IANA time zone dating GPX/TCX activities, e.g. Europe/Amsterdam (default: UTC)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Parse only, write nothing")
+    args = parser.parse_args(argv)
+
+    imported = failed = 0
+    for batch in batches(read_entries(args.paths), args.batch_size):
+        runs = []
+        tracks = {}
+        for name, activity, error in parse_files(batch, args.workers):
+            try:
+                if error:
+                    raise ValueError(error)
+                run = activity_to_run(activity, args.user_id, args.timezone)
+            except ValueError as e:
+                print(f"FAILED  {name}: {e}")
+                failed += 1
+                continue
+
+            runs.append(run)
+            tracks[run.run_id] = activity.points
+            print(
+                f"OK      {name}: {run.date} {float(run.distance_km):.2f} km "
+                f"{run.duration_formatted}"
+            )
+
+        if not args.dry_run:
+            save_imported_runs(runs, tracks)
+        imported += len(runs)
+
+    action = "Parsed" if args.dry_run else "Imported"
+    print(f"{action} {imported} runs, {failed} files failed")
+    return 1 if failed and not imported else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# tools/measure_cold_start.py
+"""Compare cold and warm request latency of the API function, locally.
+
+Starts the built function in the AWS Lambda base image, whose Runtime
+Interface Emulator serves the Lambda invoke API on a local port, and times
+invocations from outside the container:
+
+- cold:   the first request to a fresh container (init + request)
+- pinged: the first request after a keep-alive ping ({"warmup": true})
+- warm:   the requests after that
+
+Each sample starts a new container, so --samples controls how many cold and
+pinged requests are measured. Prints the p50 (and p90) of each kind.
+
+Build first, so the code directory includes the dependencies, and pass the
+environment the function needs (table names, JWT_SECRET, AWS credentials):
+
+    sam build RunsFunction
+    python tools/measure_cold_start.py --samples 10 \\
+        --env RUNS_TABLE=runs-dev --env JWT_SECRET=... --path /runs --token <jwt>
+
+--env WARMUP_ON_INIT=false measures the same without init-phase warmup.
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.runs.app import api_gateway_event  # noqa: E402
+
+INVOKE_PATH = "/2015-03-31/functions/function/invocations"
+
+
+def start_container(image, code_dir, port, env):
+    """Run the function in a fresh container; returns its id"""
+    command = ["docker", "run", "-d", "--rm", "-p", f"{port}:8080"]
+    command += ["-v", f"{os.path.abspath(code_dir)}:/var/task:ro"]
+    for assignment in env:
+        command += ["-e", assignment]
+    command += [image, "app.lambda_handler"]
+    return subprocess.run(command, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def stop_container(container_id):
+    subprocess.run(["docker", "stop", container_id], capture_output=True)
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("localhost", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Emulator did not listen on port {port}")
+
+
+def invoke(port, event):
+    """Invoke the function once; returns (latency in ms, response payload)"""
+    request = urllib.request.Request(
+        f"http://localhost:{port}{INVOKE_PATH}",
+        data=json.dumps(event).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=60) as response:
+        payload = json.loads(response.read())
+    return (time.perf_counter() - start) * 1000, payload
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(args, request_event):
+    latencies = {"cold": [], "pinged": [], "warm": []}
+
+    for sample in range(args.samples):
+        # One fresh container serves a request cold, another after a ping
+        for ping_first in (False, True):
+            container_id = start_container(args.image, args.code_dir, args.port, args.env)
+            try:
+                wait_for_port(args.port)
+                if ping_first:
+                    invoke(args.port, {"warmup": True})
+                latency, payload = invoke(args.port, request_event)
+                if payload.get("statusCode", 500) >= 500:
+                    raise RuntimeError(f"Request failed: {payload}")
+                latencies["pinged" if ping_first else "cold"].append(latency)
+                if not ping_first:
+                    for _ in range(args.warm_requests):
+                        latencies["warm"].append(invoke(args.port, request_event)[0])
+            finally:
+                stop_container(container_id)
+        print(f"Sample {sample + 1}/{args.samples} done", file=sys.stderr)
+
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5, help="Fresh containers per kind")
+    parser.add_argument("--warm-requests", type=int, default=20, help="Warm requests per sample")
+    parser.add_argument("--path", default="/", help="API path to request")
+    parser.add_argument("--token", help="JWT for authenticated paths")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the function")
+    parser.add_argument(
+        "--code-dir", default=".aws-sam/build/RunsFunction", help="Built function code"
+    )
+    parser.add_argument("--image", default="public.ecr.aws/lambda/python:3.13")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args(argv)
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else None
+    latencies = measure(args, api_gateway_event("GET", args.path, headers))
+
+    print(f"{'kind':<8}{'n':>6}{'p50 ms':>10}{'p90 ms':>10}")
+    for kind, values in latencies.items():
+        if values:
+            print(
+                f"{kind:<8}{len(values):>6}{statistics.median(values):>10.1f}"
+                f"{percentile(values, 0.9):>10.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
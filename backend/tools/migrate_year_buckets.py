@@ -0,0 +1,119 @@
+# tools/migrate_year_buckets.py
+"""Backfill the date-index attributes (run_date, user_year) on existing run items.
+
+Runs written since the user-date-index and user-year-index were filled carry
+`run_date` and `user_year` ("<user_id>#<YYYY>"); older items don't, so they
+are missing from the indexes that serve date-range reads. This scans the
+Runs table with parallel segments and sets both attributes on every run
+that lacks one. Delete tombstones are left out of the indexes on purpose.
+The update is conditional, so the migration can be interrupted and re-run,
+and it leaves `updated_at` alone (delta sync clients see no change).
+
+Run it right after deploying. Turn on RUNS_YEAR_BUCKETS once a run of this
+tool reports nothing left to migrate.
+
+Usage (from backend/, with RUNS_TABLE set):
+    python tools/migrate_year_buckets.py --segments 8
+    python tools/migrate_year_buckets.py --dry-run
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.runs.dal.dynamodb import get_table  # noqa: E402
+from src.runs.dal.run_dal import year_bucket  # noqa: E402
+
+
+# Live runs (tombstones have no date) missing either index attribute
+_NEEDS_MIGRATION = (
+    "attribute_exists(#date) AND "
+    "(attribute_not_exists(user_year) OR attribute_not_exists(run_date))"
+)
+
+
+def _runs_table():
+    return get_table("RUNS_TABLE", "test-runs")
+
+
+def scan_segment(segment, total_segments):
+    """Keys and dates of the runs in one scan segment missing an index attribute"""
+    table = _runs_table()
+
+    scan_kwargs = {
+        "Segment": segment,
+        "TotalSegments": total_segments,
+        "ProjectionExpression": "user_id, run_id, #date",
+        "FilterExpression": _NEEDS_MIGRATION,
+        "ExpressionAttributeNames": {"#date": "date"},
+    }
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def migrate_item(item):
+    """Set run_date and user_year on one run; returns False if it changed meanwhile"""
+    table = _runs_table()
+
+    try:
+        table.update_item(
+            Key={"user_id": item["user_id"], "run_id": item["run_id"]},
+            UpdateExpression="SET run_date = #date, user_year = :bucket",
+            # Skip runs deleted (tombstoned) or already migrated since the scan
+            ConditionExpression=_NEEDS_MIGRATION,
+            ExpressionAttributeNames={"#date": "date"},
+            ExpressionAttributeValues={
+                ":bucket": year_bucket(item["user_id"], int(item["date"][:4]))
+            },
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return False
+    return True
+
+
+def migrate_segment(segment, total_segments, dry_run=False):
+    """Migrate one segment; returns (found, migrated)"""
+    found = migrated = 0
+    for item in scan_segment(segment, total_segments):
+        found += 1
+        if not dry_run and migrate_item(item):
+            migrated += 1
+    return found, migrated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=4, help="Parallel scan segments")
+    parser.add_argument("--dry-run", action="store_true", help="Count only, write nothing")
+    args = parser.parse_args(argv)
+
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        results = list(
+            executor.map(
+                lambda segment: migrate_segment(segment, args.segments, args.dry_run),
+                range(args.segments),
+            )
+        )
+
+    found = sum(result[0] for result in results)
+    migrated = sum(result[1] for result in results)
+    if args.dry_run:
+        print(f"{found} runs to migrate")
+    else:
+        print(f"Migrated {migrated} of {found} runs missing date-index attributes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
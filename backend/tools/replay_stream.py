@@ -0,0 +1,125 @@
+# tools/replay_stream.py
+"""Run the Runs table stream consumer locally against fake stream records.
+
+Reads change events as NDJSON, one per line, with items as plain JSON:
+
+    {"eventName": "INSERT", "NewImage": {"user_id": "u1", "run_id": "r1", ...}}
+    {"eventName": "MODIFY", "OldImage": {...}, "NewImage": {...}}
+    {"eventName": "REMOVE", "OldImage": {...}}
+
+and feeds them to stream_processor in batches, the way the Lambda event
+source mapping would: a failing record ends its batch, and the batch is
+retried from that record (the checkpoint) up to --retries times.
+
+--backfill-user replays every stored run of a user as an INSERT instead,
+which seeds rollups and leaderboards for runs written before the stream
+consumer was deployed. Event ids are derived from run ids, so running a
+backfill twice within two days applies it once.
+
+Usage (from backend/, with the table environment variables set):
+    python tools/replay_stream.py events.ndjson
+    python tools/replay_stream.py --backfill-user <user_id>
+"""
+
+import argparse
+import json
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.runs.stream_processor import make_stream_record, process_records  # noqa: E402
+
+
+def records_from_file(path):
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            event = json.loads(line, parse_float=Decimal)
+            yield make_stream_record(
+                event["eventName"],
+                old_item=event.get("OldImage"),
+                new_item=event.get("NewImage"),
+                sequence_number=number,
+                event_id=event.get("eventID"),
+            )
+
+
+def records_from_table(user_id):
+    from src.runs.dal.dynamodb import get_table
+
+    table = get_table("RUNS_TABLE", "test-runs")
+    query_kwargs = {
+        "KeyConditionExpression": "user_id = :user_id",
+        "FilterExpression": "attribute_not_exists(deleted_at)",
+        "ExpressionAttributeValues": {":user_id": user_id},
+    }
+    number = 0
+    while True:
+        response = table.query(**query_kwargs)
+        for item in response.get("Items", []):
+            number += 1
+            yield make_stream_record(
+                "INSERT",
+                new_item=item,
+                sequence_number=number,
+                event_id=f"backfill-{item['run_id']}",
+            )
+        if "LastEvaluatedKey" not in response:
+            return
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def replay(records, batch_size, retries):
+    """Process records in batches; returns (processed, failed sequence number or None)"""
+    records = list(records)
+    position = attempts = 0
+
+    while position < len(records):
+        batch = records[position : position + batch_size]
+        failures = process_records(batch)
+        if not failures:
+            position += len(batch)
+            attempts = 0
+            continue
+
+        # Everything before the failed record is checkpointed
+        failed = failures[0]["itemIdentifier"]
+        position += next(
+            i
+            for i, record in enumerate(batch)
+            if record["dynamodb"]["SequenceNumber"] == failed
+        )
+        attempts += 1
+        if attempts > retries:
+            return position, failed
+
+    return position, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("events", nargs="?", help="NDJSON file of change events")
+    source.add_argument("--backfill-user", help="Replay a user's stored runs as INSERTs")
+    parser.add_argument("--batch-size", type=int, default=100, help="Records per batch")
+    parser.add_argument("--retries", type=int, default=2, help="Retries of a failing record")
+    args = parser.parse_args(argv)
+
+    if args.backfill_user:
+        records = records_from_table(args.backfill_user)
+    else:
+        records = records_from_file(args.events)
+
+    processed, failed = replay(records, args.batch_size, args.retries)
+    print(f"Processed {processed} records")
+    if failed is not None:
+        print(f"Stopped at sequence number {failed} after {args.retries} retries")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())